@@ -1,4 +1,5 @@
-from typing import Dict, List, Optional
+import time
+from typing import Callable, Dict, List, Optional
 from roles import Player
 
 class ActionCollector:
@@ -7,11 +8,18 @@ class ActionCollector:
         self.collected_actions: Dict[str, List[str]] = {}
         self.is_complete = False
         self.completion_callback = completion_callback
+        # Wall-clock times of the first and last accepted submission this night
+        self.first_action_at: Optional[float] = None
+        self.last_action_at: Optional[float] = None
+        # Wall-clock time after which missing actions are filled in with defaults
+        self.deadline: Optional[float] = None
 
-    def initialize_collection(self, players_needing_actions: Dict[str, str]):
+    def initialize_collection(self, players_needing_actions: Dict[str, str], timeout: Optional[float] = None):
         self.expected_players = players_needing_actions.copy()
         self.collected_actions = {}
         self.is_complete = len(players_needing_actions) == 0
+        self.first_action_at = self.last_action_at = None
+        self.deadline = time.time() + timeout if timeout and not self.is_complete else None
 
     def submit_action(self, username: str, choices: List[str]) -> Dict:
         if username not in self.expected_players:
@@ -21,6 +29,9 @@ class ActionCollector:
             return {"error": f"Player {username} has already submitted their action"}
 
         self.collected_actions[username] = choices
+        self.last_action_at = time.time()
+        if self.first_action_at is None:
+            self.first_action_at = self.last_action_at
 
         result = {
             "success": True,
@@ -30,15 +41,49 @@ class ActionCollector:
         }
 
         if len(self.collected_actions) == len(self.expected_players):
-            self.is_complete = True
-            result["collection_complete"] = True
-            
-            if self.completion_callback:
-                game_result = self.completion_callback()
-                result["game_result"] = game_result
+            self._complete(result)
 
         return result
 
+    def complete_with_defaults(self, default_choices: Callable[[str, str], Optional[List[str]]]) -> Dict:
+        """Close the collection, e.g. at its deadline, filling in every missing action.
+
+        default_choices(username, role) gives the choices to use for a
+        player who has not acted; None skips that player's action entirely.
+        """
+        if self.is_complete:
+            return {"error": "Collection is already complete"}
+
+        defaulted = []
+        for username, role in list(self.expected_players.items()):
+            if username in self.collected_actions:
+                continue
+            choices = default_choices(username, role)
+            if choices is None:
+                del self.expected_players[username]
+            else:
+                self.collected_actions[username] = choices
+            defaulted.append(username)
+
+        result = {
+            "success": True,
+            "message": f"Filled in actions for {len(defaulted)} player(s)",
+            "defaulted_players": defaulted,
+            "collection_complete": False,
+            "game_result": None
+        }
+        self._complete(result)
+        return result
+
+    def _complete(self, result: Dict):
+        self.is_complete = True
+        self.deadline = None
+        result["collection_complete"] = True
+
+        if self.completion_callback:
+            game_result = self.completion_callback()
+            result["game_result"] = game_result
+
     def get_collection_status(self) -> Dict:
         pending_players = [username for username in self.expected_players.keys()
                           if username not in self.collected_actions]
@@ -66,7 +111,27 @@ class ActionCollector:
     def set_completion_callback(self, callback):
         self.completion_callback = callback
 
+    def snapshot(self) -> Dict:
+        return {
+            "expected_players": dict(self.expected_players),
+            "collected_actions": {username: list(choices) for username, choices in self.collected_actions.items()},
+            "is_complete": self.is_complete,
+            "first_action_at": self.first_action_at,
+            "last_action_at": self.last_action_at,
+            "deadline": self.deadline
+        }
+
+    def restore(self, snapshot: Dict):
+        self.expected_players = dict(snapshot["expected_players"])
+        self.collected_actions = {username: list(choices) for username, choices in snapshot["collected_actions"].items()}
+        self.is_complete = snapshot["is_complete"]
+        self.first_action_at = snapshot.get("first_action_at")
+        self.last_action_at = snapshot.get("last_action_at")
+        self.deadline = snapshot.get("deadline")
+
     def reset(self):
         self.expected_players = {}
         self.collected_actions = {}
-        self.is_complete = False
\ No newline at end of file
+        self.is_complete = False
+        self.first_action_at = self.last_action_at = None
+        self.deadline = None
\ No newline at end of file
@@ -0,0 +1,49 @@
+from typing import List, Optional
+from roles import Player, Role, RoleType, Team
+
+
+class AlignmentCounts:
+    """Running counts of living players by team, kept in step with the game.
+
+    Rebuilt once when roles are assigned, then updated by the executor on
+    every death, resurrection and role change so win checks never rescan
+    the players.
+    """
+
+    __slots__ = ("alive", "alive_good", "alive_evil", "alive_demons")
+
+    def __init__(self):
+        self.alive = 0
+        self.alive_good = 0
+        self.alive_evil = 0
+        self.alive_demons = 0
+
+    @classmethod
+    def from_players(cls, players: List[Player]) -> "AlignmentCounts":
+        counts = cls()
+        for player in players:
+            if player.is_alive:
+                counts._adjust(player.role, 1)
+        return counts
+
+    def _adjust(self, role: Optional[Role], delta: int):
+        self.alive += delta
+        if role is None:
+            return
+        if role.team == Team.GOOD:
+            self.alive_good += delta
+        else:
+            self.alive_evil += delta
+        if role.role_type == RoleType.DEMON:
+            self.alive_demons += delta
+
+    def player_died(self, player: Player):
+        self._adjust(player.role, -1)
+
+    def player_revived(self, player: Player):
+        self._adjust(player.role, 1)
+
+    def role_changed(self, player: Player, old_role: Optional[Role], new_role: Optional[Role]):
+        if player.is_alive:
+            self._adjust(old_role, -1)
+            self._adjust(new_role, 1)
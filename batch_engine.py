@@ -0,0 +1,398 @@
+import argparse
+import random
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from clocktower_game import FIRST_NIGHT_INPUT_ROLES, NIGHT_INPUT_ROLES, ClocktowerGame
+from game_scripts import DEFAULT_SCRIPT, DRAW_ORDER, Script, get_script
+from role_executor import is_automatic_role
+from roles import GamePhase, Role, RoleType, Team, roles
+from simulator import RandomAgent, SimulationStats, format_report, parse_player_counts
+
+NO_TARGET = -1
+NO_RESULT = -1
+
+# Values of BatchGames.winner
+UNDECIDED, GOOD_WINS, EVIL_WINS = 0, 1, 2
+
+# Small integer ids for roles, so each seat's role fits in one byte
+ROLE_TABLE: List[Role] = list(roles.values())
+ROLE_IDS = {role.name: role_id for role_id, role in enumerate(ROLE_TABLE)}
+NO_ROLE = 255
+
+# Roles whose handlers change state or give a numeric result; every other
+# built-in handler only produces text, so the batch engine skips it
+BATCH_ROLES = ("Poisoner", "Imp", "Chef", "Empath", "Fortune Teller")
+
+
+def role_id_for(role: Role) -> int:
+    # Roles registered by plugins after import get the next free id
+    role_id = ROLE_IDS.get(role.name)
+    if role_id is None:
+        if len(ROLE_TABLE) >= NO_ROLE:
+            raise ValueError("Too many roles for a one-byte role id")
+        role_id = len(ROLE_TABLE)
+        ROLE_TABLE.append(role)
+        ROLE_IDS[role.name] = role_id
+    return role_id
+
+
+def _lookup(predicate) -> np.ndarray:
+    """Bool table indexed by role id, so role_ids -> property is one fancy-indexing step."""
+    table = np.zeros(NO_ROLE + 1, dtype=bool)
+    for role in roles.values():
+        table[role_id_for(role)] = predicate(role)
+    return table
+
+
+class BatchGames:
+    """Many games of one size, advanced night by night in lockstep as NumPy arrays.
+
+    Each game is a row of N x seats arrays (role ids from ROLE_TABLE,
+    alive, poisoned), so a night runs as a handful of array operations for
+    every game at once instead of a RoleExecutor per game. Rules are the
+    RoleExecutor's: who is asked for targets, night order, the Poisoner's
+    poison, Imp kills with the Soldier safe unless poisoned, starpass, and
+    the Chef, Empath and Fortune Teller readings. The Monk wakes but its
+    handler protects nobody, so it has no effect here either.
+
+    Given the same deal and the same targets a batch game matches
+    ClocktowerGame state for state (see verify()). Draws the object engine
+    makes from its own RNG (the starpass pick, Washerwoman-style pairs, a
+    Fortune Teller sent fewer than two targets) come from the batch's
+    generator instead, and text-only results are not produced.
+    """
+
+    def __init__(self, role_ids: np.ndarray, rng: Optional[np.random.Generator] = None):
+        self.role_ids = np.array(role_ids, dtype=np.uint8)
+        self.count, self.size = self.role_ids.shape
+        self.alive = np.ones(self.role_ids.shape, dtype=bool)
+        self.poisoned = np.zeros(self.role_ids.shape, dtype=bool)
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+        # The night being played; every unfinished game is on the same night
+        self.night = 1
+        self.active = np.ones(self.count, dtype=bool)
+        self.winner = np.full(self.count, UNDECIDED, dtype=np.int8)
+        # Night each game ended on, or the last night played if it has not ended
+        self.nights = np.zeros(self.count, dtype=np.int16)
+
+        # Readings from the night just resolved, per seat; NO_RESULT where none was given
+        self.chef = np.full(self.role_ids.shape, NO_RESULT, dtype=np.int8)
+        self.empath = np.full(self.role_ids.shape, NO_RESULT, dtype=np.int8)
+        self.fortune = np.full(self.role_ids.shape, NO_RESULT, dtype=np.int8)
+
+        self._evil = _lookup(lambda role: role.team == Team.EVIL)
+        self._demon = _lookup(lambda role: role.role_type == RoleType.DEMON)
+        self._minion = _lookup(lambda role: role.role_type == RoleType.MINION)
+        self._asked = {True: _lookup(lambda role: role.name in FIRST_NIGHT_INPUT_ROLES),
+                       False: _lookup(lambda role: role.name in NIGHT_INPUT_ROLES)}
+        self._ids = {name: role_id_for(roles[name]) for name in BATCH_ROLES + ("Soldier",) if name in roles}
+        self._steps = {first_night: self._night_steps(first_night) for first_night in (True, False)}
+
+    @classmethod
+    def deal(cls, count: int, player_count: int, rng: Optional[np.random.Generator] = None,
+             script: Optional[Script] = None) -> "BatchGames":
+        """count fresh games dealt the way the script deals: draw each type in turn, shuffle, seat in order."""
+        rng = rng if rng is not None else np.random.default_rng()
+        script = script if script is not None else get_script()
+        base = script.setups[player_count]
+        pools = script.pools[player_count]
+        # Per-game type counts, moved by the setup modifiers of whatever has been drawn so far
+        counts = {role_type: np.full(count, base[role_type], dtype=np.int16) for role_type in DRAW_ORDER}
+        drawn = []
+        dealt = []
+        for role_type in DRAW_ORDER:
+            pool = np.array([role_id_for(role) for role in pools[role_type]], dtype=np.uint8)
+            wanted = int(counts[role_type].max())
+            if not wanted:
+                continue
+            # The first k of a random permutation are a uniform sample of k, so each game keeps its own count
+            picks = pool[np.argsort(rng.random((count, len(pool))), axis=1)[:, :wanted]]
+            kept = np.arange(wanted) < counts[role_type][:, None]
+            for role in pools[role_type]:
+                deltas = script.modifiers.get(role.name)
+                if deltas:
+                    has_role = ((picks == role_id_for(role)) & kept).any(axis=1)
+                    for changed, delta in deltas.items():
+                        counts[changed] += has_role * delta
+            drawn.append(picks)
+            dealt.append(kept)
+
+        # Every game deals exactly player_count roles, so the kept picks reshape back into rows
+        role_ids = np.concatenate(drawn, axis=1)[np.concatenate(dealt, axis=1)].reshape(count, player_count)
+        role_ids = np.take_along_axis(role_ids, np.argsort(rng.random(role_ids.shape), axis=1), axis=1)
+        return cls(role_ids, rng)
+
+    @classmethod
+    def from_roles(cls, seatings: Sequence[Sequence[Optional[Role]]],
+                   rng: Optional[np.random.Generator] = None) -> "BatchGames":
+        """Games with the given roles per seat, e.g. copied from ClocktowerGame players before night 1."""
+        return cls(np.array([[role_id_for(role) if role else NO_ROLE for role in seating] for seating in seatings],
+                            dtype=np.uint8), rng)
+
+    def _night_steps(self, first_night: bool) -> List[str]:
+        steps = []
+        for name in BATCH_ROLES:
+            role = roles.get(name)
+            order = role and (role.first_night_order if first_night else role.night_order)
+            if order is not None:
+                steps.append((order, name))
+        return [name for _, name in sorted(steps)]
+
+    def pending(self) -> np.ndarray:
+        """Seats asked for targets tonight, as _collect_night_actions asks them."""
+        return self._asked[self.night == 1][self.role_ids] & self.alive & self.active[:, None]
+
+    def random_targets(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Targets for every pending seat under RandomAgent's rules.
+
+        Returns first and second target seats (NO_TARGET where none);
+        only the Fortune Teller gets a second target.
+        """
+        first = np.full(self.role_ids.shape, NO_TARGET, dtype=np.int16)
+        second = np.full(self.role_ids.shape, NO_TARGET, dtype=np.int16)
+        games, seats = np.nonzero(self.pending())
+        if not games.size:
+            return first, second
+
+        rows = np.arange(games.size)
+        # Living players other than the actor, in uniformly random order
+        keys = np.where(self.alive[games], self.rng.random((games.size, self.size)), -1.0)
+        keys[rows, seats] = -1.0
+        picked = keys.argmax(axis=1)
+        first[games, seats] = np.where(keys[rows, picked] >= 0, picked, NO_TARGET)
+        keys[rows, picked] = -1.0
+        picked = keys.argmax(axis=1)
+        fortune_teller = self.role_ids[games, seats] == self._ids.get("Fortune Teller")
+        second[games, seats] = np.where(fortune_teller & (keys[rows, picked] >= 0), picked, NO_TARGET)
+        return first, second
+
+    def resolve_night(self, first: np.ndarray, second: Optional[np.ndarray] = None):
+        """Resolve tonight for every unfinished game, check wins at dawn and move on to the next night.
+
+        first and second hold each pending seat's target seats (NO_TARGET for none).
+        """
+        if second is None:
+            second = np.full(self.role_ids.shape, NO_TARGET, dtype=np.int16)
+        first_night = self.night == 1
+        asked = self.pending()
+        # Seats wake as the role they held at dusk, as a night schedule is built before anyone acts
+        dusk_roles = self.role_ids.copy()
+        for table in (self.chef, self.empath, self.fortune):
+            table.fill(NO_RESULT)
+
+        for name in self._steps[first_night]:
+            waking = (dusk_roles == self._ids[name]) & self.active[:, None]
+            # Players asked for targets act even if they die first; automatic roles only wake alive
+            if is_automatic_role(name):
+                waking &= asked | self.alive
+            else:
+                waking &= asked
+            if waking.any():
+                self._handlers[name](self, waking, first, second)
+
+        playing = self.active.copy()
+        self._check_wins()
+        self.nights[playing] = self.night
+        self.night += 1
+
+    def _poison(self, waking: np.ndarray, first: np.ndarray, second: np.ndarray):
+        games, seats = np.nonzero(waking)
+        targets = first[games, seats]
+        chosen = targets != NO_TARGET
+        self.poisoned[games[chosen], targets[chosen]] = True
+
+    def _kill(self, waking: np.ndarray, first: np.ndarray, second: np.ndarray):
+        # Seat by seat, in night order, in case a game has more than one Imp
+        for seat in np.flatnonzero(waking.any(axis=0)):
+            games = np.flatnonzero(waking[:, seat])
+            targets = first[games, seat]
+            games, targets = games[targets != NO_TARGET], targets[targets != NO_TARGET]
+
+            starpass = targets == seat
+            games_killing, targets = games[~starpass], targets[~starpass]
+            safe = (self.role_ids[games_killing, targets] == self._ids.get("Soldier")) & \
+                   ~self.poisoned[games_killing, targets]
+            self.alive[games_killing[~safe], targets[~safe]] = False
+
+            games = games[starpass]
+            if games.size:
+                self.alive[games, seat] = False
+                self._promote_minion(games)
+
+    def _promote_minion(self, games: np.ndarray):
+        minions = self._minion[self.role_ids[games]] & self.alive[games]
+        keys = np.where(minions, self.rng.random(minions.shape), -1.0)
+        picked = keys.argmax(axis=1)
+        promoted = minions.any(axis=1)
+        self.role_ids[games[promoted], picked[promoted]] = self._ids["Imp"]
+
+    def _count_pairs(self, waking: np.ndarray, first: np.ndarray, second: np.ndarray):
+        evil = self._evil[self.role_ids]
+        pairs = (evil & np.roll(evil, -1, axis=1)).sum(axis=1, dtype=np.int8)
+        self.chef[waking] = np.broadcast_to(pairs[:, None], waking.shape)[waking]
+
+    def _sense_neighbors(self, waking: np.ndarray, first: np.ndarray, second: np.ndarray):
+        alive_evil = (self._evil[self.role_ids] & self.alive).astype(np.int8)
+        neighbors = np.roll(alive_evil, 1, axis=1) + np.roll(alive_evil, -1, axis=1)
+        self.empath[waking] = neighbors[waking]
+
+    def _read_fortune(self, waking: np.ndarray, first: np.ndarray, second: np.ndarray):
+        games, seats = np.nonzero(waking)
+        a, b = first[games, seats], second[games, seats]
+        read = (a != NO_TARGET) & (b != NO_TARGET)
+        games, seats, a, b = games[read], seats[read], a[read], b[read]
+        demon = self._demon[self.role_ids]
+        self.fortune[games, seats] = demon[games, a] | demon[games, b]
+
+    _handlers = {"Poisoner": _poison, "Imp": _kill, "Chef": _count_pairs,
+                 "Empath": _sense_neighbors, "Fortune Teller": _read_fortune}
+
+    def _check_wins(self):
+        evil = self._evil[self.role_ids]
+        alive_evil = (self.alive & evil).sum(axis=1)
+        alive_good = (self.alive & ~evil & (self.role_ids != NO_ROLE)).sum(axis=1)
+        evil_wins = self.active & (alive_evil >= alive_good)
+        good_wins = self.active & ~evil_wins & (alive_evil == 0)
+        self.winner[evil_wins] = EVIL_WINS
+        self.winner[good_wins] = GOOD_WINS
+        self.active &= ~(evil_wins | good_wins)
+
+    def run(self, max_nights: int = 20):
+        """Play every game to the end, or until max_nights have been played, with random targets."""
+        while self.active.any() and self.night <= max_nights:
+            self.resolve_night(*self.random_targets())
+
+    def stats(self) -> SimulationStats:
+        return SimulationStats(games=self.count, good_wins=int((self.winner == GOOD_WINS).sum()),
+                               evil_wins=int((self.winner == EVIL_WINS).sum()),
+                               unfinished=int((self.winner == UNDECIDED).sum()), total_nights=int(self.nights.sum()))
+
+
+def run_batches(player_counts: Sequence[int], games_per_count: int, seed: int = 0, max_nights: int = 20,
+                batch_size: int = 100_000, script: str = DEFAULT_SCRIPT) -> Dict[Tuple[str, int], SimulationStats]:
+    """The simulator's report, computed batch_size games at a time."""
+    compiled = get_script(script)
+    report = {}
+    for player_count in player_counts:
+        rng = np.random.default_rng([seed, player_count])
+        stats = SimulationStats()
+        for start in range(0, games_per_count, batch_size):
+            batch = BatchGames.deal(min(batch_size, games_per_count - start), player_count, rng, compiled)
+            batch.run(max_nights)
+            stats.merge(batch.stats())
+        report[(script, player_count)] = stats
+    return report
+
+
+def _reading(result: Optional[str]) -> int:
+    # The numeric part of a Chef, Empath or Fortune Teller result string
+    if not result:
+        return NO_RESULT
+    if result.startswith("YES"):
+        return 1
+    if result.startswith("NO -"):
+        return 0
+    return int(result.split(": ")[1] if ": " in result else result.split(" ")[2])
+
+
+def verify(player_count: int, games: int, seed: int = 0, max_nights: int = 20,
+           script: str = DEFAULT_SCRIPT) -> List[str]:
+    """Play games in ClocktowerGame and BatchGames side by side with the same targets; returns any differences."""
+    seeds = random.Random(seed)
+    object_games = []
+    agents = []
+    for _ in range(games):
+        rng = random.Random(seeds.getrandbits(64))
+        game = ClocktowerGame(rng=rng, verbose=False, script=get_script(script))
+        # A first night nobody is asked about resolves inside start_game, but changes no state
+        game.start_game([f"Player{i + 1}" for i in range(player_count)])
+        object_games.append(game)
+        agents.append(RandomAgent(rng))
+    batch = BatchGames.from_roles([[p.role for p in game.players] for game in object_games],
+                                  np.random.default_rng(seed))
+
+    differences = []
+    readings = {"Chef": batch.chef, "Empath": batch.empath, "Fortune Teller": batch.fortune}
+    while batch.active.any() and batch.night <= max_nights:
+        first = np.full(batch.role_ids.shape, NO_TARGET, dtype=np.int16)
+        second = np.full(batch.role_ids.shape, NO_TARGET, dtype=np.int16)
+        pending = batch.pending()
+        for index in np.flatnonzero(batch.active):
+            game = object_games[index]
+            if game.phase == GamePhase.NIGHT:
+                usernames = game.action_collector.get_collection_status()["pending_players"]
+            else:
+                usernames = []  # Nobody was asked, so the night already resolved itself
+            if sorted(game.seat_index[u] for u in usernames) != list(np.flatnonzero(pending[index])):
+                differences.append(f"game {index} night {batch.night}: asked {usernames}")
+            for username in usernames:
+                targets = agents[index].choose_targets(game, game.get_player(username))
+                seat = game.seat_index[username]
+                for table, target in zip((first, second), targets):
+                    table[index, seat] = game.seat_index[target]
+                game.submit_night_action(username, targets)
+        night = batch.night
+        batch.resolve_night(first, second)
+
+        for index, game in enumerate(object_games):
+            if game.night_count != night:
+                continue
+            results = game.night_1_results if night == 1 else game.night_action_results
+            expected = [p.is_alive for p in game.players], [p.is_poisoned for p in game.players], \
+                [p.role.name if p.role else None for p in game.players]
+            actual = list(batch.alive[index]), list(batch.poisoned[index]), \
+                [ROLE_TABLE[role_id].name if role_id != NO_ROLE else None for role_id in batch.role_ids[index]]
+            if expected != actual:
+                differences.append(f"game {index} night {night}: state differs")
+            for seat, player in enumerate(game.players):
+                table = readings.get(player.role.name if player.role else None)
+                if table is not None and table[index, seat] != _reading(results.get(player.username)):
+                    differences.append(f"game {index} night {night}: {player.role.name} reading differs")
+            winner = {"good": GOOD_WINS, "evil": EVIL_WINS}.get((game.game_result or {}).get("winner"), UNDECIDED)
+            if winner != batch.winner[index]:
+                differences.append(f"game {index} night {night}: winner differs")
+            if game.phase == GamePhase.DAY and night < max_nights:
+                game.progress_to_night()
+    return differences
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Run Clocktower simulations as vectorized batches")
+    parser.add_argument("--games", type=int, default=100_000, help="games per player count")
+    parser.add_argument("--players", default="5-15", help="player counts, e.g. 5-15 or 5,7,9")
+    parser.add_argument("--script", default=DEFAULT_SCRIPT, help="name of a script in scripts/")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-nights", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=100_000, help="games held in memory at once")
+    parser.add_argument("--verify", type=int, metavar="GAMES",
+                        help="instead, check GAMES games per player count against ClocktowerGame")
+    args = parser.parse_args(argv)
+
+    if args.verify:
+        failed = False
+        for player_count in parse_player_counts(args.players):
+            differences = verify(player_count, args.verify, args.seed, args.max_nights, args.script)
+            print(f"{player_count} players: {args.verify} games, {len(differences)} difference(s)")
+            for difference in differences[:10]:
+                print(f"  {difference}")
+            failed = failed or bool(differences)
+        return 1 if failed else 0
+
+    started = time.perf_counter()
+    report = run_batches(parse_player_counts(args.players), args.games, args.seed, args.max_nights, args.batch_size,
+                         args.script)
+    elapsed = time.perf_counter() - started
+
+    total_games = sum(stats.games for stats in report.values())
+    print(format_report(report))
+    print(f"\n{total_games} games in {elapsed:.2f}s ({total_games / elapsed * 3600:,.0f} games/hour)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
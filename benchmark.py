@@ -0,0 +1,270 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from clocktower_game import ClocktowerGame
+from role_executor import RoleExecutor, get_role_handler, is_automatic_role, registered_roles
+from roles import roles
+from world_solver import WorldSolver, play_nights
+
+DEFAULT_BASELINE = "benchmark_baseline.json"
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Imported by every pool worker and bot restart, so their cold-start time is
+# tracked against the baseline like any other benchmark
+IMPORTED_MODULES = ("clocktower_game", "simulator")
+
+# Fifteen distinct roles; the role under test is swapped into seat 0
+HANDLER_TABLE = ["Imp", "Poisoner", "Monk", "Fortune Teller", "Empath", "Chef", "Washerwoman", "Librarian",
+                 "Investigator", "Undertaker", "Ravenkeeper", "Spy", "Scarlet Woman", "Soldier", "Saint"]
+
+
+class Benchmark:
+    """One measured operation.
+
+    setup builds fresh state and teardown disposes of it, both outside the
+    timer; run is timed on it. Each sample times `inner` runs back to back
+    and reports the mean per run, so sub-microsecond operations still rise
+    above timer resolution.
+    """
+
+    def __init__(self, name: str, setup: Callable[[], Any], run: Callable[[Any], Any], inner: int = 100,
+                 teardown: Optional[Callable[[], Any]] = None):
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.inner = inner
+        self.teardown = teardown
+
+    def measure(self, samples: int) -> List[float]:
+        timings = []
+        for _ in range(samples):
+            states = [self.setup() for _ in range(self.inner)]
+            started = time.perf_counter_ns()
+            for state in states:
+                self.run(state)
+            timings.append((time.perf_counter_ns() - started) / self.inner / 1000)
+            if self.teardown is not None:
+                self.teardown()
+        return timings
+
+
+class ImportBenchmark(Benchmark):
+    """Time to import a module in a fresh interpreter, so nothing it needs is already loaded."""
+
+    def __init__(self, module: str):
+        super().__init__(f"import[{module}]", lambda: None, lambda state: None, inner=1)
+        self.module = module
+
+    def measure(self, samples: int) -> List[float]:
+        code = (f"import time; started = time.perf_counter_ns(); import {self.module}; "
+                f"print((time.perf_counter_ns() - started) / 1000)")
+        return [float(subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, capture_output=True,
+                                     text=True, check=True).stdout)
+                for _ in range(samples)]
+
+
+def usernames(count: int) -> List[str]:
+    return [f"player{i}" for i in range(count)]
+
+
+def started_game(player_count: int, seed: int, hardcoded: Optional[Dict[str, str]] = None) -> ClocktowerGame:
+    game = ClocktowerGame(rng=random.Random(seed), verbose=False)
+    game.start_game(usernames(player_count), hardcoded)
+    return game
+
+
+def night_targets(game: ClocktowerGame, username: str) -> List[str]:
+    player = game.get_player(username)
+    candidates = [p.username for p in game.players if p.is_alive and p.username != username]
+    return candidates[:2 if player.role.name == "Fortune Teller" else 1]
+
+
+def submit_all(game: ClocktowerGame):
+    for username in list(game.action_collector.get_collection_status()["pending_players"]):
+        game.submit_night_action(username, night_targets(game, username))
+
+
+def table_game(role_name: str) -> ClocktowerGame:
+    table = [role_name] + [name for name in HANDLER_TABLE if name != role_name][:14]
+    return started_game(15, 0, dict(zip(usernames(15), table)))
+
+
+def engine_benchmarks() -> List[Benchmark]:
+    benchmarks: List[Benchmark] = [ImportBenchmark(module) for module in IMPORTED_MODULES]
+    seeds = iter(range(10 ** 9))
+
+    for player_count in range(5, 16):
+        benchmarks.append(Benchmark(
+            f"start_game[{player_count}]",
+            lambda: ClocktowerGame(rng=random.Random(next(seeds)), verbose=False),
+            lambda game, n=player_count: game.start_game(usernames(n))))
+
+    def night_ready(player_count: int) -> ClocktowerGame:
+        # Seeded so every run times the same games; a game that ended on night 1 is swapped for the next seed
+        while True:
+            game = started_game(player_count, next(seeds) % 1000)
+            submit_all(game)
+            if game.phase.value == "day":
+                game.progress_to_night()
+                return game
+
+    for player_count in (5, 10, 15):
+        benchmarks.append(Benchmark(f"night_cycle[{player_count}]", lambda n=player_count: night_ready(n), submit_all))
+
+    for role_name in registered_roles():
+        if role_name not in roles:
+            continue
+        handler = get_role_handler(role_name)
+        if is_automatic_role(role_name):
+            choices: List[str] = []
+        elif role_name == "Fortune Teller":
+            choices = ["player1", "player2"]
+        else:
+            choices = ["player1"]
+
+        def executor_for(role_name=role_name):
+            game = table_game(role_name)
+            return RoleExecutor(game.players, random.Random(0), game.seat_index, game.counts)
+
+        benchmarks.append(Benchmark(f"handler[{role_name}]", executor_for,
+                                    lambda executor, handler=handler, choices=choices: handler(executor, "player0", choices)))
+
+    benchmarks.append(Benchmark("check_win_condition[15]", lambda: started_game(15, next(seeds) % 1000),
+                                lambda game: game.check_win_condition(), inner=1000))
+
+    def informed_solver() -> WorldSolver:
+        game = play_nights(15, next(seeds) % 1000, 1)
+        username = next((p.username for p in game.players if p.username in game.night_1_results), game.players[0].username)
+        return WorldSolver.from_game(game, username)
+
+    benchmarks.append(Benchmark("solve_worlds[15]", informed_solver, WorldSolver.solve, inner=10))
+    return benchmarks
+
+
+class FakeChannel:
+    async def send(self, content=None, embed=None, **kwargs):
+        pass
+
+
+class FakeAuthor:
+    def __init__(self, member_id: int):
+        self.id = member_id
+
+
+class FakeMessage:
+    def __init__(self, member_id: int, content: str):
+        self.author = FakeAuthor(member_id)
+        self.content = content
+        self.channel = FakeChannel()
+
+
+def bot_benchmarks() -> List[Benchmark]:
+    """Bot dispatch against fake Discord objects; skipped when discord.py is not installed."""
+    os.environ.setdefault("GAME_DB", ":memory:")
+    os.environ.setdefault("NIGHT_RESOLUTION", "inline")
+    try:
+        import discord_bot
+    except ImportError as e:
+        print(f"Skipping bot benchmarks: {e}")
+        return []
+    from guild_session import GuildSession
+
+    loop = asyncio.new_event_loop()
+    guild_ids = iter(range(1, 10 ** 9))
+
+    def pending_action():
+        # A night-2 game with several players still to act, so one submission never resolves the night
+        while True:
+            game = started_game(10, next(guild_ids) % 1000)
+            submit_all(game)
+            if game.phase.value == "day":
+                game.progress_to_night()
+                pending = game.action_collector.get_collection_status()["pending_players"]
+                if len(pending) > 1:
+                    break
+        session = GuildSession(next(guild_ids))
+        session.game = game
+        for seat, player in enumerate(game.players):
+            session.add_member(session.guild_id * 100 + seat, player.username)
+        discord_bot.sessions.add(session)
+        discord_bot.loaded_guilds.add(session.guild_id)
+        username = pending[0]
+        member_id = session.guild_id * 100 + game.seat_index[username]
+        return FakeMessage(member_id, "!action " + " ".join(night_targets(game, username)))
+
+    def dispatch(message):
+        loop.run_until_complete(discord_bot.handle_action_dm(message))
+
+    circle_games = lambda: started_game(15, next(guild_ids) % 1000).players
+    return [
+        Benchmark("create_player_circle[15]", circle_games, discord_bot.create_player_circle, inner=1000),
+        Benchmark("handle_action_dm", pending_action, dispatch, inner=20,
+                  teardown=lambda: loop.run_until_complete(discord_bot.actors.close()))
+    ]
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    """Names whose median got slower than the baseline by more than threshold."""
+    return [name for name, stats in results.items()
+            if name in baseline and stats["median_us"] > baseline[name]["median_us"] * (1 + threshold)]
+
+
+def format_results(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> str:
+    lines = [f"{'Benchmark':<32}{'Median us':>12}{'Min us':>12}{'Baseline':>12}{'Change':>10}"]
+    for name, stats in results.items():
+        reference = baseline.get(name)
+        if reference:
+            change = stats["median_us"] / reference["median_us"] - 1
+            flag = "  REGRESSION" if change > threshold else ""
+            lines.append(f"{name:<32}{stats['median_us']:>12.2f}{stats['min_us']:>12.2f}"
+                         f"{reference['median_us']:>12.2f}{change * 100:>+9.1f}%{flag}")
+        else:
+            lines.append(f"{name:<32}{stats['median_us']:>12.2f}{stats['min_us']:>12.2f}{'-':>12}{'-':>10}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the game engine, role handlers, world solver and bot dispatch")
+    parser.add_argument("--samples", type=int, default=15, help="timed samples per benchmark")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline file to compare against")
+    parser.add_argument("--save", action="store_true", help="write these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="slowdown that counts as a regression (0.25 = 25%%)")
+    parser.add_argument("--no-bot", action="store_true", help="skip benchmarks that need discord.py")
+    args = parser.parse_args(argv)
+
+    benchmarks = engine_benchmarks() + ([] if args.no_bot else bot_benchmarks())
+    results = {}
+    for benchmark in benchmarks:
+        if args.filter in benchmark.name:
+            timings = benchmark.measure(args.samples)
+            results[benchmark.name] = {"median_us": statistics.median(timings), "min_us": min(timings)}
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print(format_results(results, baseline, args.threshold))
+    regressions = compare(results, baseline, args.threshold)
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({**baseline, **results}, f, indent=2, sort_keys=True)
+        print(f"\nSaved {len(results)} results to {args.baseline}")
+    elif regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold * 100:.0f}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,21 +1,45 @@
 import random
+import time
 from typing import List, Dict, Optional
-from roles import *
+from roles import GamePhase, Player, Role, roles
 from action_collector import ActionCollector
-from role_executor import RoleExecutor
+from role_executor import RoleExecutor, build_seat_index, is_information_role
+from alignment import AlignmentCounts
+from night_schedule import NightStep, build_night_schedule
+from replay import EventLog, RecordingRandom, ReplayMismatch, ReplayRandom
+from engine_log import DEBUG, INFO, WARNING, engine_logger, log_engine_event
+from profiling import GameProfiler, profiled
+from game_scripts import DEFAULT_SCRIPT, Script, get_script
 
 
+# Roles whose players are asked for targets on the first night and on later nights
+FIRST_NIGHT_INPUT_ROLES = ("Poisoner", "Fortune Teller", "Butler", "Spy")
+NIGHT_INPUT_ROLES = ("Monk", "Poisoner", "Imp", "Fortune Teller")
+
 
 class ClocktowerGame:
-    def __init__(self):
+    def __init__(self, rng: Optional[random.Random] = None, verbose: bool = True,
+                 event_log: Optional[EventLog] = None, script: Optional[Script] = None):
         self.players: List[Player] = []
+        self.script = script if script is not None else get_script()
+        self.seat_index: Dict[str, int] = {}
+        self.counts = AlignmentCounts()
+        self._night_schedules: Dict[bool, List[NightStep]] = {}
         self.phase: GamePhase = GamePhase.SETUP
         self.day_count: int = 0
         self.night_count: int = 0
-        self._random = random
+        self._random = rng if rng is not None else random
+        self.verbose = verbose
+        self.event_log = event_log
+        if event_log is not None:
+            self._random = RecordingRandom(self._random, event_log)
         self.night_1_results: Dict[str, str] = {}
         self.night_action_results: Dict[str, str] = {}
         self.game_result: Optional[Dict] = None
+        self.last_night_seconds: Optional[float] = None
+        self.profiler: Optional[GameProfiler] = None
+        # Seconds players get to act each night before resolve_missing_actions may be called
+        self.action_timeout: Optional[float] = None
 
         self.action_collector = ActionCollector(completion_callback=self._on_actions_complete)
 
@@ -24,19 +48,27 @@ class ClocktowerGame:
         if len(usernames) < 5 or len(usernames) > 15:
             return {"error": "Game requires 5-15 players"}
 
+        self._record("start", usernames=list(usernames), hardcoded_roles=dict(hardcoded_roles) if hardcoded_roles else None,
+                     script=self.script.name)
+        self.script.load_handlers()
+
         self.players = [Player(username) for username in usernames]
+        self.seat_index = build_seat_index(self.players)
         player_count = len(usernames)
 
         if hardcoded_roles:
             self._assign_hardcoded_roles(hardcoded_roles)
             role_distribution = {"hardcoded": len(hardcoded_roles)}
         else:
-            role_distribution = self._get_role_distribution(player_count)
-            selected_roles = self._select_roles(role_distribution)
+            selected_roles = self.script.select_roles(self._random, player_count)
+            role_distribution = self.script.counts_with(self.script.distribution(player_count), selected_roles)
             self._assign_roles(selected_roles)
 
-        self.phase = GamePhase.NIGHT
+        self.counts = AlignmentCounts.from_players(self.players)
+        self._night_schedules = {}
+        self._record("roles", roles={p.username: p.role.name if p.role else None for p in self.players})
         self.night_count = 0
+        self._set_phase(GamePhase.NIGHT)
 
         self._start_first_night()
 
@@ -48,62 +80,31 @@ class ClocktowerGame:
             "pending_actions": len(self.action_collector.expected_players)
         }
 
-    def _get_role_distribution(self, player_count: int) -> Dict[RoleType, int]:
-        if player_count == 5:
-            return {RoleType.TOWNSFOLK: 3, RoleType.OUTSIDER: 0, RoleType.MINION: 1, RoleType.DEMON: 1}
-        elif player_count == 6:
-            return {RoleType.TOWNSFOLK: 3, RoleType.OUTSIDER: 1, RoleType.MINION: 1, RoleType.DEMON: 1}
-        elif player_count == 7:
-            return {RoleType.TOWNSFOLK: 5, RoleType.OUTSIDER: 0, RoleType.MINION: 1, RoleType.DEMON: 1}
-        elif player_count == 8:
-            return {RoleType.TOWNSFOLK: 5, RoleType.OUTSIDER: 1, RoleType.MINION: 1, RoleType.DEMON: 1}
-        elif player_count == 9:
-            return {RoleType.TOWNSFOLK: 5, RoleType.OUTSIDER: 2, RoleType.MINION: 1, RoleType.DEMON: 1}
-        elif player_count == 10:
-            return {RoleType.TOWNSFOLK: 7, RoleType.OUTSIDER: 0, RoleType.MINION: 2, RoleType.DEMON: 1}
-        else:
-            townsfolk = max(3, player_count - 4)
-            outsiders = max(0, (player_count - 7) // 2)
-            minions = min(3, player_count // 4)
-            return {RoleType.TOWNSFOLK: townsfolk, RoleType.OUTSIDER: outsiders,
-                   RoleType.MINION: minions, RoleType.DEMON: 1}
-
-    def _select_roles(self, distribution: Dict[RoleType, int]) -> List[Role]:
-        selected = []
-
-        townsfolk_roles = [r for r in roles.values() if r.role_type == RoleType.TOWNSFOLK]
-        outsider_roles = [r for r in roles.values() if r.role_type == RoleType.OUTSIDER]
-        minion_roles = [r for r in roles.values() if r.role_type == RoleType.MINION]
-        demon_roles = [r for r in roles.values() if r.role_type == RoleType.DEMON]
+    def get_seat(self, username: str) -> Optional[int]:
+        return self.seat_index.get(username)
 
-        selected.extend(random.sample(townsfolk_roles, distribution[RoleType.TOWNSFOLK]))
-        if distribution[RoleType.OUTSIDER] > 0:
-            selected.extend(random.sample(outsider_roles, min(distribution[RoleType.OUTSIDER], len(outsider_roles))))
-        selected.extend(random.sample(minion_roles, min(distribution[RoleType.MINION], len(minion_roles))))
-        selected.extend(random.sample(demon_roles, 1))
-
-        return selected
+    def get_player(self, username: str) -> Optional[Player]:
+        seat = self.seat_index.get(username)
+        return self.players[seat] if seat is not None else None
 
     def _assign_hardcoded_roles(self, hardcoded_roles: Dict[str, str]):
-        from roles import roles
-        print(f"Available roles: {list(roles.keys())}")
         for player in self.players:
             if player.username in hardcoded_roles:
                 role_name = hardcoded_roles[player.username]
-                print(f"Looking for role {role_name} for {player.username}")
                 if role_name in roles:
                     player.role = roles[role_name]
-                    print(f"Assigned {role_name} to {player.username}")
+                    self._log(DEBUG, "role_assigned", player=player.username, role=role_name)
                 else:
-                    print(f"Role {role_name} not found in roles dict")
+                    self._log(WARNING, "unknown_role", player=player.username, role=role_name)
 
     def _assign_roles(self, roles: List[Role]):
-        random.shuffle(roles)
+        self._random.shuffle(roles)
         for i, player in enumerate(self.players):
             if i < len(roles):
                 player.role = roles[i]
 
     def progress_to_day(self) -> Dict:
+        self._record("progress_to_day")
         if self.phase != GamePhase.NIGHT:
             return {"error": "Can only progress to day from night"}
         
@@ -116,23 +117,22 @@ class ClocktowerGame:
         
         self._execute_night_actions()
 
-        alive_players = [p for p in self.players if p.is_alive]
-
         return {
             "message": f"Day {self.day_count} begins",
             "phase": self.phase.value,
             "day_count": self.day_count,
-            "alive_players": len(alive_players),
+            "alive_players": self.counts.alive,
             "players": [{"username": p.username, "alive": p.is_alive} for p in self.players],
             "night_results": {"deaths": []}
         }
 
     def progress_to_night(self) -> Dict:
+        self._record("progress_to_night")
         if self.phase != GamePhase.DAY:
             return {"error": "Can only progress to night from day"}
 
         self.night_count += 1
-        self.phase = GamePhase.NIGHT
+        self._set_phase(GamePhase.NIGHT)
 
         self._collect_night_actions()
 
@@ -140,7 +140,7 @@ class ClocktowerGame:
             "message": f"Night {self.night_count} begins",
             "phase": self.phase.value,
             "night_count": self.night_count,
-            "alive_players": len([p for p in self.players if p.is_alive]),
+            "alive_players": self.counts.alive,
             "pending_actions": len(self.action_collector.expected_players)
         }
 
@@ -157,15 +157,14 @@ class ClocktowerGame:
                     "role": p.role.name if p.role else None
                 } for p in self.players
             ],
-            "alive_count": len([p for p in self.players if p.is_alive])
+            "alive_count": self.counts.alive
         }
 
     def check_win_condition(self) -> Optional[Dict]:
-        alive_players = [p for p in self.players if p.is_alive]
-        alive_good = [p for p in alive_players if p.role and p.role.team == Team.GOOD]
-        alive_evil = [p for p in alive_players if p.role and p.role.team == Team.EVIL]
+        alive_good = self.counts.alive_good
+        alive_evil = self.counts.alive_evil
 
-        if len(alive_evil) >= len(alive_good):
+        if alive_evil >= alive_good:
             return {"winner": "evil", "reason": "Evil equals or outnumbers good"}
 
         if not alive_evil:
@@ -173,6 +172,7 @@ class ClocktowerGame:
 
         return None
 
+    @profiled("collect_night_actions")
     def _collect_night_actions(self):
         self.night_action_results = {}
         players_needing_actions = {}
@@ -186,28 +186,52 @@ class ClocktowerGame:
 
             if self.night_count == 1:
                 # Night 1 (first night) roles that need input (Chef gets info automatically)
-                if role_name in ["Poisoner", "Fortune Teller", "Butler", "Spy"]:
+                if role_name in FIRST_NIGHT_INPUT_ROLES:
                     needs_input = True
                 else:
                     needs_input = False
             else:
-                if role_name in ["Monk", "Poisoner", "Imp", "Fortune Teller"]:
+                if role_name in NIGHT_INPUT_ROLES:
                     needs_input = True
 
             if needs_input:
                 players_needing_actions[player.username] = role_name
 
-        self.action_collector.initialize_collection(players_needing_actions)
+        self.action_collector.initialize_collection(players_needing_actions, self.action_timeout)
         
         if not players_needing_actions:
             self._execute_night_actions()
 
     def submit_night_action(self, username: str, choices: List[str]) -> Dict:
+        self._record("action", username=username, choices=list(choices))
         if self.phase != GamePhase.NIGHT:
             return {"error": "Night actions only available during night phase"}
 
         return self.action_collector.submit_action(username, choices)
 
+    def resolve_missing_actions(self, policy: str = "random") -> Dict:
+        """Fill in actions for players who missed the night's deadline, which resolves the night.
+
+        "random" picks random legal targets for them; "skip" drops their actions.
+        """
+        self._record("timeout", policy=policy)
+        if self.phase != GamePhase.NIGHT:
+            return {"error": "Night actions only available during night phase"}
+        if policy not in ("random", "skip"):
+            return {"error": f"Unknown default action policy {policy}"}
+
+        if policy == "skip":
+            return self.action_collector.complete_with_defaults(lambda username, role: None)
+        return self.action_collector.complete_with_defaults(self._random_targets)
+
+    def _random_targets(self, username: str, role_name: str) -> Optional[List[str]]:
+        # Same rules handle_action_dm enforces: living players other than the actor, two for the Fortune Teller
+        candidates = [p.username for p in self.players if p.is_alive and p.username != username]
+        count = 2 if role_name == "Fortune Teller" else 1
+        if len(candidates) < count:
+            return None
+        return self._random.sample(candidates, count)
+
     def _can_progress_to_day(self) -> bool:
         return self.action_collector.is_complete
 
@@ -216,109 +240,98 @@ class ClocktowerGame:
         self._execute()
         self._progress_to_day_automatically()
     
+    @profiled("execute")
     def _execute(self):
         """Execute night actions without progressing to day"""
-        print(f"EXECUTING NIGHT ACTIONS - All actions collected!")
+        self._log(INFO, "night_resolving", night=self.night_count)
         collected_actions = self.action_collector.get_collected_actions()
         
         if isinstance(collected_actions, dict) and "error" in collected_actions:
-            print("No actions to execute")
+            self._log(WARNING, "night_actions_missing", night=self.night_count)
             return
 
-        if self.night_count == 1:
-            night_order = ["Poisoner", "Washerwoman", "Librarian", "Investigator", "Chef", "Empath", "Fortune Teller", "Undertaker", "Butler", "Spy"]
-        else:
-            night_order = ["Poisoner", "Monk", "Scarlet Woman", "Imp", "Ravenkeeper", "Empath", "Fortune Teller", "Undertaker", "Butler", "Spy"]
-
-        actions_by_role = {}
-        for username, action_data in collected_actions.items():
-            role = action_data['role']
-            actions_by_role[role] = (username, action_data)
-
-        from role_executor import RoleExecutor
-        executor = RoleExecutor(self.players)
-
-        print(f"\n--- Processing Night Actions in Order ---")
-        for role in night_order:
-            if role in actions_by_role:
-                username, action_data = actions_by_role[role]
-                print(f"Processing {username} ({role}): {action_data['choices']}")
-                role_key = role.lower().replace(" ", "_")
-                result = executor.execute_role_action(role_key, username, action_data['choices'])
-                print(f"  → {result}")
-                
-                if self._role_gets_information(role) and result:
-                    self.night_action_results[username] = result
+        self._run_night_schedule(collected_actions)
+
+    def _get_night_schedule(self) -> List[NightStep]:
+        first_night = self.night_count == 1
+        schedule = self._night_schedules.get(first_night)
+        if schedule is None:
+            schedule = build_night_schedule(self.players, first_night)
+            self._night_schedules[first_night] = schedule
+        return schedule
+
+    def _run_night_schedule(self, collected_actions: Dict[str, Dict]):
+        started = time.perf_counter()
+        results = self.night_1_results if self.night_count == 1 else self.night_action_results
+        executor = RoleExecutor(self.players, self._random, self.seat_index, self.counts)
+
+        # Checked once per night so the per-step cost is a local bool test when debug is off
+        debug = self.verbose and engine_logger().isEnabledFor(DEBUG)
+        profiler = self.profiler
+        for step in self._get_night_schedule():
+            player = self.players[step.seat]
+            action_data = collected_actions.get(player.username)
+
+            if action_data is not None:
+                choices = action_data['choices']
+            elif step.automatic and player.is_alive:
+                # Information roles that don't need input are resolved automatically
+                choices = None
+            else:
+                continue
+
+            if profiler is None:
+                result = step.handler(executor, player.username, choices or [])
             else:
-                # Auto-execute information roles that don't need input
-                auto_info_roles = ["Spy", "Empath", "Washerwoman", "Librarian", "Investigator", "Chef", "Undertaker"]
-                if role in auto_info_roles:
-                    for player in self.players:
-                        if player.role and player.role.name == role and player.is_alive:
-                            print(f"Processing {player.username} ({role}): automatic")
-                            result = executor.execute_role_action(role, player.username, [])
-                            print(f"  → {result}")
-                            if result:
-                                if self.night_count == 1:
-                                    self.night_1_results[player.username] = result
-                                else:
-                                    self.night_action_results[player.username] = result
-                            break
+                with profiler.phase(f"role_action[{player.role.name}]", player=player.username):
+                    result = step.handler(executor, player.username, choices or [])
+
+            if debug:
+                log_engine_event(DEBUG, "night_step", night=self.night_count, player=player.username,
+                                 role=player.role.name, choices=choices, result=result)
+            if step.informs and result:
+                results[player.username] = result
+
+        if executor.roles_changed:
+            # Starpass and similar swaps change who wakes on later nights
+            self._night_schedules.clear()
+        self.last_night_seconds = time.perf_counter() - started
 
     def _on_actions_complete(self):
         self._execute()
         return self._progress_to_day_automatically()
 
+    @profiled("progress_to_day")
     def _progress_to_day_automatically(self):
         win_condition = self.check_win_condition()
         if win_condition:
-            self.phase = GamePhase.ENDED
             self.game_result = win_condition
+            self._set_phase(GamePhase.ENDED)
             return win_condition
         
         self.day_count += 1
-        self.phase = GamePhase.DAY
+        self._set_phase(GamePhase.DAY)
         return None
         
     def _start_first_night(self):
         """Start first night (night 1) with player action collection"""
-        print(f"\n=== STARTING NIGHT 1 (FIRST NIGHT) ===\n")
+        self._log(INFO, "first_night_started", players=len(self.players))
         self.night_count = 1
 
         self._collect_night_1_actions()
 
     def _collect_night_1_actions(self):
         """Collect Night 1 actions from players in the proper order"""
-        print("Starting Night 1 - players will be asked for their actions...")
-
         # Update the action collection to start gathering Night 1 actions
         self._collect_night_actions()
 
     def _execute_night_1_actions(self):
         """Execute night 1 actions automatically and progress to day"""
-        print("Processing Night 1 actions automatically...")
+        self._log(INFO, "night_resolving", night=1)
 
-        # Night 1 order: Poisoner -> First night only info roles -> Other info roles -> Butler -> Spy
-        night_1_order = ["Poisoner", "Washerwoman", "Librarian", "Investigator", "Chef", "Empath", "Fortune Teller", "Undertaker", "Butler", "Spy"]
-        
-        from role_executor import RoleExecutor
-        executor = RoleExecutor(self.players)
-        
         self.night_1_results = {}
+        self._run_night_schedule({})
 
-        print(f"\n--- Processing Night 1 Actions in Order ---")
-        for role_key in night_1_order:
-            for player in self.players:
-                print(player.role.name, role_key)
-                if player.role and player.role.name == role_key and player.is_alive:
-                    print(f"Processing {player.username} ({player.role.name})")
-                    result = executor.execute_role_action(role_key, player.username, [])
-                    print(f"  → {result}")
-
-                    if result and result != f"{role_key} action not implemented" and result != "No target specified":
-                        self.night_1_results[player.username] = result
-                    break
-        
         self._progress_to_day_automatically()
     
     def get_night_1_results(self) -> Dict[str, str]:
@@ -327,10 +340,117 @@ class ClocktowerGame:
     def get_night_action_results(self) -> Dict[str, str]:
         return self.night_action_results.copy()
     
+    def _set_phase(self, phase: GamePhase):
+        self.phase = phase
+        self._record("phase", phase=phase.value, day_count=self.day_count, night_count=self.night_count)
+
+    def _record(self, kind: str, **data):
+        if self.event_log is not None:
+            self.event_log.append(kind, **data)
+
+    def _base_rng(self):
+        return self._random.rng if isinstance(self._random, RecordingRandom) else self._random
+
+    def snapshot(self) -> Dict:
+        """Capture the full game state as plain, JSON-serializable data.
+
+        The RNG state is included when the game owns a random.Random; games
+        on the shared module-level random leave it out.
+        """
+        rng = self._base_rng()
+        return {
+            "script": self.script.name,
+            "usernames": [p.username for p in self.players],
+            "roles": [p.role.name if p.role else None for p in self.players],
+            "alive": [p.is_alive for p in self.players],
+            "poisoned": [p.is_poisoned for p in self.players],
+            "phase": self.phase.value,
+            "day_count": self.day_count,
+            "night_count": self.night_count,
+            "night_1_results": dict(self.night_1_results),
+            "night_action_results": dict(self.night_action_results),
+            "game_result": dict(self.game_result) if self.game_result else None,
+            "last_night_seconds": self.last_night_seconds,
+            "action_timeout": self.action_timeout,
+            "actions": self.action_collector.snapshot(),
+            "rng_state": rng.getstate() if isinstance(rng, random.Random) else None,
+            "event_count": len(self.event_log) if self.event_log is not None else None
+        }
+
+    def restore(self, snapshot: Dict):
+        self.script = get_script(snapshot.get("script", DEFAULT_SCRIPT))
+        self.script.load_handlers()
+        self.players = [Player(username) for username in snapshot["usernames"]]
+
+        for player, role_name, alive, poisoned in zip(self.players, snapshot["roles"], snapshot["alive"], snapshot["poisoned"]):
+            player.role = roles[role_name] if role_name else None
+            player.is_alive = alive
+            player.is_poisoned = poisoned
+
+        self.seat_index = build_seat_index(self.players)
+        self.counts = AlignmentCounts.from_players(self.players)
+        self._night_schedules = {}
+        self.phase = GamePhase(snapshot["phase"])
+        self.day_count = snapshot["day_count"]
+        self.night_count = snapshot["night_count"]
+        self.night_1_results = dict(snapshot["night_1_results"])
+        self.night_action_results = dict(snapshot["night_action_results"])
+        self.game_result = dict(snapshot["game_result"]) if snapshot["game_result"] else None
+        self.last_night_seconds = snapshot.get("last_night_seconds")
+        self.action_timeout = snapshot.get("action_timeout")
+        self.action_collector.restore(snapshot["actions"])
+
+        rng = self._base_rng()
+        if snapshot["rng_state"] is not None and isinstance(rng, random.Random):
+            version, internal_state, gauss_next = snapshot["rng_state"]
+            rng.setstate((version, tuple(internal_state), gauss_next))
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict, verbose: bool = False,
+                      event_log: Optional[EventLog] = None) -> "ClocktowerGame":
+        game = cls(rng=random.Random(), verbose=verbose, event_log=event_log)
+        game.restore(snapshot)
+        return game
+
+    def fork(self) -> "ClocktowerGame":
+        """Independent copy of this game, e.g. to explore a what-if mid-night."""
+        event_log = self.event_log.copy() if self.event_log is not None else None
+        return ClocktowerGame.from_snapshot(self.snapshot(), self.verbose, event_log)
+
+    @classmethod
+    def from_event_log(cls, log: EventLog, verify: bool = True) -> "ClocktowerGame":
+        """Replay a recorded game by re-issuing its inputs with its recorded draws.
+
+        With verify, the replay's own log must match the recorded one event
+        for event, otherwise ReplayMismatch is raised.
+        """
+        replay_log = EventLog()
+        game = cls(rng=ReplayRandom(log, replay_log), verbose=False)
+        game.event_log = replay_log
+
+        for event in list(log):
+            kind = event["kind"]
+            if kind == "start":
+                game.script = get_script(event.get("script", DEFAULT_SCRIPT))
+                game.start_game(event["usernames"], event["hardcoded_roles"])
+            elif kind == "action":
+                game.submit_night_action(event["username"], event["choices"])
+            elif kind == "progress_to_night":
+                game.progress_to_night()
+            elif kind == "progress_to_day":
+                game.progress_to_day()
+            elif kind == "timeout":
+                game.resolve_missing_actions(event["policy"])
+
+        if verify and replay_log.events != log.events:
+            raise ReplayMismatch("Replayed game diverged from the recorded log")
+
+        return game
+
+    def _log(self, level: int, event: str, **fields):
+        if self.verbose:
+            log_engine_event(level, event, **fields)
+
     def _role_gets_information(self, role_name: str) -> bool:
-        information_roles = [
-            "Fortune Teller", "Empath", "Washerwoman", "Librarian", 
-            "Investigator", "Chef", "Undertaker", "Ravenkeeper", "Spy"
-        ]
-        return role_name in information_roles
+        return is_information_role(role_name)
     
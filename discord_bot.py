@@ -1,45 +1,174 @@
 import discord
 from discord.ext import commands
-from clocktower_game import ClocktowerGame
-from typing import Dict, List, Optional
+from game_service import TARGET_COUNTS, GameService, GameTransport
+from role_executor import RoleExecutor
+from roles import roles
+from member_index import MemberNameIndex
+from night_resolver import NightResolver
+from game_store import SQLiteGameStore, WriteBehindStore
+from sharding import ShardPlan, ShardRouter
+from metrics import REGISTRY, serve_metrics
+from profiling import GameProfiler
+from message_scheduler import MessageScheduler, MessageTransport, PermanentSendError
+from game_logging import configure_logging, log_event, logger
+from typing import List, Tuple
+from types import SimpleNamespace
 import os
 import asyncio
+import logging
+import functools
+import time
 
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 
-bot = commands.Bot(command_prefix='!', intents=intents)
-
-games: Dict[int, ClocktowerGame] = {}
-player_guilds: Dict[int, int] = {}
-player_usernames: Dict[int, str] = {}
-test_mode_guilds: Dict[int, bool] = {}
-game_channels: Dict[int, int] = {}
+# Sharded deployments run PROCESS_COUNT bot processes that split SHARD_COUNT gateway shards
+shard_count = int(os.getenv('SHARD_COUNT', '0'))
+if shard_count:
+    shard_plan = ShardPlan(shard_count, int(os.getenv('PROCESS_COUNT', '1')))
+    process_index = int(os.getenv('PROCESS_INDEX', '0'))
+    bot = commands.AutoShardedBot(command_prefix='!', intents=intents, shard_count=shard_count,
+                                  shard_ids=shard_plan.shards_for_process(process_index))
+else:
+    bot = commands.Bot(command_prefix='!', intents=intents)
+
+class DiscordTransport(MessageTransport):
+    def __init__(self, client):
+        self.client = client
+
+    async def send(self, recipient_id, embeds):
+        try:
+            user = self.client.get_user(recipient_id) or await self.client.fetch_user(recipient_id)
+            await user.send(embeds=embeds)
+        except (discord.Forbidden, discord.NotFound) as e:
+            raise PermanentSendError(str(e))
+
+# All DMs go through one scheduler so sends fan out concurrently within rate limits
+messenger = MessageScheduler(DiscordTransport(bot))
+
+class DiscordGameTransport(GameTransport):
+    """Renders game service events as messages in the game's channel and DM embeds."""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def announce(self, session, event, **fields):
+        guild = self.client.get_guild(session.guild_id)
+        channel = guild.get_channel(session.channel_id) if guild and session.channel_id else None
+        if channel is None:
+            return
+        for message in render_announcement(event, fields):
+            if isinstance(message, discord.Embed):
+                await channel.send(embed=message)
+            else:
+                await channel.send(message)
+
+    async def notify(self, session, messages):
+        return await send_dms_to_players(session.guild_id, [(username, render_dm(session, username, event, fields))
+                                                            for username, event, fields in messages])
+
+# Game orchestration lives in the service; the bot parses commands and renders what it reports.
+# Games are written behind to SQLite and rehydrated on a guild's first command.
+# NIGHT_RESOLUTION runs night resolution inline, or off the event loop in a thread or process.
+# Nights wait for every action unless NIGHT_TIMEOUT gives players that many seconds;
+# whoever misses it gets NIGHT_TIMEOUT_POLICY actions: random targets, or skip
+service = GameService(DiscordGameTransport(bot),
+                      WriteBehindStore(SQLiteGameStore(os.getenv('GAME_DB', 'clocktower_games.db'))),
+                      NightResolver(os.getenv('NIGHT_RESOLUTION', 'thread')),
+                      night_timeout=float(os.environ['NIGHT_TIMEOUT']) if os.getenv('NIGHT_TIMEOUT') else None,
+                      night_timeout_policy=os.getenv('NIGHT_TIMEOUT_POLICY', 'random'))
+sessions = service.sessions
+store = service.store
+resolver = service.resolver
+# Each guild's commands and action DMs run in order on that guild's actor
+actors = service.actors
+loaded_guilds = service.loaded
+night_timers = service.timers
+
+# Routes DM actions to the process that owns the player's guild; the store is shared between processes
+router = ShardRouter(shard_plan, process_index, store) if shard_count else None
+
+# Name -> member lookups for !start, kept current from member events
+member_names = MemberNameIndex(max_guilds=64)
+
+command_seconds = REGISTRY.histogram("clocktower_command_seconds",
+                                     "Command handler latency including time queued behind the guild's earlier commands")
+
+def guild_serialized(func):
+    @functools.wraps(func)
+    async def wrapper(ctx, *args, **kwargs):
+        command = getattr(ctx, 'command', None)
+        started = time.perf_counter()
+        try:
+            if ctx.guild is None:
+                return await func(ctx, *args, **kwargs)
+            return await actors.run(ctx.guild.id, func, ctx, *args, **kwargs)
+        finally:
+            command_seconds.observe(time.perf_counter() - started, command=command.name if command else func.__name__)
+    return wrapper
+
+async def setup_hook():
+    service.start()
+    if router:
+        router.start(handle_relayed_action)
+    # Prometheus scrape endpoint, e.g. METRICS_PORT=9108 serves http://127.0.0.1:9108/metrics
+    metrics_port = os.getenv('METRICS_PORT')
+    if metrics_port:
+        await serve_metrics(REGISTRY, os.getenv('METRICS_HOST', '127.0.0.1'), int(metrics_port))
+
+bot.setup_hook = setup_hook
 
 @bot.event
 async def on_ready():
-    print(f'{bot.user} has connected to Discord!')
+    log_event(logger, logging.INFO, "connected", user=str(bot.user))
+
+@bot.event
+async def on_member_join(member):
+    member_names.member_joined(member)
+
+@bot.event
+async def on_member_update(before, after):
+    member_names.member_updated(after)
+
+@bot.event
+async def on_member_remove(member):
+    member_names.member_left(member)
+
+@bot.event
+async def on_user_update(before, after):
+    if before.name != after.name or str(before) != str(after):
+        member_names.user_renamed(after, after.mutual_guilds)
+
+@bot.event
+async def on_guild_remove(guild):
+    member_names.forget_guild(guild.id)
 
 @bot.command(name='test')
+@guild_serialized
 async def test_mode(ctx):
     if ctx.guild is None:
         await ctx.send("This command must be used in a server.")
         return
+
+    await service.ensure_loaded(ctx.guild.id)
     
     guild_id = ctx.guild.id
-    test_mode_guilds[guild_id] = True
+    service.enable_test_mode(guild_id)
     await ctx.send("🧪 **Test mode enabled!** You can now start a game with any usernames, even if they're not in the server.")
 
 @bot.command(name='start')
+@guild_serialized
 async def start_game(ctx, *players):
     if ctx.guild is None:
         await ctx.send("This command must be used in a server, not DMs.")
         return
 
+    await service.ensure_loaded(ctx.guild.id)
+
     guild_id = ctx.guild.id
 
-    if guild_id in games:
+    if sessions.get_game(guild_id):
         await ctx.send("A game is already running in this server!")
         return
 
@@ -47,13 +176,15 @@ async def start_game(ctx, *players):
         await ctx.send("Need 5-15 players to start a game!")
         return
 
-    is_test_mode = test_mode_guilds.get(guild_id, False)
+    session = sessions.get_or_create(guild_id)
+    is_test_mode = session.test_mode
     
     members = []
     missing_players = []
 
+    resolved = member_names.resolve_many(ctx.guild, players)
     for player_name in players:
-        member = discord.utils.find(lambda m: m.name == player_name or m.display_name == player_name or str(m) == player_name, ctx.guild.members)
+        member = resolved[player_name]
         if member:
             members.append(member)
         else:
@@ -66,62 +197,36 @@ async def start_game(ctx, *players):
         await ctx.send(f"❌ **Cannot start game!**\nThe following players are not in this server: {', '.join(missing_players)}\n\nUse `!test` first to enable test mode for testing with any usernames.")
         return
     
-    player_members = {players[i]: members[i] for i in range(len(players))}
-    
     if is_test_mode:
         await ctx.send(f"🧪 **Test mode active** - {ctx.author.mention} will play as all characters")
 
-    # Create new game
-    game = ClocktowerGame()
-    games[guild_id] = game
-    game_channels[guild_id] = ctx.channel.id
-
-    # Map members to this guild and store their IDs
-    for i, member in enumerate(members):
-        player_guilds[member.id] = guild_id
-        player_usernames[member.id] = players[i]
-
-    # Start the game
-    result = game.start_game(list(players))
+    result = service.start_game(guild_id, list(players), [member.id for member in members], channel_id=ctx.channel.id)
 
     if "error" in result:
         await ctx.send(f"Error starting game: {result['error']}")
-        del games[guild_id]
-        if guild_id in game_channels:
-            del game_channels[guild_id]
         return
 
+    game = session.game
     await ctx.send(f"🎭 **Clocktower Game Started!**\n"
                    f"Players: {', '.join(players)}\n"
                    f"Phase: {result['phase'].title()} {game.night_count}\n"
                    f"Night 1 has begun - players will be asked for their actions!")
 
-    dm_failures = []
-    for player in game.players:
-        member = player_members.get(player.username)
-        if member and player.role:
-            try:
-                embed = discord.Embed(
-                    title="🎭 Your Role",
-                    description=f"**{player.role.name}**\n{player.role.description}",
-                    color=0x7289da
-                )
-                embed.add_field(name="Alignment", value=f"{player.role.team.value.title()} ({player.role.role_type.value.title()})", inline=True)
-                await member.send(embed=embed)
-                await ctx.send(f"✅ Sent role to {player.username}", delete_after=3)
-            except discord.Forbidden:
-                dm_failures.append(player.username)
-            except Exception as e:
-                print(f"Failed to DM {player.username}: {e}")
-                dm_failures.append(player.username)
+    dealt = sum(1 for player in game.players if player.role)
+    dm_failures = await service.deal_roles(guild_id)
+    if len(dm_failures) < dealt:
+        await ctx.send(f"✅ Sent roles to {dealt - len(dm_failures)} players", delete_after=3)
 
     if dm_failures:
         await ctx.send(f"⚠️ **Could not send DMs to:** {', '.join(dm_failures)}\nThey may have DMs disabled. Please ask them to enable DMs from server members.")
 
+    service.persist(guild_id)
+
     # Send night action prompts for Night 1
-    await check_night_actions(ctx.guild)
+    await service.prompt_night_actions(guild_id)
 
 @bot.command(name='tstart')
+@guild_serialized
 async def test_start_game(ctx, players_and_roles):
     """
     Start a test game with specific role assignments.
@@ -132,9 +237,11 @@ async def test_start_game(ctx, players_and_roles):
         await ctx.send("This command must be used in a server, not DMs.")
         return
 
+    await service.ensure_loaded(ctx.guild.id)
+
     guild_id = ctx.guild.id
 
-    if guild_id in games:
+    if sessions.get_game(guild_id):
         await ctx.send("A game is already running in this server!")
         return
 
@@ -153,7 +260,6 @@ async def test_start_game(ctx, players_and_roles):
             return
 
         # Available roles mapping (case-insensitive)
-        from roles import roles
         available_roles = {role.lower(): role for role in roles.keys()}
 
         # Validate roles
@@ -167,11 +273,11 @@ async def test_start_game(ctx, players_and_roles):
                 return
 
         # Enable test mode for this guild
-        test_mode_guilds[guild_id] = True
+        session = sessions.get_or_create(guild_id)
+        session.test_mode = True
 
-        # Create player list (all mapped to command author in test mode)
+        # Every character is played by the command author in test mode
         members = [ctx.author] * len(player_names)
-        player_members = {player_names[i]: ctx.author for i in range(len(player_names))}
 
         # Create role assignment
         if len(validated_roles) == len(player_names):
@@ -186,26 +292,14 @@ async def test_start_game(ctx, players_and_roles):
             await ctx.send(f"❌ **Too many roles!** You specified {len(validated_roles)} roles for {len(player_names)} players.")
             return
 
-        # Create new game
-        game = ClocktowerGame()
-        games[guild_id] = game
-        game_channels[guild_id] = ctx.channel.id
-
-        # Map members to this guild and store their IDs
-        for i, member in enumerate(members):
-            player_guilds[member.id] = guild_id
-            player_usernames[member.id] = player_names[i]
-
-        # Start the game with hardcoded roles
-        result = game.start_game(list(player_names), hardcoded_roles)
+        result = service.start_game(guild_id, list(player_names), [member.id for member in members],
+                                    hardcoded_roles, channel_id=ctx.channel.id)
 
         if "error" in result:
             await ctx.send(f"Error starting game: {result['error']}")
-            del games[guild_id]
-            if guild_id in game_channels:
-                del game_channels[guild_id]
             return
 
+        game = session.game
         await ctx.send(f"🧪 **Test Game Started!**\n"
                       f"Players: {', '.join(player_names)}\n"
                       f"Roles: {role_mode}\n"
@@ -213,46 +307,35 @@ async def test_start_game(ctx, players_and_roles):
                       f"Night 1 has begun - players will be asked for their actions!\n\n"
                       f"**{ctx.author.mention}** will play as all characters")
 
-        # Send role DMs
-        dm_failures = []
-        for player in game.players:
-            if player.role:
-                try:
-                    embed = discord.Embed(
-                        title="🎭 Your Role",
-                        description=f"**{player.username}: {player.role.name}**\n{player.role.description}",
-                        color=0x7289da
-                    )
-                    embed.add_field(name="Alignment", value=f"{player.role.team.value.title()} ({player.role.role_type.value.title()})", inline=True)
-                    await ctx.author.send(embed=embed)
-                except discord.Forbidden:
-                    dm_failures.append(player.username)
-                except Exception as e:
-                    print(f"Failed to DM {player.username}: {e}")
-                    dm_failures.append(player.username)
+        # Role DMs to the author are coalesced into as few messages as possible
+        dm_failures = await service.deal_roles(guild_id)
 
         if dm_failures:
             await ctx.send(f"⚠️ **Could not send DMs to:** {', '.join(dm_failures)}\nYou may have DMs disabled. Please enable DMs from server members.")
 
+        service.persist(guild_id)
+
         # Send night action prompts for Night 1
-        await check_night_actions(ctx.guild)
+        await service.prompt_night_actions(guild_id)
 
     except Exception as e:
         await ctx.send(f"❌ **Error parsing command:** {str(e)}\nUsage: `!tstart \"player1,player2,... role1,role2,...\"`")
 
 @bot.command(name='night')
+@guild_serialized
 async def progress_to_night(ctx):
     if ctx.guild is None:
         await ctx.send("This command must be used in a server.")
         return
 
+    await service.ensure_loaded(ctx.guild.id)
+
     guild_id = ctx.guild.id
-    if guild_id not in games:
+    game = sessions.get_game(guild_id)
+    if game is None:
         await ctx.send("No game running in this server!")
         return
-
-    game = games[guild_id]
-    result = game.progress_to_night()
+    result = await service.progress_to_night(guild_id)
 
     if "error" in result:
         await ctx.send(f"Error: {result['error']}")
@@ -260,7 +343,7 @@ async def progress_to_night(ctx):
 
     await ctx.send(f"🌙 **Night {game.night_count} begins...**")
 
-    await check_night_actions(ctx.guild)
+    await service.prompt_night_actions(guild_id)
 
 def create_player_circle(players):
     if not players:
@@ -311,18 +394,20 @@ def create_player_circle(players):
         return "\n".join(rows)
 
 @bot.command(name='state')
+@guild_serialized
 async def game_state(ctx):
     if ctx.guild is None:
         await ctx.send("This command must be used in a server.")
         return
 
+    await service.ensure_loaded(ctx.guild.id)
+
     guild_id = ctx.guild.id
-    if guild_id not in games:
+    game = sessions.get_game(guild_id)
+    if game is None:
         await ctx.send("No game running in this server!")
         return
 
-    game = games[guild_id]
-
     alive_players = [p.username for p in game.players if p.is_alive]
     dead_players = [p.username for p in game.players if not p.is_alive]
 
@@ -343,156 +428,103 @@ async def game_state(ctx):
 
     await ctx.send(embed=embed)
 
+def resolve_recipient(guild_id, username):
+    session = sessions.get(guild_id)
+    member_id = session.recipient_for(username) if session else None
+
+    if member_id:
+        guild = bot.get_guild(guild_id)
+        if guild and guild.get_member(member_id):
+            return member_id
+    return None
+
+async def send_dms_to_players(guild_id, messages: List[Tuple[str, discord.Embed]]) -> List[str]:
+    """Send (username, embed) DMs concurrently; returns the usernames that failed."""
+    recipients = [resolve_recipient(guild_id, username) for username, _ in messages]
+    deliverable = [(recipient, embed) for recipient, (_, embed) in zip(recipients, messages) if recipient]
+    sent = iter(await messenger.send_many(deliverable))
+    return [username for recipient, (username, _) in zip(recipients, messages)
+            if not recipient or not next(sent)]
+
 async def send_dm_to_player(guild_id, username, embed):
-    is_test_mode = test_mode_guilds.get(guild_id, False)
-    
-    if is_test_mode:
-        test_user_id = None
-        for uid, gid in player_guilds.items():
-            if gid == guild_id:
-                test_user_id = uid
-                break
-        
-        if test_user_id:
-            guild = bot.get_guild(guild_id)
-            if guild:
-                test_member = guild.get_member(test_user_id)
-                if test_member:
-                    try:
-                        await test_member.send(embed=embed)
-                        return True
-                    except discord.Forbidden:
-                        return False
-        return False
-    else:
-        member_id = None
-        for uid, uname in player_usernames.items():
-            if uname == username and player_guilds.get(uid) == guild_id:
-                member_id = uid
-                break
-        
-        if member_id:
-            guild = bot.get_guild(guild_id)
-            if guild:
-                member = guild.get_member(member_id)
-                if member:
-                    try:
-                        await member.send(embed=embed)
-                        return True
-                    except discord.Forbidden:
-                        return False
-        return False
-
-async def send_night_1_results(guild, game, player_members):
-    night_1_results = game.get_night_1_results()
-
-    if not night_1_results:
-        return
-    
-    guild_id = guild.id
-    dm_failures = []
-    
-    for username, result in night_1_results.items():
-        player = next((p for p in game.players if p.username == username), None)
-        if not player or not player.role:
-            continue
-            
+    return not await send_dms_to_players(guild_id, [(username, embed)])
+
+def render_dm(session, username, event, fields):
+    """The DM embed for one of the game service's private events."""
+    role = roles[fields["role"]]
+    if event == "role":
+        # In test mode every role goes to one person, so say whose it is
+        heading = f"{username}: {role.name}" if session.test_mode else role.name
+        embed = discord.Embed(title="🎭 Your Role", description=f"**{heading}**\n{role.description}", color=0x7289da)
+        embed.add_field(name="Alignment", value=f"{role.team.value.title()} ({role.role_type.value.title()})", inline=True)
+        return embed
+
+    if event == "night_prompt":
         embed = discord.Embed(
-            title="🌙 Night 1 Information",
-            description=f"**{player.role.name}**\nHere's what you learned during the first night:",
-            color=0x5865f2
+            title="🌙 Night Action Required",
+            description=f"**{role.name}**\nYou need to submit your night action!",
+            color=0x992d22
         )
-        
-        embed.add_field(name="Your Information", value=result, inline=False)
+        count = TARGET_COUNTS.get(role.name)
+        if count:
+            character = f"{username} " if session.test_mode else ""
+            if count == 2:
+                embed.add_field(name="Action", value="Choose 2 players to read", inline=False)
+                embed.add_field(name="Command", value=f"!action {character}player1 player2", inline=False)
+            else:
+                embed.add_field(name="Action", value="Choose 1 player", inline=False)
+                embed.add_field(name="Command", value=f"!action {character}player_name", inline=False)
+        embed.add_field(name="Available Players", value=", ".join(fields["targets"]), inline=False)
+        return embed
+
+    night = fields["night"]
+    embed = discord.Embed(
+        title=f"🌙 Night {night} Information",
+        description=f"**{role.name}**\n" + ("Here's what you learned during the first night:" if night == 1
+                                             else "Here's what you learned:"),
+        color=0x5865f2
+    )
+    embed.add_field(name="Your Information", value=fields["result"], inline=False)
+    if night == 1:
         embed.add_field(name="Remember", value="Keep this information secret! Use it wisely during the day.", inline=False)
-        
-        success = await send_dm_to_player(guild_id, username, embed)
-        if not success:
-            dm_failures.append(username)
-    
-    if dm_failures:
-        channel_id = game_channels.get(guild_id)
-        channel = guild.get_channel(channel_id) if channel_id else None
-        if channel:
-            await channel.send(f"⚠️ **Could not send night 1 results to:** {', '.join(dm_failures)}")
+    return embed
 
-async def send_night_action_results(guild, game):
-    night_results = game.get_night_action_results()
-    
-    if not night_results:
-        return
-    
-    guild_id = guild.id
-    dm_failures = []
-    
-    for username, result in night_results.items():
-        player = next((p for p in game.players if p.username == username), None)
-        if not player or not player.role:
-            continue
-            
-        embed = discord.Embed(
-            title=f"🌙 Night {game.night_count} Information",
-            description=f"**{player.role.name}**\nHere's what you learned:",
-            color=0x5865f2
-        )
-        
-        embed.add_field(name="Your Information", value=result, inline=False)
-        
-        success = await send_dm_to_player(guild_id, username, embed)
-        if not success:
-            dm_failures.append(username)
-    
-    if dm_failures:
-        channel_id = game_channels.get(guild_id)
-        channel = guild.get_channel(channel_id) if channel_id else None
-        if channel:
-            await channel.send(f"⚠️ **Could not send night results to:** {', '.join(dm_failures)}")
-
-async def check_night_actions(guild):
-    guild_id = guild.id
-    if guild_id not in games:
-        return
+def render_announcement(event, fields):
+    """The channel messages (text or embeds) for one of the game service's announcements."""
+    if event == "actions_complete":
+        return ["🌙 All night actions submitted! Processing..."]
 
-    game = games[guild_id]
-    if game.phase.value != "night":
-        return
+    if event == "night_timeout":
+        outcome = "random targets were chosen for them" if fields["policy"] == "random" else "their actions were skipped"
+        return [f"⏰ **Time's up!** {', '.join(fields['missed'])} did not act in time, so {outcome}. Processing..."]
 
-    status = game.action_collector.get_collection_status()
-    
-    if not status["pending_players"]:
-        return
+    if event == "results_undelivered":
+        which = "night 1 results" if fields["night"] == 1 else "night results"
+        return [f"⚠️ **Could not send {which} to:** {', '.join(fields['usernames'])}"]
 
-    is_test_mode = test_mode_guilds.get(guild_id, False)
-    
-    for username in status["pending_players"]:
-        player = next((p for p in game.players if p.username == username), None)
-        if not player or not player.role:
-            continue
-            
-        role_name = player.role.name
+    if event == "day_begins":
+        messages = [f"☀️ **Day {fields['day']} begins!**"]
+        if fields["deaths"]:
+            messages.append(f"💀 **Deaths:** {', '.join(fields['deaths'])}")
+        return messages
 
+    if event == "game_over":
+        winner = fields["winner"]
         embed = discord.Embed(
-            title="🌙 Night Action Required",
-            description=f"**{role_name}**\nYou need to submit your night action!",
-            color=0x992d22
+            title="🎯 GAME OVER!",
+            description=f"**{winner.upper()} TEAM WINS!**",
+            color=0xff0000 if winner == "evil" else 0x00ff00
         )
+        embed.add_field(name="Reason", value=fields["reason"], inline=False)
+        if fields["deaths"]:
+            embed.add_field(name="💀 Deaths", value=", ".join(fields["deaths"]), inline=False)
+        embed.add_field(name="🎭 Final Roles", value="\n".join([
+            f"{'✅' if alive else '💀'} **{username}**: {role} ({team})"
+            for username, role, team, alive in fields["roles"]
+        ]), inline=False)
+        return [embed]
 
-        if role_name == "Fortune Teller":
-            embed.add_field(name="Action", value="Choose 2 players to read", inline=False)
-            if is_test_mode:
-                embed.add_field(name="Command", value=f"!action {username} player1 player2", inline=False)
-            else:
-                embed.add_field(name="Command", value="!action player1 player2", inline=False)
-        elif role_name in ["Imp", "Poisoner", "Monk"]:
-            embed.add_field(name="Action", value="Choose 1 player", inline=False)
-            if is_test_mode:
-                embed.add_field(name="Command", value=f"!action {username} player_name", inline=False)
-            else:
-                embed.add_field(name="Command", value="!action player_name", inline=False)
-        
-        embed.add_field(name="Available Players", value=", ".join([p.username for p in game.players if p.is_alive and p.username != username]), inline=False)
-
-        await send_dm_to_player(guild_id, username, embed)
+    return []
 
 @bot.event
 async def on_message(message):
@@ -501,7 +533,11 @@ async def on_message(message):
 
     if isinstance(message.channel, discord.DMChannel):
         if message.content.startswith('!action'):
-            await handle_action_dm(message)
+            started = time.perf_counter()
+            try:
+                await handle_action_dm(message)
+            finally:
+                command_seconds.observe(time.perf_counter() - started, command="action")
         return
 
     await bot.process_commands(message)
@@ -509,17 +545,37 @@ async def on_message(message):
 async def handle_action_dm(message):
     user_id = message.author.id
 
-    if user_id not in player_guilds:
+    session = sessions.for_member(user_id)
+    if session is None:
+        stored_guild_id = await store.find_guild_for_member(user_id)
+        if stored_guild_id is not None and router and not router.owns(stored_guild_id):
+            await router.relay(stored_guild_id, {"author_id": user_id, "content": message.content})
+            return
+        if stored_guild_id is not None:
+            await actors.run(stored_guild_id, service.ensure_loaded, stored_guild_id)
+            session = sessions.for_member(user_id)
+
+    if session is None:
         await message.channel.send("❌ You're not part of any active game!")
         return
 
-    guild_id = player_guilds[user_id]
-    if guild_id not in games:
+    await actors.run(session.guild_id, submit_action_dm, message, session)
+
+async def handle_relayed_action(payload):
+    """An !action DM another process received for a guild this process owns."""
+    user = bot.get_user(payload["author_id"]) or await bot.fetch_user(payload["author_id"])
+    # Replies go straight to the user's DMs from this process
+    await handle_action_dm(SimpleNamespace(author=user, content=payload["content"], channel=user))
+
+async def submit_action_dm(message, session):
+    user_id = message.author.id
+    guild_id = session.guild_id
+    game = session.game
+    if game is None:
         await message.channel.send("❌ No active game found!")
         return
 
-    game = games[guild_id]
-    is_test_mode = test_mode_guilds.get(guild_id, False)
+    is_test_mode = session.test_mode
     
     parts = message.content.split()[1:]
     
@@ -531,70 +587,20 @@ async def handle_action_dm(message):
         username = parts[0]
         action_targets = parts[1:]
         
-        player = next((p for p in game.players if p.username == username), None)
+        player = game.get_player(username)
         if not player:
             await message.channel.send(f"❌ Character '{username}' not found in the game!")
             return
     else:
-        username = player_usernames.get(user_id)
+        username = session.usernames.get(user_id)
         if not username:
             await message.channel.send("❌ Error: Could not find your game username!")
             return
         
-        player = next((p for p in game.players if p.username == username), None)
+        player = game.get_player(username)
         action_targets = parts
 
-    if game.phase.value != "night":
-        await message.channel.send("❌ You can only submit actions during the night phase!")
-        return
-
-    if not player or not player.is_alive:
-        await message.channel.send(f"❌ {username} is not alive and cannot submit actions!")
-        return
-
-    if not player.role:
-        await message.channel.send(f"❌ {username} doesn't have a role assigned!")
-        return
-
-    if not action_targets:
-        embed = discord.Embed(
-            title="❌ Missing Action Targets",
-            description=f"**{username}** needs to specify targets!",
-            color=0xff5555
-        )
-        
-        role_name = player.role.name
-        if role_name == "Fortune Teller":
-            embed.add_field(name="Required", value="2 players", inline=False)
-        elif role_name in ["Imp", "Poisoner", "Monk"]:
-            embed.add_field(name="Required", value="1 player", inline=False)
-        
-        alive_targets = [p.username for p in game.players if p.is_alive and p.username != username]
-        embed.add_field(name="Available Targets", value=", ".join(alive_targets), inline=False)
-        
-        await message.channel.send(embed=embed)
-        return
-
-    role_name = player.role.name
-    expected_count = 2 if role_name == "Fortune Teller" else 1
-    
-    if len(action_targets) != expected_count:
-        await message.channel.send(f"❌ {username} ({role_name}) requires exactly {expected_count} target{'s' if expected_count > 1 else ''}! You provided {len(action_targets)}.")
-        return
-
-    valid_targets = [p.username for p in game.players if p.is_alive and p.username != username]
-    invalid_targets = [target for target in action_targets if target not in valid_targets]
-    
-    if invalid_targets:
-        await message.channel.send(f"❌ Invalid targets: {', '.join(invalid_targets)}\nValid targets: {', '.join(valid_targets)}")
-        return
-
-    if len(set(action_targets)) != len(action_targets):
-        await message.channel.send("❌ You cannot target the same player multiple times!")
-        return
-
-    # Submit action directly without confirmation
-    result = game.submit_night_action(username, action_targets)
+    result = await service.submit_action(guild_id, username, action_targets)
 
     # # Commented out confirmation system - submit actions directly
     # embed = discord.Embed(
@@ -619,10 +625,24 @@ async def handle_action_dm(message):
     #
     #     result = game.submit_night_action(username, action_targets)
 
+    if "targets" in result:
+        embed = discord.Embed(
+            title="❌ Missing Action Targets",
+            description=f"**{username}** needs to specify targets!",
+            color=0xff5555
+        )
+        if result["required"]:
+            embed.add_field(name="Required", value=f"{result['required']} player{'s' if result['required'] > 1 else ''}", inline=False)
+        embed.add_field(name="Available Targets", value=", ".join(result["targets"]), inline=False)
+
+        await message.channel.send(embed=embed)
+        return
+
     if "error" in result:
-        await message.channel.send(f"❌ Error: {result['error']}")
+        await message.channel.send(f"❌ {result['error']}")
         return
 
+    role_name = player.role.name
     embed = discord.Embed(
         title="✅ Action Submitted Successfully!",
         description=f"**{username} ({role_name})** action targeting: **{', '.join(action_targets)}**",
@@ -633,95 +653,33 @@ async def handle_action_dm(message):
     await message.channel.send(embed=embed)
 
     if result.get("collection_complete"):
-        guild = bot.get_guild(guild_id)
-        if guild:
-            channel_id = game_channels.get(guild_id)
-            channel = guild.get_channel(channel_id) if channel_id else None
-            if channel:
-                await channel.send("🌙 All night actions submitted! Processing...")
-
-                game_result = result.get("game_result")
-                if game_result:
-                    winner = game_result["winner"]
-                    reason = game_result["reason"]
-
-                    embed = discord.Embed(
-                        title="🎯 GAME OVER!",
-                        description=f"**{winner.upper()} TEAM WINS!**",
-                        color=0xff0000 if winner == "evil" else 0x00ff00
-                    )
-                    embed.add_field(name="Reason", value=reason, inline=False)
-
-                    alive_players = [p for p in game.players if p.is_alive]
-                    dead_players = [p for p in game.players if not p.is_alive]
-
-                    if dead_players:
-                        deaths_list = [p.username for p in dead_players]
-                        embed.add_field(name="💀 Deaths", value=", ".join(deaths_list), inline=False)
-
-                    embed.add_field(name="🎭 Final Roles", value="\n".join([
-                        f"{'💀' if not p.is_alive else '✅'} **{p.username}**: {p.role.name} ({p.role.team.value})"
-                        for p in game.players
-                    ]), inline=False)
-
-                    if game.night_count == 1:
-                        await send_night_1_results(guild, game, {})
-                    else:
-                        await send_night_action_results(guild, game)
-                    await channel.send(embed=embed)
-
-                    del games[guild_id]
-                    if guild_id in game_channels:
-                        del game_channels[guild_id]
-                    to_remove = [uid for uid, gid in player_guilds.items() if gid == guild_id]
-                    for uid in to_remove:
-                        del player_guilds[uid]
-                        if uid in player_usernames:
-                            del player_usernames[uid]
-                    if guild_id in test_mode_guilds:
-                        del test_mode_guilds[guild_id]
-                else:
-                    if game.night_count == 1:
-                        await send_night_1_results(guild, game, {})
-                    else:
-                        await send_night_action_results(guild, game)
-
-                    await channel.send(f"☀️ **Day {game.day_count} begins!**")
-
-                    alive_players = [p for p in game.players if p.is_alive]
-                    dead_players = [p for p in game.players if not p.is_alive]
-
-                    if dead_players:
-                        deaths_this_phase = []
-                        for p in dead_players:
-                            deaths_this_phase.append(p.username)
-                        if deaths_this_phase:
-                            await channel.send(f"💀 **Deaths:** {', '.join(deaths_this_phase)}")
+        await service.finish_night(guild_id, result, "actions_complete")
 
     # # Removed timeout handler since confirmation is disabled
     # except asyncio.TimeoutError:
     #     await message.channel.send("⏰ Confirmation timed out. Please submit your action again.")
 
 @bot.command(name='debug')
+@guild_serialized
 async def debug_state(ctx):
     if ctx.guild is None:
         await ctx.send("This command must be used in a server.")
         return
 
+    await service.ensure_loaded(ctx.guild.id)
+
     guild_id = ctx.guild.id
-    if guild_id not in games:
+    game = sessions.get_game(guild_id)
+    if game is None:
         await ctx.send("No game running in this server!")
         return
 
-    game = games[guild_id]
-
     embed = discord.Embed(title="🔧 Debug Game State", color=0xff5555)
     embed.add_field(name="Phase", value=f"{game.phase.value.title()}", inline=True)
     embed.add_field(name="Day Count", value=str(game.day_count), inline=True)
     embed.add_field(name="Night Count", value=str(game.night_count), inline=True)
 
-    from role_executor import RoleExecutor
-    executor = RoleExecutor(game.players)
+    executor = RoleExecutor(game.players, seat_index=game.seat_index)
     grimoire = executor.spy_action("debug", [])
     
     embed.add_field(name="🔍 GRIMOIRE", value=f"```{grimoire}```", inline=False)
@@ -754,6 +712,14 @@ async def help_command(ctx):
               "`!end` - End the current game",
         inline=False
     )
+
+    embed.add_field(
+        name="🛠️ Admin Commands",
+        value="`!metrics` - Show bot performance metrics\n"
+              "`!profile start [cpu] [memory]` - Profile this server's game\n"
+              "`!profile stop` - Write the profile to disk and show phase timings",
+        inline=False
+    )
     
     embed.add_field(
         name="🌙 Night Actions (via DM)",
@@ -787,27 +753,86 @@ async def help_command(ctx):
     
     await ctx.send(embed=embed)
 
+def metrics_summary():
+    metrics = REGISTRY.metrics
+
+    def average(summary):
+        return f"{summary['sum'] / summary['count'] * 1000:.1f}ms over {summary['count']}" if summary["count"] else "no data"
+
+    sent = metrics["clocktower_dm_messages_total"].value(outcome="sent")
+    failed = metrics["clocktower_dm_messages_total"].value(outcome="failed")
+    collection = metrics["clocktower_action_collection_seconds"].summary()
+    lines = [
+        f"Active games: {metrics['clocktower_active_games'].callback()}",
+        f"Active players: {metrics['clocktower_active_players'].callback()}",
+        f"Night resolution: {average(metrics['clocktower_night_resolution_seconds'].summary())}",
+        f"Night round trip ({resolver.mode}): {average(metrics['clocktower_night_resolution_wall_seconds'].summary(mode=resolver.mode))}",
+        f"Action collection: {collection['sum'] / collection['count']:.0f}s over {collection['count']}" if collection["count"] else "Action collection: no data",
+        f"DM send: {average(metrics['clocktower_dm_send_seconds'].summary())}",
+        f"DMs: {sent:.0f} sent, {failed:.0f} failed ({failed / (sent + failed) * 100 if sent + failed else 0:.1f}% failure rate)"
+    ]
+    for labels in sorted(command_seconds.label_sets(), key=lambda labels: labels["command"]):
+        lines.append(f"!{labels['command']}: {average(command_seconds.summary(**labels))}")
+    return "\n".join(lines)
+
+@bot.command(name='metrics')
+@commands.has_permissions(administrator=True)
+async def show_metrics(ctx):
+    await ctx.send(f"📈 **Bot Metrics**\n```{metrics_summary()}```")
+
+@bot.command(name='profile')
+@commands.has_permissions(administrator=True)
+@guild_serialized
+async def profile_game(ctx, action="status", *options):
+    """
+    Profile this server's game only.
+    Usage: !profile start [cpu] [memory] | !profile stop | !profile status
+    """
+    if ctx.guild is None:
+        await ctx.send("This command must be used in a server.")
+        return
+
+    await service.ensure_loaded(ctx.guild.id)
+
+    game = sessions.get_game(ctx.guild.id)
+    if game is None:
+        await ctx.send("No game running in this server!")
+        return
+
+    if action == "start":
+        if game.profiler is not None:
+            await ctx.send("Profiling is already running for this game. Use `!profile stop` to write it out.")
+            return
+        game.profiler = GameProfiler(f"guild{ctx.guild.id}", cprofile="cpu" in options, memory="memory" in options)
+        await ctx.send(f"🔬 Profiling started for this game{' (' + ', '.join(options) + ')' if options else ''}.")
+    elif action == "stop":
+        if game.profiler is None:
+            await ctx.send("This game is not being profiled.")
+            return
+        profiler, game.profiler = game.profiler, None
+        paths = await asyncio.to_thread(profiler.dump, os.getenv('PROFILE_DIR', 'profiles'))
+        profiler.close()
+        await ctx.send(f"🔬 **Profile written**\n```{profiler.summary()}```\nFiles: {', '.join(paths)}")
+    elif game.profiler is not None:
+        await ctx.send(f"🔬 **Profiling in progress**\n```{game.profiler.summary()}```")
+    else:
+        await ctx.send("This game is not being profiled. Use `!profile start [cpu] [memory]`.")
+
 @bot.command(name='end')
+@guild_serialized
 async def end_game(ctx):
     if ctx.guild is None:
         await ctx.send("This command must be used in a server.")
         return
 
+    await service.ensure_loaded(ctx.guild.id)
+
     guild_id = ctx.guild.id
-    if guild_id not in games:
+    if sessions.get_game(guild_id) is None:
         await ctx.send("No game running in this server!")
         return
 
-    del games[guild_id]
-    if guild_id in game_channels:
-        del game_channels[guild_id]
-    to_remove = [uid for uid, gid in player_guilds.items() if gid == guild_id]
-    for uid in to_remove:
-        del player_guilds[uid]
-        if uid in player_usernames:
-            del player_usernames[uid]
-    if guild_id in test_mode_guilds:
-        del test_mode_guilds[guild_id]
+    service.end_game(guild_id)
 
     await ctx.send("🎭 Game ended!")
 
@@ -816,4 +841,14 @@ if __name__ == '__main__':
     if not token:
         print("Error: TOKEN environment variable not set!")
         exit(1)
-    bot.run(token)
\ No newline at end of file
+    # LOG_LEVEL=DEBUG also logs every night step; LOG_FORMAT=text for human-readable lines
+    log_listener = configure_logging(os.getenv('LOG_LEVEL', 'WARNING'), os.getenv('LOG_FORMAT', 'json'))
+    try:
+        bot.run(token)
+    finally:
+        if router:
+            router.stop()
+        resolver.close()
+        store.flush_blocking()
+        store.store.close()
+        log_listener.stop()
\ No newline at end of file
@@ -0,0 +1,26 @@
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import logging
+
+# The engine's logger, resolved on first use. Importing stdlib logging costs
+# about as much as the rest of the engine, and simulator workers and quiet
+# games never log, so engine modules name levels by number and only load
+# logging once something is actually logged.
+DEBUG, INFO, WARNING = 10, 20, 30
+
+_logger: Optional["logging.Logger"] = None
+
+
+def engine_logger() -> "logging.Logger":
+    global _logger
+    if _logger is None:
+        # game_logging sets up the silent "clocktower" parent this logger reports to
+        from game_logging import logger
+        _logger = logger.getChild("game")
+    return _logger
+
+
+def log_engine_event(level: int, event: str, **fields):
+    from game_logging import log_event
+    log_event(engine_logger(), level, event, **fields)
@@ -0,0 +1,67 @@
+import json
+import logging
+import queue
+import sys
+import time
+from typing import Any, Dict, Optional, TextIO
+
+logger = logging.getLogger("clocktower")
+# Silent until configure_logging is called; games and simulations pay one level check per event
+logger.addHandler(logging.NullHandler())
+logger.propagate = False
+
+
+def log_event(log: logging.Logger, level: int, event: str, **fields):
+    """Log a structured event; nothing is formatted unless the level is enabled."""
+    if log.isEnabledFor(level):
+        log.log(level, event, extra={"fields": fields})
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, event and the event's fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": round(record.created, 6),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage()
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, "fields", {})
+        details = " ".join(f"{key}={value}" for key, value in fields.items())
+        stamp = time.strftime("%H:%M:%S", time.localtime(record.created))
+        line = f"{stamp} {record.levelname:<7} {record.name} {record.getMessage()}"
+        return f"{line} {details}" if details else line
+
+
+def configure_logging(level: str = "WARNING", fmt: str = "json",
+                      stream: Optional[TextIO] = None) -> "logging.handlers.QueueListener":
+    """Route clocktower logs through a queue to a background writer thread.
+
+    Callers only enqueue records, so a slow stdout never blocks a night
+    resolution or the event loop. Stop the returned listener on shutdown to
+    flush what is still queued.
+    """
+    # Only the bot configures logging; games and simulations never load logging.handlers
+    import logging.handlers
+
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(records, handler, respect_handler_level=False)
+
+    for existing in list(logger.handlers):
+        logger.removeHandler(existing)
+    logger.addHandler(logging.handlers.QueueHandler(records))
+    logger.setLevel(level.upper())
+    listener.start()
+    return listener
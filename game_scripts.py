@@ -0,0 +1,170 @@
+import itertools
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+from role_executor import load_role_plugins
+from roles import Role, RoleType, roles
+
+SCRIPT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts")
+DEFAULT_SCRIPT = "Trouble Brewing"
+
+# Types are drawn in this order, so a role's setup modifier can only change types drawn after its own
+DRAW_ORDER = (RoleType.DEMON, RoleType.MINION, RoleType.OUTSIDER, RoleType.TOWNSFOLK)
+
+# Townsfolk, outsiders, minions, demons by player count, as on the official setup sheet
+STANDARD_DISTRIBUTION: Dict[int, Tuple[int, int, int, int]] = {
+    5: (3, 0, 1, 1), 6: (3, 1, 1, 1), 7: (5, 0, 1, 1), 8: (5, 1, 1, 1), 9: (5, 2, 1, 1),
+    10: (7, 0, 2, 1), 11: (7, 1, 2, 1), 12: (7, 2, 2, 1),
+    13: (9, 0, 3, 1), 14: (9, 1, 3, 1), 15: (9, 2, 3, 1),
+}
+TABLE_TYPES = (RoleType.TOWNSFOLK, RoleType.OUTSIDER, RoleType.MINION, RoleType.DEMON)
+
+
+class Script:
+    """A set of roles compiled once into everything start_game needs to deal them.
+
+    Per player count it holds the base type counts and the sampling pools:
+    each type's roles as a tuple, minus any role whose setup modifier
+    (e.g. the Baron's +2 outsiders) could not be met at that count.
+    Definitions are validated when compiled, so a bad script fails at
+    load time rather than mid-deal. Handler modules, which register night
+    handlers for the script's roles, are only imported once a game deals
+    or restores with the script, so processes that never play it never
+    load them.
+    """
+
+    def __init__(self, name: str, role_names: Iterable[str],
+                 distribution: Optional[Dict[int, Tuple[int, int, int, int]]] = None,
+                 modifiers: Optional[Dict[str, Dict[RoleType, int]]] = None,
+                 handler_modules: Iterable[str] = ()):
+        self.name = name
+        self.handler_modules = tuple(handler_modules)
+        self.handlers_loaded = not self.handler_modules
+        self.roles: Tuple[Role, ...] = tuple(self._role(role_name) for role_name in role_names)
+        if len({role.name for role in self.roles}) != len(self.roles):
+            raise ValueError(f"{name}: a role is listed twice")
+        self.roles_by_type: Dict[RoleType, Tuple[Role, ...]] = {
+            role_type: tuple(role for role in self.roles if role.role_type == role_type) for role_type in RoleType}
+
+        self.modifiers: Dict[str, Dict[RoleType, int]] = {}
+        for role_name, deltas in (modifiers or {}).items():
+            role = self._role(role_name)
+            if role not in self.roles:
+                raise ValueError(f"{name}: modifier for {role_name}, which is not in the script")
+            drawn_before = DRAW_ORDER[:DRAW_ORDER.index(role.role_type) + 1]
+            if any(role_type in drawn_before for role_type, delta in deltas.items() if delta):
+                raise ValueError(f"{name}: {role_name} can only modify types drawn after {role.role_type.value}")
+            self.modifiers[role.name] = dict(deltas)
+
+        self.setups: Dict[int, Dict[RoleType, int]] = {}
+        self.pools: Dict[int, Dict[RoleType, Tuple[Role, ...]]] = {}
+        for player_count, row in (distribution or STANDARD_DISTRIBUTION).items():
+            counts = dict(zip(TABLE_TYPES, row))
+            if sum(counts.values()) != player_count:
+                raise ValueError(f"{name}: the {player_count}-player setup deals {sum(counts.values())} roles")
+            self.setups[player_count] = counts
+            self.pools[player_count] = self._pools_for(player_count, counts)
+
+    def _role(self, role_name: str) -> Role:
+        role = roles.get(role_name)
+        if role is None:
+            raise ValueError(f"{self.name}: unknown role {role_name}")
+        return role
+
+    def _pools_for(self, player_count: int, counts: Dict[RoleType, int]) -> Dict[RoleType, Tuple[Role, ...]]:
+        def fits(modifier_roles: Tuple[Role, ...]) -> bool:
+            adjusted = self.counts_with(counts, modifier_roles)
+            return all(0 <= adjusted[role_type] <= len(self.roles_by_type[role_type]) for role_type in RoleType)
+
+        pools = {role_type: tuple(role for role in self.roles_by_type[role_type]
+                                  if role.name not in self.modifiers or fits((role,)))
+                 for role_type in RoleType}
+        if not fits(()):
+            raise ValueError(f"{self.name}: not enough roles for the {player_count}-player setup")
+
+        # Modifier roles that can each be dealt must also fit when dealt together
+        eligible = [role for role_type in RoleType for role in pools[role_type] if role.name in self.modifiers]
+        for size in range(2, len(eligible) + 1):
+            for together in itertools.combinations(eligible, size):
+                dealt_together = all(sum(1 for role in together if role.role_type == role_type) <= counts[role_type]
+                                     for role_type in RoleType)
+                if dealt_together and not fits(together):
+                    raise ValueError(f"{self.name}: the modifiers of {', '.join(r.name for r in together)} "
+                                     f"overflow the {player_count}-player setup")
+        return pools
+
+    def counts_with(self, counts: Dict[RoleType, int], modifier_roles: Iterable[Role]) -> Dict[RoleType, int]:
+        adjusted = dict(counts)
+        for role in modifier_roles:
+            for role_type, delta in self.modifiers.get(role.name, {}).items():
+                adjusted[role_type] += delta
+        return adjusted
+
+    def load_handlers(self):
+        if not self.handlers_loaded:
+            load_role_plugins(list(self.handler_modules))
+            self.handlers_loaded = True
+
+    @property
+    def player_counts(self) -> List[int]:
+        return sorted(self.setups)
+
+    def distribution(self, player_count: int) -> Dict[RoleType, int]:
+        """Base type counts for player_count, before any modifier."""
+        return dict(self.setups[player_count])
+
+    def select_roles(self, rng, player_count: int) -> List[Role]:
+        """Draw the roles for a game: demons and minions first, then the types their modifiers change."""
+        counts = dict(self.setups[player_count])
+        pools = self.pools[player_count]
+        selected = []
+        for role_type in DRAW_ORDER:
+            if not counts[role_type]:
+                continue
+            drawn = rng.sample(pools[role_type], counts[role_type])
+            counts = self.counts_with(counts, drawn)
+            selected.extend(drawn)
+        return selected
+
+    @classmethod
+    def from_definition(cls, definition: Dict) -> "Script":
+        """Compile a parsed script file: name, roles, and optional distribution, modifiers and handler modules."""
+        distribution = definition.get("distribution")
+        if distribution is not None:
+            distribution = {int(player_count): tuple(row[role_type.value] for role_type in TABLE_TYPES)
+                            for player_count, row in distribution.items()}
+        modifiers = {role_name: {RoleType(role_type): delta for role_type, delta in deltas.items()}
+                     for role_name, deltas in definition.get("modifiers", {}).items()}
+        return cls(definition["name"], definition["roles"], distribution, modifiers, definition.get("handlers", ()))
+
+
+# Compiled scripts by name, shared by every game in the process
+SCRIPTS: Dict[str, Script] = {}
+
+
+def register_script(script: Script, replace: bool = False) -> Script:
+    if script.name in SCRIPTS and not replace:
+        raise ValueError(f"Script {script.name} already exists")
+    SCRIPTS[script.name] = script
+    return script
+
+
+def load_script(path: str, replace: bool = False) -> Script:
+    with open(path) as f:
+        return register_script(Script.from_definition(json.load(f)), replace)
+
+
+def get_script(name: str = DEFAULT_SCRIPT) -> Script:
+    script = SCRIPTS.get(name)
+    if script is None:
+        raise ValueError(f"Unknown script {name}")
+    return script
+
+
+def load_script_directory(directory: str = SCRIPT_DIR) -> List[Script]:
+    return [load_script(os.path.join(directory, filename))
+            for filename in sorted(os.listdir(directory)) if filename.endswith(".json")]
+
+
+# Every process compiles the bundled scripts on import, so worker processes see the same ones
+load_script_directory()
@@ -0,0 +1,321 @@
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from clocktower_game import ClocktowerGame
+from game_logging import log_event, logger
+from game_store import WriteBehindStore
+from guild_actor import GuildActors
+from guild_session import GuildSession, SessionRegistry
+from metrics import REGISTRY
+from night_resolver import NightResolver
+from timer_wheel import TimerWheel
+
+# (username, event, fields) for one player
+PrivateEvent = Tuple[str, str, Dict[str, Any]]
+
+# Roles asked for targets and how many each picks
+TARGET_COUNTS = {"Fortune Teller": 2, "Imp": 1, "Poisoner": 1, "Monk": 1}
+
+
+class GameTransport(ABC):
+    """Where a GameService's output goes; each frontend renders the events its own way.
+
+    announce events go to the whole table:
+      "actions_complete"                  every night action is in
+      "night_timeout" missed, policy      the deadline passed and missing actions were filled in
+      "results_undelivered" night, usernames
+      "day_begins" day, deaths
+      "game_over" winner, reason, deaths, roles ([username, role, team, alive] per seat)
+    deaths lists only the players who died in the night just resolved.
+    notify events go to one player:
+      "role" role
+      "night_prompt" role, targets
+      "night_results" night, role, result
+    Roles are sent by name, so every field is plain JSON.
+    """
+
+    @abstractmethod
+    async def announce(self, session: GuildSession, event: str, **fields):
+        """Send a table-wide event."""
+
+    @abstractmethod
+    async def notify(self, session: GuildSession, messages: List[PrivateEvent]) -> List[str]:
+        """Deliver private events; returns the usernames that could not be reached."""
+
+
+class GameService:
+    """Runs games for any frontend: setup, night prompts, actions, deadlines, results and cleanup.
+
+    Sessions are keyed by an integer game id (the guild id for the Discord
+    bot) and hold the game plus who to deliver to. Methods other than run()
+    expect to be called on the game's actor, i.e. inside run(game_id, ...),
+    so one game's commands, actions and deadlines never interleave. With a
+    store, every change is written behind and a game is rehydrated the first
+    time its id is used after a restart.
+    """
+
+    def __init__(self, transport: GameTransport, store: Optional[WriteBehindStore] = None,
+                 resolver: Optional[NightResolver] = None, night_timeout: Optional[float] = None,
+                 night_timeout_policy: str = "random", timers: Optional[TimerWheel] = None):
+        self.transport = transport
+        self.store = store
+        self.resolver = resolver if resolver is not None else NightResolver("thread")
+        self.night_timeout = night_timeout
+        self.night_timeout_policy = night_timeout_policy
+        # One timer wheel drives every game's night deadline
+        self.timers = timers if timers is not None else TimerWheel(tick=1.0)
+        self.sessions = SessionRegistry()
+        self.actors = GuildActors()
+        self.loaded: Set[int] = set()
+
+        REGISTRY.gauge("clocktower_active_games", "Games currently running in this process",
+                       lambda: sum(1 for session in self.sessions.sessions.values() if session.game))
+        REGISTRY.gauge("clocktower_active_players", "Players seated in games running in this process",
+                       lambda: sum(len(session.game.players) for session in self.sessions.sessions.values()
+                                   if session.game))
+
+    def start(self):
+        if self.store is not None:
+            self.store.start()
+        self.timers.start()
+
+    async def close(self):
+        self.timers.stop()
+        await self.actors.close()
+        self.resolver.close()
+        if self.store is not None:
+            await self.store.close()
+
+    async def run(self, game_id: int, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Run func on the game's actor, after anything already queued for that game."""
+        return await self.actors.run(game_id, func, *args, **kwargs)
+
+    # Persistence
+
+    def record(self, game_id: int) -> Optional[Dict]:
+        session = self.sessions.get(game_id)
+        if session is None or (session.game is None and not session.test_mode):
+            return None
+        return session.to_record()
+
+    def persist(self, game_id: int):
+        if self.store is not None:
+            self.store.mark_dirty(game_id, self.record(game_id))
+
+    def rehydrate(self, game_id: int, record: Dict):
+        if self.sessions.get_game(game_id) is None:
+            session = GuildSession.from_record(game_id, record)
+            self.sessions.add(session)
+            if session.game and session.game.phase.value == "night":
+                self.schedule_night_deadline(session)
+
+    async def ensure_loaded(self, game_id: int):
+        if game_id in self.loaded:
+            return
+
+        record = await self.store.load_guild(game_id) if self.store is not None else None
+        if game_id not in self.loaded:
+            self.loaded.add(game_id)
+            if record:
+                self.rehydrate(game_id, record)
+
+    async def hand_off(self, game_id: int):
+        """Write a game back to the store and forget it so another process can take it over."""
+        self.persist(game_id)
+        if self.store is not None:
+            await self.store.flush()
+        self.sessions.end_game(game_id)
+        self.loaded.discard(game_id)
+
+    # Setup
+
+    def enable_test_mode(self, game_id: int):
+        self.sessions.get_or_create(game_id).test_mode = True
+        self.persist(game_id)
+
+    def start_game(self, game_id: int, usernames: List[str], member_ids: List[int],
+                   hardcoded_roles: Optional[Dict[str, str]] = None, channel_id: Optional[int] = None) -> Dict:
+        """Seat and deal a new game; member_ids[i] receives usernames[i]'s private events."""
+        if self.sessions.get_game(game_id):
+            return {"error": "A game is already running"}
+
+        session = self.sessions.get_or_create(game_id)
+        game = ClocktowerGame()
+        game.action_timeout = self.night_timeout
+        session.game = game
+        session.channel_id = channel_id
+        for member_id, username in zip(member_ids, usernames):
+            self.sessions.add_member(session, member_id, username)
+
+        result = game.start_game(list(usernames), hardcoded_roles)
+        if "error" in result:
+            self.sessions.clear_game(session)
+        return result
+
+    async def deal_roles(self, game_id: int) -> List[str]:
+        """Tell every player their role; returns the usernames that could not be reached."""
+        session = self.sessions.get(game_id)
+        return await self.transport.notify(session, [(player.username, "role", {"role": player.role.name})
+                                                     for player in session.game.players if player.role])
+
+    def end_game(self, game_id: int):
+        self.sessions.end_game(game_id)
+        if self.store is not None:
+            self.store.delete(game_id)
+
+    # Nights
+
+    async def progress_to_night(self, game_id: int) -> Dict:
+        result = await self.resolver.progress_to_night(self.sessions.get_game(game_id))
+        if "error" not in result:
+            self.persist(game_id)
+        return result
+
+    async def prompt_night_actions(self, game_id: int):
+        """Ask everyone still owing a night action for it and start the night's deadline."""
+        session = self.sessions.get(game_id)
+        if session is None or session.game is None or session.game.phase.value != "night":
+            return
+
+        game = session.game
+        pending = game.action_collector.get_collection_status()["pending_players"]
+        if not pending:
+            return
+
+        self.schedule_night_deadline(session)
+        prompts = []
+        for username in pending:
+            player = game.get_player(username)
+            if player and player.role:
+                prompts.append((username, "night_prompt", {"role": player.role.name,
+                                                           "targets": self.valid_targets(game, username)}))
+        await self.transport.notify(session, prompts)
+
+    @staticmethod
+    def living(game: ClocktowerGame) -> List[str]:
+        return [p.username for p in game.players if p.is_alive]
+
+    @staticmethod
+    def died_since(game: ClocktowerGame, living: List[str]) -> List[str]:
+        # By username, since a process resolver restores the game with new Player objects
+        return [username for username in living if not game.get_player(username).is_alive]
+
+    @staticmethod
+    def valid_targets(game: ClocktowerGame, username: str) -> List[str]:
+        return [p.username for p in game.players if p.is_alive and p.username != username]
+
+    async def submit_action(self, game_id: int, username: str, targets: List[str]) -> Dict:
+        """Check and submit one night action.
+
+        Errors come back as {"error": ...}; a missing-targets error also
+        carries "required" (None for roles that take no targets) and
+        "targets". Once the result has "collection_complete" it also lists
+        the night's "deaths"; confirm the action to the player and then
+        call finish_night with it.
+        """
+        game = self.sessions.get_game(game_id)
+        if game is None:
+            return {"error": "No active game found!"}
+        if game.phase.value != "night":
+            return {"error": "You can only submit actions during the night phase!"}
+
+        player = game.get_player(username)
+        if not player or not player.is_alive:
+            return {"error": f"{username} is not alive and cannot submit actions!"}
+        if not player.role:
+            return {"error": f"{username} doesn't have a role assigned!"}
+
+        role_name = player.role.name
+        valid_targets = self.valid_targets(game, username)
+        if not targets:
+            return {"error": f"{username} needs to specify targets!", "required": TARGET_COUNTS.get(role_name),
+                    "targets": valid_targets}
+
+        expected_count = TARGET_COUNTS.get(role_name, 1)
+        if len(targets) != expected_count:
+            return {"error": f"{username} ({role_name}) requires exactly {expected_count} "
+                             f"target{'s' if expected_count > 1 else ''}! You provided {len(targets)}."}
+
+        invalid_targets = [target for target in targets if target not in valid_targets]
+        if invalid_targets:
+            return {"error": f"Invalid targets: {', '.join(invalid_targets)}\nValid targets: {', '.join(valid_targets)}"}
+        if len(set(targets)) != len(targets):
+            return {"error": "You cannot target the same player multiple times!"}
+
+        living = self.living(game)
+        result = await self.resolver.submit_night_action(game, username, targets)
+        if "error" not in result:
+            if result.get("collection_complete"):
+                result["deaths"] = self.died_since(game, living)
+            self.persist(game_id)
+        return result
+
+    async def finish_night(self, game_id: int, result: Dict, event: str, **fields):
+        """Announce a resolved night: event opens it, then results go out and the day starts or the game ends.
+
+        result is what resolved the night, from submit_action or the deadline,
+        and carries its "deaths".
+        """
+        session = self.sessions.get(game_id)
+        game = session.game
+        await self.transport.announce(session, event, **fields)
+        await self.deliver_night_results(session)
+
+        dead = result.get("deaths", [])
+        game_result = result.get("game_result")
+        if game_result:
+            roles = [[p.username, p.role.name if p.role else None, p.role.team.value if p.role else None, p.is_alive]
+                     for p in game.players]
+            await self.transport.announce(session, "game_over", winner=game_result["winner"],
+                                          reason=game_result["reason"], deaths=dead, roles=roles)
+            self.end_game(game_id)
+        else:
+            await self.transport.announce(session, "day_begins", day=game.day_count, deaths=dead)
+
+    async def deliver_night_results(self, session: GuildSession):
+        game = session.game
+        results = game.get_night_1_results() if game.night_count == 1 else game.get_night_action_results()
+        messages = []
+        for username, result in results.items():
+            player = game.get_player(username)
+            if player and player.role:
+                messages.append((username, "night_results", {"night": game.night_count, "role": player.role.name,
+                                                             "result": result}))
+        if not messages:
+            return
+
+        failed = await self.transport.notify(session, messages)
+        if failed:
+            await self.transport.announce(session, "results_undelivered", night=game.night_count, usernames=failed)
+
+    # Deadlines
+
+    def schedule_night_deadline(self, session: GuildSession):
+        deadline = session.game.action_collector.deadline
+        if deadline is not None:
+            self.timers.schedule(deadline - time.time(), self._night_deadline_passed, session.guild_id,
+                                 session.game.night_count)
+
+    def _night_deadline_passed(self, game_id: int, night: int):
+        return self.run(game_id, self.resolve_night_deadline, game_id, night)
+
+    async def resolve_night_deadline(self, game_id: int, night: int):
+        game = self.sessions.get_game(game_id)
+        if game is None or game.phase.value != "night" or game.night_count != night:
+            return
+        # A timer left over from an earlier game or night finds no deadline, or one still ahead
+        deadline = game.action_collector.deadline
+        if deadline is None or deadline > time.time() + self.timers.tick:
+            return
+
+        living = self.living(game)
+        result = await self.resolver.resolve_missing_actions(game, self.night_timeout_policy)
+        if "error" in result:
+            log_event(logger, logging.WARNING, "night_timeout_failed", guild=game_id, error=result["error"])
+            return
+
+        result["deaths"] = self.died_since(game, living)
+        self.persist(game_id)
+        await self.finish_night(game_id, result, "night_timeout", missed=result["defaulted_players"],
+                                policy=self.night_timeout_policy)
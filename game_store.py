@@ -0,0 +1,222 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+from game_logging import log_event
+
+store_log = logging.getLogger("clocktower.store")
+
+
+class GameStore(ABC):
+    """Storage backend for per-guild game records.
+
+    A record is a JSON-serializable dict holding everything the bot keeps
+    for one guild: the game snapshot, channel, test mode and member ids.
+    Backends are synchronous; WriteBehindStore moves them off the event loop.
+    """
+
+    @abstractmethod
+    def load_guild(self, guild_id: int) -> Optional[Dict]:
+        """The guild's record, or None if it has no saved game."""
+
+    @abstractmethod
+    def find_guild_for_member(self, member_id: int) -> Optional[int]:
+        """The guild whose saved game seats this member, if any."""
+
+    @abstractmethod
+    def save_guilds(self, records: Dict[int, Optional[Dict]]):
+        """Write a batch of records; a None record deletes the guild."""
+
+    @abstractmethod
+    def push_relay(self, process_index: int, payload: Dict):
+        """Queue a message for the bot process that owns its guild."""
+
+    @abstractmethod
+    def take_relays(self, process_index: int) -> List[Dict]:
+        """Remove and return the messages queued for a process, oldest first."""
+
+    def close(self):
+        pass
+
+
+class MemoryGameStore(GameStore):
+    def __init__(self):
+        self._records: Dict[int, str] = {}
+        self._member_guilds: Dict[int, int] = {}
+        self._relays: Dict[int, List[str]] = {}
+
+    def load_guild(self, guild_id: int) -> Optional[Dict]:
+        data = self._records.get(guild_id)
+        return json.loads(data) if data is not None else None
+
+    def find_guild_for_member(self, member_id: int) -> Optional[int]:
+        return self._member_guilds.get(member_id)
+
+    def save_guilds(self, records: Dict[int, Optional[Dict]]):
+        for guild_id, record in records.items():
+            for member_id in [m for m, g in self._member_guilds.items() if g == guild_id]:
+                del self._member_guilds[member_id]
+            if record is None:
+                self._records.pop(guild_id, None)
+                continue
+            self._records[guild_id] = json.dumps(record)
+            for member_id in record.get("members", {}):
+                self._member_guilds[int(member_id)] = guild_id
+
+    def push_relay(self, process_index: int, payload: Dict):
+        self._relays.setdefault(process_index, []).append(json.dumps(payload))
+
+    def take_relays(self, process_index: int) -> List[Dict]:
+        return [json.loads(data) for data in self._relays.pop(process_index, [])]
+
+
+class SQLiteGameStore(GameStore):
+    def __init__(self, path: str):
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS games (guild_id INTEGER PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS members (member_id INTEGER PRIMARY KEY, guild_id INTEGER NOT NULL)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS members_by_guild ON members (guild_id)")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS relays (id INTEGER PRIMARY KEY AUTOINCREMENT, process_index INTEGER NOT NULL, data TEXT NOT NULL)")
+
+    def load_guild(self, guild_id: int) -> Optional[Dict]:
+        with self._lock:
+            row = self._connection.execute("SELECT data FROM games WHERE guild_id = ?", (guild_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find_guild_for_member(self, member_id: int) -> Optional[int]:
+        with self._lock:
+            row = self._connection.execute("SELECT guild_id FROM members WHERE member_id = ?", (member_id,)).fetchone()
+        return row[0] if row else None
+
+    def save_guilds(self, records: Dict[int, Optional[Dict]]):
+        now = time.time()
+        rows = [(guild_id, json.dumps(record), now) for guild_id, record in records.items() if record is not None]
+        with self._lock, self._connection:
+            self._connection.executemany("DELETE FROM members WHERE guild_id = ?", [(guild_id,) for guild_id in records])
+            self._connection.executemany("DELETE FROM games WHERE guild_id = ?",
+                                         [(guild_id,) for guild_id, record in records.items() if record is None])
+            self._connection.executemany("INSERT OR REPLACE INTO games (guild_id, data, updated_at) VALUES (?, ?, ?)", rows)
+            self._connection.executemany("INSERT OR REPLACE INTO members (member_id, guild_id) VALUES (?, ?)",
+                                         [(int(member_id), guild_id) for guild_id, record in records.items() if record
+                                          for member_id in record.get("members", {})])
+
+    def push_relay(self, process_index: int, payload: Dict):
+        with self._lock, self._connection:
+            self._connection.execute("INSERT INTO relays (process_index, data) VALUES (?, ?)",
+                                     (process_index, json.dumps(payload)))
+
+    def take_relays(self, process_index: int) -> List[Dict]:
+        with self._lock, self._connection:
+            rows = self._connection.execute("SELECT id, data FROM relays WHERE process_index = ? ORDER BY id",
+                                            (process_index,)).fetchall()
+            if rows:
+                self._connection.execute("DELETE FROM relays WHERE process_index = ? AND id <= ?",
+                                         (process_index, rows[-1][0]))
+        return [json.loads(data) for _, data in rows]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class WriteBehindStore:
+    """Batches guild writes in memory and flushes them from a worker thread.
+
+    mark_dirty only records the latest state of a guild, so a burst of
+    commands costs one write. Reads check the pending batch, then the batch
+    being written, before the backend, so a guild is never rehydrated from
+    a stale row. Flushes run one at a time, so batches commit in order.
+    """
+
+    def __init__(self, store: GameStore, flush_interval: float = 1.0, max_batch: int = 200):
+        self.store = store
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._pending: Dict[int, Optional[Dict]] = {}
+        # The batch a flush has taken from _pending but not yet committed
+        self._inflight: Dict[int, Optional[Dict]] = {}
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    def mark_dirty(self, guild_id: int, record: Optional[Dict]):
+        self._pending[guild_id] = record
+        if self._wakeup is not None and len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+
+    def delete(self, guild_id: int):
+        self.mark_dirty(guild_id, None)
+
+    async def load_guild(self, guild_id: int) -> Optional[Dict]:
+        if guild_id in self._pending:
+            return self._pending[guild_id]
+        if guild_id in self._inflight:
+            return self._inflight[guild_id]
+        return await asyncio.to_thread(self.store.load_guild, guild_id)
+
+    async def find_guild_for_member(self, member_id: int) -> Optional[int]:
+        for batch in (self._pending, self._inflight):
+            for guild_id, record in batch.items():
+                if record is not None and str(member_id) in record.get("members", {}):
+                    return guild_id
+        return await asyncio.to_thread(self.store.find_guild_for_member, member_id)
+
+    async def push_relay(self, process_index: int, payload: Dict):
+        # Relays skip the write-behind batch; the owning process polls for them
+        await asyncio.to_thread(self.store.push_relay, process_index, payload)
+
+    async def take_relays(self, process_index: int) -> List[Dict]:
+        return await asyncio.to_thread(self.store.take_relays, process_index)
+
+    async def flush(self):
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            self._inflight = batch
+            try:
+                await asyncio.to_thread(self.store.save_guilds, batch)
+            except Exception as e:
+                log_event(store_log, logging.ERROR, "persist_failed", games=len(batch), error=str(e))
+                # Keep anything newer that arrived while the batch was in flight
+                self._pending = {**batch, **self._pending}
+            finally:
+                self._inflight = {}
+
+    def flush_blocking(self):
+        if self._pending:
+            batch, self._pending = self._pending, {}
+            self.store.save_guilds(batch)
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+        self.store.close()
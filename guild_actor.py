@@ -0,0 +1,92 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class GuildActor:
+    """Runs one guild's commands one at a time, in the order they arrived.
+
+    Each actor is an asyncio task draining its own queue, so a slow command
+    only delays later commands for the same guild. The task exits after
+    idle_timeout seconds without work and is recreated on the next command.
+    A command that raises, even a BaseException, fails only its own caller;
+    if the actor itself is cancelled, the commands still queued are cancelled.
+    """
+
+    def __init__(self, guild_id: int, registry: "GuildActors", idle_timeout: float):
+        self.guild_id = guild_id
+        self.registry = registry
+        self.idle_timeout = idle_timeout
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        try:
+            while True:
+                try:
+                    func, args, kwargs, future = await asyncio.wait_for(self.queue.get(), timeout=self.idle_timeout)
+                except asyncio.TimeoutError:
+                    # Nothing can be queued between the timeout and this check
+                    if self.queue.empty():
+                        return
+                    continue
+
+                if future.cancelled():
+                    continue
+                try:
+                    result = await func(*args, **kwargs)
+                except asyncio.CancelledError:
+                    if not future.done():
+                        future.cancel()
+                    if _being_cancelled(self.task):
+                        raise
+                except BaseException as e:
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            # However the actor stops, nobody queued behind it may wait forever
+            self.registry._retire(self)
+            while not self.queue.empty():
+                future = self.queue.get_nowait()[3]
+                if not future.done():
+                    future.cancel()
+
+
+def _being_cancelled(task: asyncio.Task) -> bool:
+    """Whether a CancelledError is the actor being stopped rather than one its command raised."""
+    # Task.cancelling() is 3.11+; without it every cancellation is taken as the actor's own
+    cancelling = getattr(task, "cancelling", None)
+    return cancelling is None or cancelling() > 0
+
+
+class GuildActors:
+    """Guild id -> actor; commands for different guilds run concurrently."""
+
+    def __init__(self, idle_timeout: float = 300.0):
+        self.idle_timeout = idle_timeout
+        self.actors: Dict[int, GuildActor] = {}
+
+    def _retire(self, actor: GuildActor):
+        if self.actors.get(actor.guild_id) is actor:
+            del self.actors[actor.guild_id]
+
+    async def run(self, guild_id: int, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Queue func(*args, **kwargs) on the guild's actor and wait for its result."""
+        actor = self.actors.get(guild_id)
+        if actor is not None and actor.task is asyncio.current_task():
+            # Already on this guild's actor; queueing would wait on ourselves
+            return await func(*args, **kwargs)
+
+        if actor is None or actor.task.done():
+            actor = self.actors[guild_id] = GuildActor(guild_id, self, self.idle_timeout)
+        future = asyncio.get_running_loop().create_future()
+        actor.queue.put_nowait((func, args, kwargs, future))
+        return await future
+
+    async def close(self):
+        actors, self.actors = list(self.actors.values()), {}
+        for actor in actors:
+            actor.task.cancel()
+        await asyncio.gather(*(actor.task for actor in actors), return_exceptions=True)
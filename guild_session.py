@@ -0,0 +1,96 @@
+from typing import Dict, Optional
+from clocktower_game import ClocktowerGame
+
+
+class GuildSession:
+    """Everything the bot tracks for one guild's game.
+
+    Keeps both directions of the member mapping for the guild: username to
+    member id for outbound DMs and member id to username for inbound
+    actions. In test mode every username maps to the one test user.
+    """
+
+    def __init__(self, guild_id: int):
+        self.guild_id = guild_id
+        self.game: Optional[ClocktowerGame] = None
+        self.channel_id: Optional[int] = None
+        self.test_mode = False
+        self.member_ids: Dict[str, int] = {}
+        self.usernames: Dict[int, str] = {}
+
+    def add_member(self, member_id: int, username: str):
+        self.member_ids.setdefault(username, member_id)
+        self.usernames[member_id] = username
+
+    def recipient_for(self, username: str) -> Optional[int]:
+        if self.test_mode:
+            return next(iter(self.usernames), None)
+        return self.member_ids.get(username)
+
+    def to_record(self) -> Dict:
+        return {
+            "game": self.game.snapshot() if self.game else None,
+            "channel_id": self.channel_id,
+            "test_mode": self.test_mode,
+            "members": {str(member_id): username for member_id, username in self.usernames.items()}
+        }
+
+    @classmethod
+    def from_record(cls, guild_id: int, record: Dict) -> "GuildSession":
+        session = cls(guild_id)
+        session.test_mode = record["test_mode"]
+        if record["game"]:
+            session.game = ClocktowerGame.from_snapshot(record["game"], verbose=True)
+            session.channel_id = record["channel_id"]
+            for member_id, username in record["members"].items():
+                session.add_member(int(member_id), username)
+        return session
+
+
+class SessionRegistry:
+    """Guild id -> session, plus a member id -> session reverse index."""
+
+    def __init__(self):
+        self.sessions: Dict[int, GuildSession] = {}
+        self.member_sessions: Dict[int, GuildSession] = {}
+
+    def get(self, guild_id: int) -> Optional[GuildSession]:
+        return self.sessions.get(guild_id)
+
+    def get_game(self, guild_id: int) -> Optional[ClocktowerGame]:
+        session = self.sessions.get(guild_id)
+        return session.game if session else None
+
+    def get_or_create(self, guild_id: int) -> GuildSession:
+        session = self.sessions.get(guild_id)
+        if session is None:
+            session = self.sessions[guild_id] = GuildSession(guild_id)
+        return session
+
+    def add(self, session: GuildSession):
+        self.sessions[session.guild_id] = session
+        for member_id in session.usernames:
+            self.member_sessions[member_id] = session
+
+    def for_member(self, member_id: int) -> Optional[GuildSession]:
+        return self.member_sessions.get(member_id)
+
+    def add_member(self, session: GuildSession, member_id: int, username: str):
+        session.add_member(member_id, username)
+        self.member_sessions[member_id] = session
+
+    def clear_game(self, session: GuildSession):
+        """Drop the session's game and members; costs O(players in the guild)."""
+        for member_id in session.usernames:
+            if self.member_sessions.get(member_id) is session:
+                del self.member_sessions[member_id]
+        session.game = None
+        session.channel_id = None
+        session.member_ids = {}
+        session.usernames = {}
+
+    def end_game(self, guild_id: int):
+        """Forget the guild entirely, including test mode."""
+        session = self.sessions.pop(guild_id, None)
+        if session is not None:
+            self.clear_game(session)
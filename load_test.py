@@ -0,0 +1,159 @@
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from typing import List, Optional
+
+import aiohttp
+from aiohttp import web
+
+from game_service import TARGET_COUNTS
+from simulator import parse_player_counts
+from web_server import create_app
+
+
+class LoadStats:
+    """What every simulated client saw, merged across games."""
+
+    def __init__(self):
+        self.games = 0
+        self.stalled = 0
+        self.days = 0
+        self.actions = 0
+        self.errors = 0
+        self.action_latencies: List[float] = []
+        self.game_seconds: List[float] = []
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+async def play_seat(http: aiohttp.ClientSession, url: str, game_id: int, username: str, token: str, host: bool,
+                    rng: random.Random, stats: LoadStats):
+    """One client: act on every night prompt; the host seat also starts each night."""
+    sent_at: Optional[float] = None
+    async with http.ws_connect(f"{url}/games/{game_id}/ws", params={"token": token}) as socket:
+        async for message in socket:
+            if message.type != aiohttp.WSMsgType.TEXT:
+                break
+            event = message.json()
+            kind = event["event"]
+            if kind == "night_prompt":
+                targets = rng.sample(event["targets"], TARGET_COUNTS.get(event["role"], 1))
+                sent_at = time.perf_counter()
+                await socket.send_json({"action": targets})
+            elif kind == "action_submitted" and sent_at is not None:
+                stats.action_latencies.append(time.perf_counter() - sent_at)
+                stats.actions += 1
+                sent_at = None
+            elif kind == "error":
+                stats.errors += 1
+            elif kind == "day_begins" and host:
+                stats.days += 1
+                async with http.post(f"{url}/games/{game_id}/night") as response:
+                    await response.read()
+            elif kind in ("game_over", "game_ended"):
+                break
+
+
+async def play_game(http: aiohttp.ClientSession, url: str, player_count: int, rng: random.Random,
+                    stats: LoadStats, timeout: float):
+    started = time.perf_counter()
+    players = [f"player{i}" for i in range(player_count)]
+    async with http.post(f"{url}/games", json={"players": players}) as response:
+        game = await response.json()
+    game_id = game["game_id"]
+    host = players[0]
+    if game["phase"] == "day":
+        # Nobody had anything to do on the first night
+        async with http.post(f"{url}/games/{game_id}/night") as response:
+            await response.read()
+
+    seats = [play_seat(http, url, game_id, username, token, username == host, random.Random(rng.random()), stats)
+             for username, token in game["tokens"].items()]
+    try:
+        await asyncio.wait_for(asyncio.gather(*seats), timeout)
+    except asyncio.TimeoutError:
+        stats.stalled += 1
+        async with http.delete(f"{url}/games/{game_id}") as response:
+            await response.read()
+        return
+    stats.games += 1
+    stats.game_seconds.append(time.perf_counter() - started)
+
+
+async def run_load(url: str, games: int, concurrency: int, player_counts: List[int], seed: int,
+                   timeout: float) -> LoadStats:
+    stats = LoadStats()
+    rng = random.Random(seed)
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one_game(http: aiohttp.ClientSession, player_count: int):
+        async with slots:
+            await play_game(http, url, player_count, random.Random(rng.random()), stats, timeout)
+
+    # Every seat holds a WebSocket open for the whole game, so the pool must not cap connections
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0)) as http:
+        await asyncio.gather(*(one_game(http, rng.choice(player_counts)) for _ in range(games)))
+    return stats
+
+
+def format_report(stats: LoadStats, seconds: float, concurrency: int, player_counts: List[int]) -> str:
+    latencies = [latency * 1000 for latency in stats.action_latencies]
+    lines = [
+        f"Games: {stats.games} finished, {stats.stalled} stalled, {concurrency} at a time "
+        f"({min(player_counts)}-{max(player_counts)} players)",
+        f"Throughput: {stats.games / seconds:.1f} games/s, {stats.actions / seconds:.0f} actions/s over {seconds:.1f}s",
+        f"Action latency: p50 {percentile(latencies, 0.5):.1f}ms, p99 {percentile(latencies, 0.99):.1f}ms, "
+        f"max {max(latencies, default=0):.1f}ms over {len(latencies)}",
+        f"Game length: {statistics.mean(stats.game_seconds) if stats.game_seconds else 0:.2f}s mean, "
+        f"{stats.days} days played",
+        f"Errors: {stats.errors}",
+    ]
+    return "\n".join(lines)
+
+
+async def main_async(args: argparse.Namespace) -> LoadStats:
+    runner = None
+    url = args.url
+    if url is None:
+        # No server given: host one in this process on a free port
+        runner = web.AppRunner(create_app(resolution=args.resolution))
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        url = f"http://127.0.0.1:{runner.addresses[0][1]}"
+
+    try:
+        started = time.perf_counter()
+        stats = await run_load(url.rstrip("/"), args.games, args.concurrency, args.players, args.seed, args.timeout)
+        print(format_report(stats, time.perf_counter() - started, args.concurrency, args.players))
+        return stats
+    finally:
+        if runner is not None:
+            await runner.cleanup()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Play many concurrent games against the web frontend with simulated clients")
+    parser.add_argument("--url", help="server to test, e.g. http://127.0.0.1:8080 (default: start one in-process)")
+    parser.add_argument("--games", type=int, default=200, help="games to play in total")
+    parser.add_argument("--concurrency", type=int, default=50, help="games in flight at once")
+    parser.add_argument("--players", type=parse_player_counts, default="5-15",
+                        help="player counts to draw from, e.g. 5-15 or 5,7,9")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds before a game counts as stalled")
+    parser.add_argument("--resolution", choices=("inline", "thread", "process"), default="thread",
+                        help="night resolution mode for the in-process server")
+    args = parser.parse_args(argv)
+
+    stats = asyncio.run(main_async(args))
+    return 1 if stats.stalled or stats.errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
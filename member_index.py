@@ -0,0 +1,113 @@
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+def member_keys(member) -> Tuple[str, ...]:
+    """The names !start accepts for a member: username, display name and tag."""
+    name, display_name, tag = member.name, member.display_name, str(member)
+    if display_name == name:
+        return (name, tag) if tag != name else (name,)
+    return (name, display_name, tag) if tag != name and tag != display_name else (name, display_name)
+
+
+class GuildNameIndex:
+    """Name -> member lookup for one guild.
+
+    Several members can share a display name, so each key keeps its first
+    holder in _first and any later ones, in order, in _others; the first
+    holder wins, matching a linear scan over guild.members.
+    """
+
+    def __init__(self, members: Iterable[Any] = ()):
+        self._first: Dict[str, Any] = {}
+        self._others: Dict[str, List[Any]] = {}
+        self._keys: Dict[int, Tuple[str, ...]] = {}
+        for member in members:
+            self._insert(member)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def get(self, name: str):
+        return self._first.get(name)
+
+    def _insert(self, member):
+        keys = self._keys[member.id] = member_keys(member)
+        first = self._first
+        for key in keys:
+            if key in first:
+                self._others.setdefault(key, []).append(member)
+            else:
+                first[key] = member
+
+    def add(self, member):
+        self.remove(member.id)
+        self._insert(member)
+
+    def remove(self, member_id: int):
+        for key in self._keys.pop(member_id, ()):
+            others = self._others.get(key)
+            if self._first[key].id == member_id:
+                if others:
+                    self._first[key] = others.pop(0)
+                else:
+                    del self._first[key]
+            else:
+                others[:] = [m for m in others if m.id != member_id]
+            if others is not None and not others:
+                del self._others[key]
+
+
+class MemberNameIndex:
+    """Lazily built per-guild name indexes, bounded by an LRU over guilds.
+
+    A guild's index is built from guild.members the first time a name is
+    resolved there and kept current from member events afterwards; events
+    for guilds that are not cached are ignored, since a later build reads
+    the fresh member list anyway.
+    """
+
+    def __init__(self, max_guilds: int = 64):
+        self.max_guilds = max_guilds
+        self._guilds: "OrderedDict[int, GuildNameIndex]" = OrderedDict()
+
+    def _index_for(self, guild) -> GuildNameIndex:
+        index = self._guilds.get(guild.id)
+        if index is None:
+            index = self._guilds[guild.id] = GuildNameIndex(guild.members)
+            if len(self._guilds) > self.max_guilds:
+                self._guilds.popitem(last=False)
+        else:
+            self._guilds.move_to_end(guild.id)
+        return index
+
+    def resolve(self, guild, name: str):
+        return self._index_for(guild).get(name)
+
+    def resolve_many(self, guild, names: Iterable[str]) -> Dict[str, Optional[Any]]:
+        index = self._index_for(guild)
+        return {name: index.get(name) for name in names}
+
+    def member_joined(self, member):
+        index = self._guilds.get(member.guild.id)
+        if index is not None:
+            index.add(member)
+
+    def member_updated(self, member):
+        self.member_joined(member)
+
+    def member_left(self, member):
+        index = self._guilds.get(member.guild.id)
+        if index is not None:
+            index.remove(member.id)
+
+    def user_renamed(self, user, guilds: Iterable[Any]):
+        """A username change applies to the user's member in every cached guild."""
+        for guild in guilds:
+            if guild.id in self._guilds:
+                member = guild.get_member(user.id)
+                if member is not None:
+                    self._guilds[guild.id].add(member)
+
+    def forget_guild(self, guild_id: int):
+        self._guilds.pop(guild_id, None)
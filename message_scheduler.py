@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Sequence, Tuple
+from game_logging import log_event
+from metrics import REGISTRY
+
+dm_log = logging.getLogger("clocktower.dm")
+dm_seconds = REGISTRY.histogram("clocktower_dm_send_seconds", "Latency of one DM send attempt to Discord")
+dm_messages = REGISTRY.counter("clocktower_dm_messages_total", "DM messages by final outcome (sent or failed)")
+dm_retries = REGISTRY.counter("clocktower_dm_transient_failures_total", "DM send attempts that failed but could be retried, by reason")
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limited, retry after {retry_after:.2f}s")
+        self.retry_after = retry_after
+
+
+class PermanentSendError(Exception):
+    """The recipient can never be reached (e.g. DMs disabled); do not retry."""
+
+
+class MessageTransport(ABC):
+    """Delivers one message holding one or more embeds to a recipient."""
+
+    @abstractmethod
+    async def send(self, recipient_id: int, embeds: List[Any]):
+        """Raise PermanentSendError if the recipient can never be reached, RateLimited on a 429."""
+
+
+class TokenBucket:
+    def __init__(self, rate: int, per: float):
+        self.capacity = rate
+        self.tokens = float(rate)
+        self.fill_rate = rate / per
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+        self.updated = now
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                await asyncio.sleep(self.blocked_until - now)
+                continue
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.fill_rate)
+
+    def block(self, retry_after: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+
+class MessageScheduler:
+    """Fans outbound DMs out concurrently within Discord's rate limits.
+
+    Each recipient's DM channel is its own route bucket and all sends also
+    share a global bucket. Embeds queued for the same recipient in one
+    send_many call are coalesced into as few messages as possible, in order.
+    Transient failures are retried with exponential backoff; a 429 blocks
+    the route for the advertised retry_after.
+    """
+
+    def __init__(self, transport: MessageTransport, route_rate: int = 5, route_period: float = 5.0,
+                 global_rate: int = 50, global_period: float = 1.0, max_concurrency: int = 16,
+                 max_retries: int = 3, backoff: float = 0.5, embeds_per_message: int = 10,
+                 max_routes: int = 10000):
+        self.transport = transport
+        self.route_rate = route_rate
+        self.route_period = route_period
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.embeds_per_message = embeds_per_message
+        self.max_routes = max_routes
+        self._global_bucket = TokenBucket(global_rate, global_period)
+        self._routes: "OrderedDict[int, TokenBucket]" = OrderedDict()
+        self._concurrency = asyncio.Semaphore(max_concurrency)
+
+    def _route_bucket(self, recipient_id: int) -> TokenBucket:
+        bucket = self._routes.get(recipient_id)
+        if bucket is None:
+            bucket = self._routes[recipient_id] = TokenBucket(self.route_rate, self.route_period)
+            if len(self._routes) > self.max_routes:
+                self._routes.popitem(last=False)
+        else:
+            self._routes.move_to_end(recipient_id)
+        return bucket
+
+    async def send(self, recipient_id: int, embed: Any) -> bool:
+        return (await self.send_many([(recipient_id, embed)]))[0]
+
+    async def send_many(self, messages: Sequence[Tuple[int, Any]]) -> List[bool]:
+        """Send every (recipient_id, embed) pair; returns per-pair success."""
+        results = [False] * len(messages)
+        by_recipient: Dict[int, List[int]] = {}
+        for index, (recipient_id, _) in enumerate(messages):
+            by_recipient.setdefault(recipient_id, []).append(index)
+
+        await asyncio.gather(*(self._deliver_to(recipient_id, indices, messages, results)
+                               for recipient_id, indices in by_recipient.items()))
+        return results
+
+    async def _deliver_to(self, recipient_id: int, indices: List[int],
+                          messages: Sequence[Tuple[int, Any]], results: List[bool]):
+        for start in range(0, len(indices), self.embeds_per_message):
+            chunk = indices[start:start + self.embeds_per_message]
+            delivered = await self._send_with_retry(recipient_id, [messages[i][1] for i in chunk])
+            for i in chunk:
+                results[i] = delivered
+
+    async def _send_with_retry(self, recipient_id: int, embeds: List[Any]) -> bool:
+        route = self._route_bucket(recipient_id)
+        for attempt in range(self.max_retries + 1):
+            await route.acquire()
+            await self._global_bucket.acquire()
+            try:
+                async with self._concurrency:
+                    started = time.perf_counter()
+                    try:
+                        await self.transport.send(recipient_id, embeds)
+                    finally:
+                        dm_seconds.observe(time.perf_counter() - started)
+                dm_messages.inc(outcome="sent")
+                return True
+            except PermanentSendError:
+                break
+            except RateLimited as e:
+                dm_retries.inc(reason="rate_limited")
+                route.block(e.retry_after)
+            except Exception as e:
+                dm_retries.inc(reason="error")
+                log_event(dm_log, logging.WARNING, "dm_failed", recipient=recipient_id, attempt=attempt + 1, error=str(e))
+                if attempt < self.max_retries:
+                    await asyncio.sleep(self.backoff * 2 ** attempt)
+        dm_messages.inc(outcome="failed")
+        return False
+
@@ -0,0 +1,100 @@
+import asyncio
+import time
+import concurrent.futures
+from concurrent.futures import Executor
+from typing import Dict, List, Optional, Tuple
+from clocktower_game import ClocktowerGame
+from metrics import COLLECTION_BUCKETS, REGISTRY
+
+night_seconds = REGISTRY.histogram("clocktower_night_resolution_seconds",
+                                   "Time spent running a night's actions inside the game")
+night_wall_seconds = REGISTRY.histogram("clocktower_night_resolution_wall_seconds",
+                                        "Time from handing a night to the resolver until its results are back, by mode")
+collection_seconds = REGISTRY.histogram("clocktower_action_collection_seconds",
+                                        "Time from a night's first submitted action to its last", COLLECTION_BUCKETS)
+
+RESOLUTION_MODES = ("inline", "thread", "process")
+
+
+def _resolve_in_worker(snapshot: Dict, verbose: bool, method: str, args: Tuple) -> Tuple[Dict, Dict]:
+    """Process pool entry point: replay one game call on a copy and hand back the new state."""
+    game = ClocktowerGame.from_snapshot(snapshot, verbose=verbose)
+    result = getattr(game, method)(*args)
+    return result, game.snapshot()
+
+
+class NightResolver:
+    """Runs game calls that can resolve a night away from the event loop.
+
+    "inline" calls the game directly, "thread" runs the call in a thread
+    pool and "process" ships a snapshot to a process pool and restores the
+    resolved state. Callers must keep the game to themselves until the call
+    returns; the bot does this by awaiting on the guild's actor.
+    """
+
+    def __init__(self, mode: str = "thread", max_workers: Optional[int] = None):
+        if mode not in RESOLUTION_MODES:
+            raise ValueError(f"Unknown night resolution mode {mode!r}, expected one of {', '.join(RESOLUTION_MODES)}")
+        self.mode = mode
+        self.max_workers = max_workers
+        self._processes: Optional[Executor] = None
+        self._threads: Optional[Executor] = None
+
+    def _process_pool(self) -> Executor:
+        if self._processes is None:
+            # concurrent.futures loads multiprocessing on first use, so thread and inline bots never pay for it
+            self._processes = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._processes
+
+    def _thread_pool(self) -> Executor:
+        if self._threads is None:
+            self._threads = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="night")
+        return self._threads
+
+    async def submit_night_action(self, game: ClocktowerGame, username: str, choices: List[str]) -> Dict:
+        collector = game.action_collector
+        # Only the submission that completes the night is worth moving off the loop
+        completes_night = (username in collector.expected_players and username not in collector.collected_actions
+                           and len(collector.collected_actions) + 1 == len(collector.expected_players))
+        if not completes_night:
+            return game.submit_night_action(username, choices)
+        return await self._call(game, "submit_night_action", username, list(choices))
+
+    async def resolve_missing_actions(self, game: ClocktowerGame, policy: str) -> Dict:
+        return await self._call(game, "resolve_missing_actions", policy)
+
+    async def progress_to_night(self, game: ClocktowerGame) -> Dict:
+        # Resolves the night straight away when nobody has to act
+        return await self._call(game, "progress_to_night")
+
+    async def _call(self, game: ClocktowerGame, method: str, *args) -> Dict:
+        game.last_night_seconds = None
+        started = time.perf_counter()
+        result = await self._dispatch(game, method, *args)
+        if game.last_night_seconds is not None:
+            night_seconds.observe(game.last_night_seconds)
+            night_wall_seconds.observe(time.perf_counter() - started, mode=self.mode)
+            collector = game.action_collector
+            if collector.first_action_at is not None:
+                collection_seconds.observe(collector.last_action_at - collector.first_action_at)
+        return result
+
+    async def _dispatch(self, game: ClocktowerGame, method: str, *args) -> Dict:
+        if self.mode == "inline":
+            return getattr(game, method)(*args)
+
+        loop = asyncio.get_running_loop()
+        if self.mode == "thread" or game.event_log is not None or game.profiler is not None:
+            # Recorded and profiled games keep their log or profiler here, so they stay in this process
+            return await loop.run_in_executor(self._thread_pool(), getattr(game, method), *args)
+
+        result, snapshot = await loop.run_in_executor(self._process_pool(), _resolve_in_worker,
+                                                      game.snapshot(), game.verbose, method, args)
+        game.restore(snapshot)
+        return result
+
+    def close(self):
+        for executor in (self._processes, self._threads):
+            if executor is not None:
+                executor.shutdown(wait=False)
+        self._processes = self._threads = None
@@ -0,0 +1,41 @@
+from typing import List, NamedTuple
+from engine_log import WARNING, log_engine_event
+from roles import Player
+from role_executor import RoleHandler, get_role_handler, is_automatic_role, is_information_role
+
+
+class NightStep(NamedTuple):
+    seat: int
+    handler: RoleHandler
+    automatic: bool
+    informs: bool
+
+
+def build_night_schedule(players: List[Player], first_night: bool) -> List[NightStep]:
+    """Order the seats that wake tonight by their role's night order.
+
+    Uses Role.first_night_order on the first night and Role.night_order
+    afterwards; seats whose role has no order for this night are left out.
+    So are roles that wake without a registered handler, e.g. a script role
+    whose handler module is missing; a warning is logged and the night goes on.
+    """
+    ordered = []
+    for seat, player in enumerate(players):
+        role = player.role
+        if role is None:
+            continue
+
+        order = role.first_night_order if first_night else role.night_order
+        if order is None:
+            continue
+
+        handler = get_role_handler(role.name)
+        if handler is None:
+            log_engine_event(WARNING, "night_handler_missing", role=role.name, seat=seat)
+            continue
+
+        ordered.append((order, seat, NightStep(seat, handler, is_automatic_role(role.name),
+                                               is_information_role(role.name))))
+
+    ordered.sort(key=lambda entry: (entry[0], entry[1]))
+    return [step for _, _, step in ordered]
@@ -0,0 +1,117 @@
+import functools
+import io
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+# Called as listener(phase, seconds, info) when a phase ends
+PhaseListener = Callable[[str, float, Dict], None]
+
+
+def profiled(phase_name: str):
+    """Run a game method inside a profiler phase when the game has a profiler attached."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.profiler is None:
+                return method(self, *args, **kwargs)
+            with self.profiler.phase(phase_name, night=self.night_count):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class GameProfiler:
+    """Opt-in profiling for a single game.
+
+    Attach with game.profiler = GameProfiler(...). The game then wraps
+    night action collection, night execution, each role handler dispatch
+    and the move to day in phase(), which times the phase, notifies any
+    listeners and, with cprofile, runs cProfile only while one of this
+    game's phases is on the stack, so other games in the process are not
+    profiled. tracemalloc is process-wide; its snapshot covers everything
+    allocated since the profiler started.
+    """
+
+    def __init__(self, label: str = "game", cprofile: bool = False, memory: bool = False,
+                 listeners: Optional[List[PhaseListener]] = None):
+        self.label = label
+        self.listeners = list(listeners or [])
+        self.timings: Dict[str, List[float]] = {}
+        self.started_at = time.time()
+        # cProfile, pstats and tracemalloc load only for profilers that use them, not on every engine import
+        self._profile = None
+        if cprofile:
+            import cProfile
+            self._profile = cProfile.Profile()
+        self._depth = 0
+        self._tracemalloc = None
+        self._owns_tracemalloc = False
+        if memory:
+            import tracemalloc
+            self._tracemalloc = tracemalloc
+            self._owns_tracemalloc = not tracemalloc.is_tracing()
+            if self._owns_tracemalloc:
+                tracemalloc.start()
+        self.memory = memory
+
+    @contextmanager
+    def phase(self, name: str, **info):
+        outermost = self._depth == 0
+        self._depth += 1
+        if outermost and self._profile is not None:
+            self._profile.enable()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            if outermost and self._profile is not None:
+                self._profile.disable()
+            self._depth -= 1
+            # count, total seconds, slowest
+            stats = self.timings.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = max(stats[2], elapsed)
+            for listener in self.listeners:
+                listener(name, elapsed, info)
+
+    def summary(self) -> str:
+        lines = [f"{'Phase':<28}{'Calls':>7}{'Total ms':>11}{'Max ms':>10}"]
+        for name, (count, total, slowest) in sorted(self.timings.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<28}{count:>7}{total * 1000:>11.2f}{slowest * 1000:>10.2f}")
+        return "\n".join(lines)
+
+    def dump(self, directory: str) -> List[str]:
+        """Write phase timings, and cProfile/tracemalloc output if enabled; returns the paths written."""
+        os.makedirs(directory, exist_ok=True)
+        prefix = os.path.join(directory, f"{self.label}-{time.strftime('%Y%m%d-%H%M%S')}")
+        paths = [f"{prefix}-phases.json"]
+        with open(paths[0], "w") as f:
+            json.dump({name: {"calls": count, "total_seconds": total, "max_seconds": slowest}
+                       for name, (count, total, slowest) in self.timings.items()}, f, indent=2)
+
+        if self._profile is not None:
+            paths.append(f"{prefix}.prof")
+            self._profile.dump_stats(paths[-1])
+            paths.append(f"{prefix}-cprofile.txt")
+            import pstats
+            text = io.StringIO()
+            pstats.Stats(self._profile, stream=text).sort_stats("cumulative").print_stats(40)
+            with open(paths[-1], "w") as f:
+                f.write(text.getvalue())
+
+        if self._tracemalloc is not None and self._tracemalloc.is_tracing():
+            paths.append(f"{prefix}-memory.txt")
+            top = self._tracemalloc.take_snapshot().statistics("lineno")[:40]
+            with open(paths[-1], "w") as f:
+                f.write("\n".join(str(stat) for stat in top) + "\n")
+        return paths
+
+    def close(self):
+        if self._owns_tracemalloc and self._tracemalloc.is_tracing():
+            self._tracemalloc.stop()
+        self._owns_tracemalloc = False
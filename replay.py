@@ -0,0 +1,107 @@
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+
+class ReplayMismatch(Exception):
+    pass
+
+
+class EventLog:
+    """Append-only record of everything that happened in one game.
+
+    Inputs ("start", "action", "timeout", "progress_to_night",
+    "progress_to_day") are what replay re-issues. "rng" events hold every
+    random draw as indices, and "roles" and "phase" events record the
+    outcomes a replay must match.
+    """
+
+    def __init__(self, events: Optional[Iterable[Dict[str, Any]]] = None):
+        self.events: List[Dict[str, Any]] = list(events or [])
+
+    def append(self, kind: str, **data) -> Dict[str, Any]:
+        event = {"seq": len(self.events), "kind": kind, **data}
+        self.events.append(event)
+        return event
+
+    def copy(self, length: Optional[int] = None) -> "EventLog":
+        return EventLog(self.events[:length])
+
+    def to_json(self) -> str:
+        return json.dumps(self.events)
+
+    @classmethod
+    def from_json(cls, data: str) -> "EventLog":
+        return cls(json.loads(data))
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def __iter__(self):
+        return iter(self.events)
+
+
+class RecordingRandom:
+    """Wraps an RNG and logs each draw as the indices it picked.
+
+    Draws are made through randrange/sample/shuffle on index ranges, which
+    consume the underlying generator exactly like choice/sample/shuffle on
+    the real sequence, so seeded runs give the same games with or without
+    recording.
+    """
+
+    def __init__(self, rng, log: EventLog):
+        self.rng = rng
+        self.log = log
+
+    def choice(self, seq: Sequence):
+        if not seq:
+            raise IndexError("Cannot choose from an empty sequence")
+        index = self.rng.randrange(len(seq))
+        self.log.append("rng", method="choice", size=len(seq), indices=[index])
+        return seq[index]
+
+    def sample(self, population: Sequence, k: int) -> List:
+        indices = self.rng.sample(range(len(population)), k)
+        self.log.append("rng", method="sample", size=len(population), indices=indices)
+        return [population[i] for i in indices]
+
+    def shuffle(self, x: List):
+        indices = list(range(len(x)))
+        self.rng.shuffle(indices)
+        self.log.append("rng", method="shuffle", size=len(x), indices=indices)
+        x[:] = [x[i] for i in indices]
+
+
+class ReplayRandom:
+    """Plays back the draws of a recorded game in order.
+
+    Draws are appended to log as they are replayed, so a faithful replay
+    rebuilds the original log event for event.
+    """
+
+    def __init__(self, events: Iterable[Dict[str, Any]], log: Optional[EventLog] = None):
+        self._draws = [event for event in events if event["kind"] == "rng"]
+        self._position = 0
+        self.log = log
+
+    def _next(self, method: str, size: int) -> List[int]:
+        if self._position >= len(self._draws):
+            raise ReplayMismatch(f"Replay asked for an extra {method} draw")
+        draw = self._draws[self._position]
+        if draw["method"] != method or draw["size"] != size:
+            raise ReplayMismatch(f"Draw {self._position} was {draw['method']} of {draw['size']}, "
+                                 f"replay asked for {method} of {size}")
+        self._position += 1
+        if self.log is not None:
+            self.log.append("rng", method=method, size=size, indices=draw["indices"])
+        return draw["indices"]
+
+    def choice(self, seq: Sequence):
+        return seq[self._next("choice", len(seq))[0]]
+
+    def sample(self, population: Sequence, k: int) -> List:
+        return [population[i] for i in self._next("sample", len(population))]
+
+    def shuffle(self, x: List):
+        indices = self._next("shuffle", len(x))
+        x[:] = [x[i] for i in indices]
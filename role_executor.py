@@ -1,13 +1,139 @@
+import importlib
 import random
-from typing import List, Dict, Any
+import sys
+from typing import Callable, List, Dict, Any, Optional, Set
 from roles import Player, Role, RoleType, Team, roles
+from alignment import AlignmentCounts
+
+def build_seat_index(players: List[Player]) -> Dict[str, int]:
+    # Seats never move and role swaps mutate the seated Player in place,
+    # so the index stays valid for the whole game. First seat wins on
+    # duplicate usernames, matching a front-to-back scan.
+    seat_index: Dict[str, int] = {}
+    for seat, player in enumerate(players):
+        seat_index.setdefault(player.username, seat)
+    return seat_index
+
+RoleHandler = Callable[["RoleExecutor", str, List[str]], str]
+
+# Role name -> handler, filled by the built-in handlers on first use and by
+# any plugin module that registers custom roles
+_ROLE_HANDLERS: Dict[str, RoleHandler] = {}
+
+# Roles that wake without choosing anything and are resolved automatically
+AUTOMATIC_ROLES: Set[str] = set()
+
+# Roles whose action result is private information for the player
+INFORMATION_ROLES: Set[str] = set()
+
+# Built-in role -> (RoleExecutor method, automatic, informs). Registered the
+# first time any handler is registered or looked up, not when this module is
+# imported, so processes that never resolve a night never build the table.
+_BUILTIN_HANDLERS = {
+    "Poisoner": ("poisoner_action", False, False),
+    "Imp": ("imp_action", False, False),
+    "Monk": ("monk_action", False, False),
+    "Fortune Teller": ("fortune_teller_action", False, True),
+    "Empath": ("empath_action", True, True),
+    "Washerwoman": ("washerwoman_action", True, True),
+    "Librarian": ("librarian_action", True, True),
+    "Investigator": ("investigator_action", True, True),
+    "Chef": ("chef_action", True, True),
+    "Undertaker": ("undertaker_action", True, True),
+    "Ravenkeeper": ("ravenkeeper_action", False, True),
+    "Butler": ("butler_action", False, False),
+    "Spy": ("spy_action", True, True),
+    "Scarlet Woman": ("scarlet_woman_action", False, False),
+    "Soldier": ("soldier_action", False, False),
+}
+_builtins_registered = False
+
+def _register_builtin_handlers():
+    global _builtins_registered
+    if _builtins_registered:
+        return
+    _builtins_registered = True
+    for role_name, (method_name, automatic, informs) in _BUILTIN_HANDLERS.items():
+        register_role_handler(role_name, automatic, informs)(getattr(RoleExecutor, method_name))
+
+def register_role_handler(role_name: str, automatic: bool = False, informs: bool = False,
+                          replace: bool = False) -> Callable[[RoleHandler], RoleHandler]:
+    """Decorator registering a night action handler for role_name.
+
+    Handlers are called as handler(executor, username, choices) and return the
+    result string. automatic handlers run without player input; informs marks
+    the result as private information to deliver to the player. Registering a
+    role twice, including a built-in one, is an error unless replace=True.
+    """
+    _register_builtin_handlers()
+    key = sys.intern(role_name)
+
+    def decorator(handler: RoleHandler) -> RoleHandler:
+        if key in _ROLE_HANDLERS and not replace:
+            raise ValueError(f"A handler is already registered for {role_name}")
+        _ROLE_HANDLERS[key] = handler
+        AUTOMATIC_ROLES.discard(key)
+        INFORMATION_ROLES.discard(key)
+        if automatic:
+            AUTOMATIC_ROLES.add(key)
+        if informs:
+            INFORMATION_ROLES.add(key)
+        return handler
+
+    return decorator
+
+def get_role_handler(role_name: str) -> Optional[RoleHandler]:
+    _register_builtin_handlers()
+    return _ROLE_HANDLERS.get(role_name)
+
+def registered_roles() -> List[str]:
+    _register_builtin_handlers()
+    return list(_ROLE_HANDLERS)
+
+def is_automatic_role(role_name: str) -> bool:
+    _register_builtin_handlers()
+    return role_name in AUTOMATIC_ROLES
+
+def is_information_role(role_name: str) -> bool:
+    _register_builtin_handlers()
+    return role_name in INFORMATION_ROLES
+
+def load_role_plugins(module_names: List[str]):
+    """Import plugin modules; each registers its roles and handlers on import."""
+    for module_name in module_names:
+        importlib.import_module(module_name)
 
 class RoleExecutor:
-    def __init__(self, players: List[Player]):
+    def __init__(self, players: List[Player], rng: Optional[random.Random] = None,
+                 seat_index: Optional[Dict[str, int]] = None,
+                 counts: Optional[AlignmentCounts] = None):
         self.players = players
+        self._random = rng if rng is not None else random
+        self.seat_index = seat_index if seat_index is not None else build_seat_index(players)
+        self.counts = counts
+        self.roles_changed = False
 
     def get_player_by_name(self, username: str) -> Player:
-        return next(p for p in self.players if p.username == username)
+        return self.players[self.seat_index[username]]
+
+    # All deaths, resurrections and role swaps go through these two helpers
+    # so the game's AlignmentCounts stay in step
+    def _set_alive(self, player: Player, alive: bool):
+        if player.is_alive == alive:
+            return
+        player.is_alive = alive
+        if self.counts is not None:
+            if alive:
+                self.counts.player_revived(player)
+            else:
+                self.counts.player_died(player)
+
+    def _set_role(self, player: Player, role: Optional[Role]):
+        old_role = player.role
+        player.role = role
+        self.roles_changed = True
+        if self.counts is not None:
+            self.counts.role_changed(player, old_role, role)
 
     def poisoner_action(self, username: str, choices: List[str]) -> str:
         if not choices:
@@ -25,11 +151,11 @@ class RoleExecutor:
         target_name = choices[0]
 
         if target_name == username:
-            player.is_alive = False
+            self._set_alive(player, False)
             minions = [p for p in self.players if p.role and p.role.role_type == RoleType.MINION and p.is_alive]
             if minions:
-                new_imp = random.choice(minions)
-                new_imp.role = roles["imp"]
+                new_imp = self._random.choice(minions)
+                self._set_role(new_imp, roles["Imp"])
                 return f"{username} kills themselves, {new_imp.username} becomes the new Imp"
             return f"{username} kills themselves"
         else:
@@ -38,7 +164,7 @@ class RoleExecutor:
             if target.role and target.role.name == "Soldier" and not target.is_poisoned:
                 return f"{target_name} is safe (Soldier cannot be killed by Demon)"
             
-            target.is_alive = False
+            self._set_alive(target, False)
             return f"{target_name} is killed"
 
     def monk_action(self, username: str, choices: List[str]) -> str:
@@ -52,20 +178,18 @@ class RoleExecutor:
             other_players = [p for p in self.players if p != player and p.is_alive]
             if len(other_players) < 2:
                 return "Not enough players to read"
-            chosen_players = random.sample(other_players, 2)
+            chosen_players = self._random.sample(other_players, 2)
             choices = [p.username for p in chosen_players]
         else:
             chosen_players = [self.get_player_by_name(name) for name in choices[:2]]
 
-        has_demon = any(p.role and p.role.role_type == RoleType.DEMON for p in chosen_players)
-        if has_demon:
+        if any(p.role and p.role.role_type == RoleType.DEMON for p in chosen_players):
             return f"YES - one of {choices[0]} or {choices[1]} is a Demon"
         else:
             return f"NO - neither {choices[0]} nor {choices[1]} is a Demon"
 
     def empath_action(self, username: str, choices: List[str]) -> str:
-        player = self.get_player_by_name(username)
-        player_index = self.players.index(player)
+        player_index = self.seat_index[username]
         left = self.players[(player_index - 1) % len(self.players)]
         right = self.players[(player_index + 1) % len(self.players)]
 
@@ -79,13 +203,13 @@ class RoleExecutor:
         if not townsfolk:
             return "No townsfolk to show"
 
-        correct = random.choice(townsfolk)
+        correct = self._random.choice(townsfolk)
         others = [p for p in self.players if p != player and p != correct]
 
         if others:
-            other = random.choice(others)
+            other = self._random.choice(others)
             pair = [correct, other]
-            random.shuffle(pair)
+            self._random.shuffle(pair)
             return f"Player [{pair[0].username}] or [{pair[1].username}] is the {correct.role.name}"
         else:
             return f"{correct.username} is the {correct.role.name}"
@@ -97,13 +221,13 @@ class RoleExecutor:
         if not outsiders:
             return "No outsiders to show"
 
-        correct = random.choice(outsiders)
+        correct = self._random.choice(outsiders)
         others = [p for p in self.players if p != player and p != correct]
 
         if others:
-            other = random.choice(others)
+            other = self._random.choice(others)
             pair = [correct, other]
-            random.shuffle(pair)
+            self._random.shuffle(pair)
             return f"Player [{pair[0].username}] or [{pair[1].username}] is the {correct.role.name}"
         else:
             return f"{correct.username} is the {correct.role.name}"
@@ -115,13 +239,13 @@ class RoleExecutor:
         if not minions:
             return "No minions to show"
 
-        correct = random.choice(minions)
+        correct = self._random.choice(minions)
         others = [p for p in self.players if p != player and p != correct]
 
         if others:
-            other = random.choice(others)
+            other = self._random.choice(others)
             pair = [correct, other]
-            random.shuffle(pair)
+            self._random.shuffle(pair)
             return f"Player [{pair[0].username}] or [{pair[1].username}] is the {correct.role.name}"
         else:
             return f"{correct.username} is the {correct.role.name}"
@@ -172,25 +296,7 @@ class RoleExecutor:
     
 
     def execute_role_action(self, role_name: str, username: str, choices: List[str]) -> str:
-        role_methods = {
-            "Poisoner": self.poisoner_action,
-            "Imp": self.imp_action,
-            "Monk": self.monk_action,
-            "Fortune Teller": self.fortune_teller_action,
-            "Empath": self.empath_action,
-            "Washerwoman": self.washerwoman_action,
-            "Librarian": self.librarian_action,
-            "Investigator": self.investigator_action,
-            "Chef": self.chef_action,
-            "Undertaker": self.undertaker_action,
-            "Ravenkeeper": self.ravenkeeper_action,
-            "Butler": self.butler_action,
-            "Spy": self.spy_action,
-            "Scarlet Woman": self.scarlet_woman_action,
-            "Soldier": self.soldier_action
-        }
-
-        if role_name in role_methods:
-            return role_methods[role_name](username, choices)
-        else:
-            return f"{role_name} action not implemented"
\ No newline at end of file
+        handler = get_role_handler(role_name)
+        if handler is None:
+            return f"{role_name} action not implemented"
+        return handler(self, username, choices)
@@ -1,3 +1,4 @@
+import sys
 from enum import Enum
 from typing import Optional
 from dataclasses import dataclass
@@ -18,7 +19,7 @@ class RoleType(Enum):
     MINION = "minion"
     DEMON = "demon"
 
-@dataclass
+@dataclass(slots=True)
 class Role:
     name: str
     role_type: RoleType
@@ -27,7 +28,11 @@ class Role:
     night_order: Optional[int] = None
     first_night_order: Optional[int] = None
 
-@dataclass
+    def __post_init__(self):
+        # Interned so handler and table lookups by name compare by identity
+        self.name = sys.intern(self.name)
+
+@dataclass(slots=True)
 class Player:
     username: str
     role: Optional[Role] = None
@@ -40,30 +45,31 @@ roles = {
             # Townsfolk
             "Washerwoman": Role("Washerwoman", RoleType.TOWNSFOLK, Team.GOOD,
                                "You start knowing that 1 of 2 players is a particular Townsfolk.",
-                               first_night_order=1),
+                               first_night_order=2),
             "Librarian": Role("Librarian", RoleType.TOWNSFOLK, Team.GOOD,
                              "You start knowing that 1 of 2 players is a particular Outsider.",
-                             first_night_order=2),
+                             first_night_order=3),
             "Investigator": Role("Investigator", RoleType.TOWNSFOLK, Team.GOOD,
                                 "You start knowing that 1 of 2 players is a particular Minion.",
-                                first_night_order=3),
+                                first_night_order=4),
             "Chef": Role("Chef", RoleType.TOWNSFOLK, Team.GOOD,
                         "You start knowing how many pairs of evil players are sitting next to each other.",
-                        first_night_order=4),
+                        first_night_order=5),
             "Empath": Role("Empath", RoleType.TOWNSFOLK, Team.GOOD,
                           "Each night, you learn how many of your 2 alive neighbors are evil.",
-                          night_order=1),
+                          night_order=6, first_night_order=6),
             "Fortune Teller": Role("Fortune Teller", RoleType.TOWNSFOLK, Team.GOOD,
                                   "Each night, choose 2 players: you learn if either is a Demon.",
-                                  night_order=2),
+                                  night_order=7, first_night_order=7),
             "Undertaker": Role("Undertaker", RoleType.TOWNSFOLK, Team.GOOD,
                               "Each night*, you learn which character died by execution today.",
-                              night_order=3),
+                              night_order=8, first_night_order=8),
             "Monk": Role("Monk", RoleType.TOWNSFOLK, Team.GOOD,
                         "Each night*, choose a player (not yourself): they are safe from the Demon tonight.",
-                        night_order=4),
+                        night_order=2),
             "Ravenkeeper": Role("Ravenkeeper", RoleType.TOWNSFOLK, Team.GOOD,
-                               "If you die at night, you are woken to choose a player: you learn their character."),
+                               "If you die at night, you are woken to choose a player: you learn their character.",
+                               night_order=5),
             "Virgin": Role("Virgin", RoleType.TOWNSFOLK, Team.GOOD,
                           "The 1st time you are nominated, if the nominator is a Townsfolk, they are executed immediately."),
             "Slayer": Role("Slayer", RoleType.TOWNSFOLK, Team.GOOD,
@@ -82,17 +88,25 @@ roles = {
                          "You do not know you are the Drunk. You think you are a Townsfolk character, but you are not."),
             "Poisoner": Role("Poisoner", RoleType.MINION, Team.EVIL,
                             "Each night, choose a player: they are poisoned tonight and tomorrow day.",
-                            night_order=5),
+                            night_order=1, first_night_order=1),
             "Spy": Role("Spy", RoleType.MINION, Team.EVIL,
                        "Each night, you see the Grimoire. You might register as good & as a Townsfolk or Outsider, even when dead.",
-                       night_order=6),
+                       night_order=9, first_night_order=9),
             "Scarlet Woman": Role("Scarlet Woman", RoleType.MINION, Team.EVIL,
-                                 "If there are 5 or more players alive & the Demon dies, you become the Demon."),
+                                 "If there are 5 or more players alive & the Demon dies, you become the Demon.",
+                                 night_order=3),
             "Baron": Role("Baron", RoleType.MINION, Team.EVIL,
                          "There are extra Outsiders in play."),
 
             # Demons
             "Imp": Role("Imp", RoleType.DEMON, Team.EVIL,
                        "Each night*, choose a player: they die. If you kill yourself this way, a Minion becomes the Imp.",
-                       night_order=7),
-        }
\ No newline at end of file
+                       night_order=4),
+        }
+
+def register_role(role: Role) -> Role:
+    """Add a custom role (e.g. from a plugin script) to the role table."""
+    if role.name in roles:
+        raise ValueError(f"Role {role.name} already exists")
+    roles[role.name] = role
+    return role
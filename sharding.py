@@ -0,0 +1,82 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from game_store import WriteBehindStore
+from game_logging import log_event
+
+shard_log = logging.getLogger("clocktower.sharding")
+
+
+def shard_for_guild(guild_id: int, shard_count: int) -> int:
+    """Discord's shard assignment: (guild_id >> 22) % shard_count. DMs always arrive on shard 0."""
+    return (guild_id >> 22) % shard_count
+
+
+class ShardPlan:
+    """Which bot process runs which gateway shards; shards are dealt round-robin."""
+
+    def __init__(self, shard_count: int, process_count: int):
+        if process_count < 1 or shard_count < process_count:
+            raise ValueError(f"Cannot spread {shard_count} shards over {process_count} processes")
+        self.shard_count = shard_count
+        self.process_count = process_count
+
+    def shards_for_process(self, process_index: int) -> List[int]:
+        return list(range(process_index, self.shard_count, self.process_count))
+
+    def process_for_shard(self, shard_id: int) -> int:
+        return shard_id % self.process_count
+
+    def process_for_guild(self, guild_id: int) -> int:
+        return self.process_for_shard(shard_for_guild(guild_id, self.shard_count))
+
+
+class ShardRouter:
+    """Routes work for a guild to the bot process that owns it.
+
+    Guild state lives in the shared store, so any process can find which
+    guild a member plays in. Messages for a guild another process owns,
+    such as DM actions that arrive on shard 0, are relayed through the
+    store and picked up by the owner's poll loop.
+    """
+
+    def __init__(self, plan: ShardPlan, process_index: int, store: WriteBehindStore, poll_interval: float = 0.25):
+        self.plan = plan
+        self.process_index = process_index
+        self.store = store
+        self.poll_interval = poll_interval
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def shard_ids(self) -> List[int]:
+        return self.plan.shards_for_process(self.process_index)
+
+    def owns(self, guild_id: int) -> bool:
+        return self.plan.process_for_guild(guild_id) == self.process_index
+
+    async def relay(self, guild_id: int, payload: Dict):
+        await self.store.push_relay(self.plan.process_for_guild(guild_id), {"guild_id": guild_id, **payload})
+
+    def start(self, handler: Callable[[Dict], Awaitable[Any]]):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._poll_loop(handler))
+
+    async def poll(self, handler: Callable[[Dict], Awaitable[Any]]) -> int:
+        payloads = await self.store.take_relays(self.process_index)
+        for payload in payloads:
+            try:
+                await handler(payload)
+            except Exception as e:
+                log_event(shard_log, logging.ERROR, "relay_failed", guild=payload.get('guild_id'), error=str(e))
+        return len(payloads)
+
+    async def _poll_loop(self, handler: Callable[[Dict], Awaitable[Any]]):
+        while True:
+            await self.poll(handler)
+            await asyncio.sleep(self.poll_interval)
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
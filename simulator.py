@@ -0,0 +1,223 @@
+import argparse
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from clocktower_game import ClocktowerGame
+from game_scripts import DEFAULT_SCRIPT, get_script
+from roles import GamePhase, Player
+
+
+class RandomAgent:
+    """Bot agent that picks legal night targets uniformly at random.
+
+    Targets follow the same rules the Discord bot enforces in handle_action_dm:
+    only living players other than the actor, no duplicates, two targets for
+    the Fortune Teller and one for everyone else.
+    """
+
+    def __init__(self, rng: random.Random):
+        self._random = rng
+
+    def choose_targets(self, game: ClocktowerGame, player: Player) -> List[str]:
+        candidates = [p.username for p in game.players if p.is_alive and p.username != player.username]
+        count = 2 if player.role.name == "Fortune Teller" else 1
+        return self._random.sample(candidates, min(count, len(candidates)))
+
+
+@dataclass(slots=True)
+class SimulationStats:
+    games: int = 0
+    good_wins: int = 0
+    evil_wins: int = 0
+    unfinished: int = 0
+    total_nights: int = 0
+
+    def record(self, outcome: Dict):
+        self.games += 1
+        self.total_nights += outcome["nights"]
+        if outcome["winner"] == "good":
+            self.good_wins += 1
+        elif outcome["winner"] == "evil":
+            self.evil_wins += 1
+        else:
+            self.unfinished += 1
+
+    def merge(self, other: "SimulationStats"):
+        self.games += other.games
+        self.good_wins += other.good_wins
+        self.evil_wins += other.evil_wins
+        self.unfinished += other.unfinished
+        self.total_nights += other.total_nights
+
+    @property
+    def good_win_rate(self) -> float:
+        return self.good_wins / self.games if self.games else 0.0
+
+    @property
+    def evil_win_rate(self) -> float:
+        return self.evil_wins / self.games if self.games else 0.0
+
+    @property
+    def average_nights(self) -> float:
+        return self.total_nights / self.games if self.games else 0.0
+
+
+class GameSimulator:
+    """Plays complete ClocktowerGame instances headlessly with bot agents.
+
+    Every game gets its own random.Random seeded from its shard's seed, so a
+    run is reproducible and any single game can be replayed from its seed.
+    """
+
+    def __init__(self, script: str = DEFAULT_SCRIPT,
+                 agent_factory: Callable[[random.Random], RandomAgent] = RandomAgent,
+                 max_nights: int = 20):
+        self.script = script
+        self.agent_factory = agent_factory
+        self.max_nights = max_nights
+        self._usernames: Dict[int, List[str]] = {}
+
+    def _get_usernames(self, player_count: int) -> List[str]:
+        if player_count not in self._usernames:
+            self._usernames[player_count] = [f"Player{i + 1}" for i in range(player_count)]
+        return self._usernames[player_count]
+
+    def play_game(self, player_count: int, seed: int) -> Dict:
+        rng = random.Random(seed)
+        agent = self.agent_factory(rng)
+        game = ClocktowerGame(rng=rng, verbose=False, script=get_script(self.script))
+
+        result = game.start_game(list(self._get_usernames(player_count)))
+        if "error" in result:
+            raise ValueError(result["error"])
+
+        while game.phase != GamePhase.ENDED and game.night_count <= self.max_nights:
+            if game.phase == GamePhase.NIGHT:
+                for username in game.action_collector.get_collection_status()["pending_players"]:
+                    player = game.get_player(username)
+                    game.submit_night_action(username, agent.choose_targets(game, player))
+            elif game.phase == GamePhase.DAY:
+                if game.night_count == self.max_nights:
+                    break
+                game.progress_to_night()
+
+        winner = game.game_result["winner"] if game.game_result else None
+        return {"winner": winner, "nights": game.night_count, "player_count": player_count, "seed": seed}
+
+    def plan_shards(self, player_counts: Iterable[int], games_per_count: int, seed: int = 0,
+                    shard_size: int = 1000) -> List[Tuple[int, int, int]]:
+        """Split a run into (player_count, game_count, shard_seed) work units.
+
+        The plan depends only on the arguments, never on how many workers
+        execute it, so serial and parallel runs produce identical reports.
+        """
+        seeds = random.Random(seed)
+        shards = []
+        for player_count in player_counts:
+            remaining = games_per_count
+            while remaining > 0:
+                game_count = min(shard_size, remaining)
+                shards.append((player_count, game_count, seeds.getrandbits(64)))
+                remaining -= game_count
+        return shards
+
+    def run_shard(self, shard: Tuple[int, int, int]) -> Tuple[Tuple[str, int], SimulationStats]:
+        player_count, game_count, shard_seed = shard
+        seeds = random.Random(shard_seed)
+        stats = SimulationStats()
+        for _ in range(game_count):
+            stats.record(self.play_game(player_count, seeds.getrandbits(64)))
+        return (self.script, player_count), stats
+
+    def run(self, player_counts: Iterable[int], games_per_count: int, seed: int = 0,
+            shard_size: int = 1000) -> Dict[Tuple[str, int], SimulationStats]:
+        shards = self.plan_shards(player_counts, games_per_count, seed, shard_size)
+        return merge_shard_results(self.run_shard(shard) for shard in shards)
+
+    def run_parallel(self, player_counts: Iterable[int], games_per_count: int, seed: int = 0,
+                     workers: Optional[int] = None,
+                     shard_size: int = 1000) -> Dict[Tuple[str, int], SimulationStats]:
+        """Run shards across a process pool, one seeded RNG per shard.
+
+        Results are merged in plan order, so the report is identical to
+        run() with the same seed regardless of the worker count.
+        """
+        shards = self.plan_shards(player_counts, games_per_count, seed, shard_size)
+        workers = min(workers or os.cpu_count() or 1, len(shards) or 1)
+        if workers == 1:
+            return merge_shard_results(self.run_shard(shard) for shard in shards)
+
+        # Loaded here so a single-process run and the workers' own import of this module skip it
+        import multiprocessing
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(self,)) as pool:
+            return merge_shard_results(pool.imap(_run_worker_shard, shards))
+
+
+_worker_simulator: Optional[GameSimulator] = None
+
+
+def _init_worker(simulator: GameSimulator):
+    global _worker_simulator
+    _worker_simulator = simulator
+
+
+def _run_worker_shard(shard: Tuple[int, int, int]) -> Tuple[Tuple[str, int], SimulationStats]:
+    return _worker_simulator.run_shard(shard)
+
+
+def merge_shard_results(results: Iterable[Tuple[Tuple[str, int], SimulationStats]]) -> Dict[Tuple[str, int], SimulationStats]:
+    report: Dict[Tuple[str, int], SimulationStats] = {}
+    for key, stats in results:
+        report.setdefault(key, SimulationStats()).merge(stats)
+    return report
+
+
+# Printed under every report so a 0% good win rate is not read as a balance result
+NIGHT_ONLY_NOTE = ("Night-phase outcomes only: the engine has no nominations or executions, "
+                   "so good wins only if every evil player dies at night.")
+
+
+def format_report(report: Dict[Tuple[str, int], SimulationStats]) -> str:
+    lines = [f"{'Script':<18}{'Players':>8}{'Games':>10}{'Good %':>9}{'Evil %':>9}{'Unfinished':>12}{'Avg nights':>12}"]
+    for (script, player_count), stats in sorted(report.items()):
+        lines.append(f"{script:<18}{player_count:>8}{stats.games:>10}"
+                     f"{stats.good_win_rate * 100:>8.1f}%{stats.evil_win_rate * 100:>8.1f}%"
+                     f"{stats.unfinished:>12}{stats.average_nights:>12.2f}")
+    lines.append(NIGHT_ONLY_NOTE)
+    return "\n".join(lines)
+
+
+def parse_player_counts(value: str) -> List[int]:
+    if "-" in value:
+        low, high = value.split("-", 1)
+        return list(range(int(low), int(high) + 1))
+    return [int(count) for count in value.split(",")]
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Run headless Clocktower simulations")
+    parser.add_argument("--games", type=int, default=1000, help="games per player count")
+    parser.add_argument("--players", default="5-15", help="player counts, e.g. 5-15 or 5,7,9")
+    parser.add_argument("--script", default=DEFAULT_SCRIPT, help="name of a script in scripts/")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-nights", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (0 = all cores)")
+    parser.add_argument("--shard-size", type=int, default=1000, help="games per work unit")
+    args = parser.parse_args(argv)
+
+    simulator = GameSimulator(args.script, max_nights=args.max_nights)
+    started = time.perf_counter()
+    report = simulator.run_parallel(parse_player_counts(args.players), args.games, args.seed,
+                                    workers=args.workers or None, shard_size=args.shard_size)
+    elapsed = time.perf_counter() - started
+
+    total_games = sum(stats.games for stats in report.values())
+    print(format_report(report))
+    print(f"\n{total_games} games in {elapsed:.2f}s ({total_games / elapsed * 3600:,.0f} games/hour)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,10 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from batch_engine import verify
+
+
+@pytest.mark.parametrize("player_count", range(5, 16))
+def test_batch_games_match_the_object_engine(player_count):
+    assert verify(player_count, games=25, seed=player_count) == []
@@ -0,0 +1,171 @@
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from clocktower_game import ClocktowerGame
+from role_executor import (RoleExecutor, get_role_handler, is_automatic_role, register_role_handler,
+                           registered_roles)
+from roles import RoleType, Team, roles
+
+FIXED_ROLES = {"Alice": "Imp", "Bob": "Poisoner", "Charlie": "Monk", "Diana": "Fortune Teller", "Eve": "Empath",
+               "Frank": "Chef", "Grace": "Washerwoman"}
+# Timings that differ between two runs of the same game
+TIMING_KEYS = ("last_night_seconds", "actions")
+
+
+def usernames(count):
+    return [f"player{i}" for i in range(count)]
+
+
+def started(hardcoded=FIXED_ROLES, seed=0):
+    game = ClocktowerGame(rng=random.Random(seed), verbose=False)
+    result = game.start_game(list(hardcoded), hardcoded)
+    assert "error" not in result
+    return game
+
+
+def targets_for(game, username):
+    candidates = [p.username for p in game.players if p.is_alive and p.username != username]
+    return candidates[:2 if game.get_player(username).role.name == "Fortune Teller" else 1]
+
+
+def submit_all(game):
+    result = {}
+    for username in list(game.action_collector.get_collection_status()["pending_players"]):
+        result = game.submit_night_action(username, targets_for(game, username))
+    return result
+
+
+@pytest.mark.parametrize("player_count", range(5, 16))
+def test_start_game_deals_every_seat(player_count):
+    game = ClocktowerGame(rng=random.Random(player_count), verbose=False)
+    result = game.start_game(usernames(player_count))
+
+    distribution = result["role_distribution"]
+    assert sum(distribution.values()) == player_count
+    assert distribution[RoleType.DEMON] == 1
+    assert all(player.role is not None for player in game.players)
+    assert len({player.role.name for player in game.players}) == player_count
+    assert game.seat_index == {username: seat for seat, username in enumerate(usernames(player_count))}
+    assert game.counts.alive == player_count
+    assert game.counts.alive_evil == sum(1 for p in game.players if p.role.team == Team.EVIL)
+
+
+@pytest.mark.parametrize("player_count", (4, 16))
+def test_start_game_rejects_table_size(player_count):
+    assert "error" in ClocktowerGame(verbose=False).start_game(usernames(player_count))
+
+
+def test_first_night_resolves_and_informs():
+    game = started()
+    assert game.phase.value == "night"
+    assert sorted(game.action_collector.get_collection_status()["pending_players"]) == ["Bob", "Diana"]
+
+    submit_all(game)
+    assert game.phase.value == "day" and game.day_count == 1
+    results = game.get_night_1_results()
+    assert set(results) >= {"Diana", "Eve", "Frank", "Grace"}
+    assert all(isinstance(result, str) for result in results.values())
+
+
+def test_night_waits_for_every_action():
+    game = started()
+    submit_all(game)
+    assert game.progress_to_night()["pending_actions"] == 4
+
+    result = game.submit_night_action("Alice", ["Frank"])
+    assert not result.get("collection_complete")
+    assert "error" in game.progress_to_day()
+
+    submit_all(game)
+    assert game.phase.value == "day"
+    assert game.night_count == 2 and game.day_count == 2
+    assert not game.get_player("Frank").is_alive
+    assert game.counts.alive == 6
+
+
+def test_missing_actions_are_filled_at_the_deadline():
+    game = started()
+    submit_all(game)
+    game.progress_to_night()
+    game.submit_night_action("Alice", ["Eve"])
+
+    result = game.resolve_missing_actions("skip")
+    assert "error" not in result
+    assert sorted(result["defaulted_players"]) == ["Bob", "Charlie", "Diana"]
+    assert game.phase.value == "day"
+    assert not game.get_player("Eve").is_alive
+
+
+def test_night_deadline_is_opt_in():
+    game = started()
+    assert game.action_collector.deadline is None
+
+    game = ClocktowerGame(rng=random.Random(0), verbose=False)
+    game.action_timeout = 60.0
+    game.start_game(list(FIXED_ROLES), FIXED_ROLES)
+    assert game.action_collector.deadline is not None
+
+
+def test_win_conditions_follow_alignment_counts():
+    game = started()
+    assert game.check_win_condition() is None
+
+    for player in game.players:
+        if player.role.team == Team.EVIL:
+            game.counts.player_died(player)
+    assert game.check_win_condition()["winner"] == "good"
+
+    game = started()
+    for username in ("Charlie", "Diana", "Eve"):
+        game.counts.player_died(game.get_player(username))
+    assert game.check_win_condition()["winner"] == "evil"
+
+
+def test_snapshot_round_trip_continues_identically():
+    game = started(seed=7)
+    submit_all(game)
+    game.progress_to_night()
+    game.submit_night_action("Alice", ["Charlie"])
+
+    copy = ClocktowerGame.from_snapshot(game.snapshot())
+    assert copy.snapshot() == game.snapshot()
+    assert copy.seat_index == game.seat_index
+
+    submit_all(game)
+    submit_all(copy)
+    assert copy.phase.value == "day"
+    assert ({key: value for key, value in copy.snapshot().items() if key not in TIMING_KEYS}
+            == {key: value for key, value in game.snapshot().items() if key not in TIMING_KEYS})
+
+
+@pytest.mark.parametrize("role_name", [name for name in registered_roles() if name in roles])
+def test_every_handler_returns_text(role_name):
+    table = [role_name] + [name for name in ("Imp", "Poisoner", "Monk", "Empath", "Chef", "Butler")
+                           if name != role_name][:4]
+    game = started(dict(zip(usernames(5), table)))
+    executor = RoleExecutor(game.players, random.Random(0), game.seat_index, game.counts)
+    choices = [] if is_automatic_role(role_name) else ["player1", "player2"] if role_name == "Fortune Teller" else ["player1"]
+
+    assert isinstance(get_role_handler(role_name)(executor, "player0", choices), str)
+
+
+def test_unknown_role_is_reported_not_raised():
+    game = started()
+    executor = RoleExecutor(game.players, random.Random(0), game.seat_index, game.counts)
+    assert executor.execute_role_action("Nobody", "Alice", []) == "Nobody action not implemented"
+
+
+def test_engine_import_defers_logging_and_handlers():
+    code = ("import sys, clocktower_game, role_executor; assert 'logging' not in sys.modules; "
+            "assert not role_executor._ROLE_HANDLERS; "
+            "assert role_executor.is_automatic_role('Chef') and role_executor.get_role_handler('Imp')")
+    subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+
+
+def test_builtin_role_cannot_be_registered_twice():
+    with pytest.raises(ValueError):
+        register_role_handler("Imp")(lambda executor, username, choices: "")
@@ -0,0 +1,103 @@
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("discord")
+# Importing the bot opens its game store
+os.environ.setdefault("GAME_DB", ":memory:")
+
+import discord_bot
+from discord_bot import DiscordGameTransport
+
+
+class FakeChannel:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, content=None, embed=None):
+        self.sent.append(embed if embed is not None else content)
+
+
+class FakeClient:
+    def __init__(self, channel):
+        self.guild = SimpleNamespace(get_channel=lambda channel_id: channel if channel_id == 5 else None)
+
+    def get_guild(self, guild_id):
+        return self.guild if guild_id == 1 else None
+
+
+def session(test_mode=False):
+    return SimpleNamespace(guild_id=1, channel_id=5, test_mode=test_mode)
+
+
+def embed(title, description, color, *fields):
+    """What the bot sent before the service split, as Embed.to_dict() gives it."""
+    return {"type": "rich", "title": title, "description": description, "color": color,
+            "fields": [{"name": name, "value": value, "inline": False} for name, value in fields]}
+
+
+def notify(monkeypatch, game_session, messages):
+    sent = []
+
+    async def send_dms_to_players(guild_id, dms):
+        sent.extend((username, dm.to_dict()) for username, dm in dms)
+        return []
+
+    monkeypatch.setattr(discord_bot, "send_dms_to_players", send_dms_to_players)
+    assert asyncio.run(DiscordGameTransport(None).notify(game_session, messages)) == []
+    return sent
+
+
+def test_night_prompts_match_the_old_bot(monkeypatch):
+    sent = notify(monkeypatch, session(), [
+        ("Diana", "night_prompt", {"role": "Fortune Teller", "targets": ["Alice", "Bob"]}),
+        ("Bob", "night_prompt", {"role": "Poisoner", "targets": ["Alice", "Diana"]}),
+    ])
+    assert sent == [
+        ("Diana", embed("🌙 Night Action Required", "**Fortune Teller**\nYou need to submit your night action!", 0x992d22,
+                        ("Action", "Choose 2 players to read"), ("Command", "!action player1 player2"),
+                        ("Available Players", "Alice, Bob"))),
+        ("Bob", embed("🌙 Night Action Required", "**Poisoner**\nYou need to submit your night action!", 0x992d22,
+                      ("Action", "Choose 1 player"), ("Command", "!action player_name"),
+                      ("Available Players", "Alice, Diana"))),
+    ]
+
+    sent = notify(monkeypatch, session(test_mode=True), [("Alice", "night_prompt", {"role": "Imp", "targets": ["Bob"]})])
+    assert sent[0][1]["fields"][1] == {"name": "Command", "value": "!action Alice player_name", "inline": False}
+
+
+def test_night_results_match_the_old_bot(monkeypatch):
+    sent = notify(monkeypatch, session(), [
+        ("Eve", "night_results", {"night": 1, "role": "Empath", "result": "You sense 1 evil neighbor(s)"}),
+        ("Eve", "night_results", {"night": 3, "role": "Empath", "result": "You sense 0 evil neighbor(s)"}),
+    ])
+    assert sent == [
+        ("Eve", embed("🌙 Night 1 Information", "**Empath**\nHere's what you learned during the first night:", 0x5865f2,
+                      ("Your Information", "You sense 1 evil neighbor(s)"),
+                      ("Remember", "Keep this information secret! Use it wisely during the day."))),
+        ("Eve", embed("🌙 Night 3 Information", "**Empath**\nHere's what you learned:", 0x5865f2,
+                      ("Your Information", "You sense 0 evil neighbor(s)"))),
+    ]
+
+
+def test_game_over_matches_the_old_bot():
+    channel = FakeChannel()
+    transport = DiscordGameTransport(FakeClient(channel))
+    roles = [["Alice", "Imp", "evil", True], ["Bob", "Poisoner", "evil", True], ["Charlie", "Monk", "good", False],
+             ["Diana", "Empath", "good", True]]
+    asyncio.run(transport.announce(session(), "game_over", winner="evil", reason="Evil equals or outnumbers good",
+                                   deaths=["Charlie"], roles=roles))
+    assert [message.to_dict() for message in channel.sent] == [
+        embed("🎯 GAME OVER!", "**EVIL TEAM WINS!**", 0xff0000,
+              ("Reason", "Evil equals or outnumbers good"), ("💀 Deaths", "Charlie"),
+              ("🎭 Final Roles", "✅ **Alice**: Imp (evil)\n✅ **Bob**: Poisoner (evil)\n"
+                                "💀 **Charlie**: Monk (good)\n✅ **Diana**: Empath (good)"))]
+
+    channel.sent.clear()
+    asyncio.run(transport.announce(session(), "game_over", winner="good", reason="The Demon is dead", deaths=[],
+                                   roles=roles[:1]))
+    assert channel.sent[0].to_dict() == embed("🎯 GAME OVER!", "**GOOD TEAM WINS!**", 0x00ff00,
+                                              ("Reason", "The Demon is dead"),
+                                              ("🎭 Final Roles", "✅ **Alice**: Imp (evil)"))
@@ -0,0 +1,38 @@
+import io
+import json
+import logging
+
+from game_logging import JsonFormatter, log_event
+
+
+def make_logger(level, stream):
+    log = logging.Logger("clocktower.test", level)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter())
+    log.addHandler(handler)
+    return log
+
+
+def test_disabled_level_builds_no_record(monkeypatch):
+    log = make_logger(logging.WARNING, io.StringIO())
+    built = []
+    make_record = log.makeRecord
+    monkeypatch.setattr(log, "makeRecord", lambda *args, **kwargs: built.append(args) or make_record(*args, **kwargs))
+
+    log_event(log, logging.DEBUG, "night_resolving", night=1)
+    assert built == []
+    log_event(log, logging.WARNING, "dm_failed", recipient=1)
+    assert len(built) == 1
+
+
+def test_json_formatter_emits_event_fields():
+    stream = io.StringIO()
+    log = make_logger(logging.INFO, stream)
+    log_event(log, logging.INFO, "night_resolved", night=2, deaths=["Frank"], guild=object())
+
+    entry = json.loads(stream.getvalue())
+    assert entry["event"] == "night_resolved"
+    assert entry["level"] == "info" and entry["logger"] == "clocktower.test"
+    assert entry["night"] == 2 and entry["deaths"] == ["Frank"]
+    # Values JSON cannot hold are written as their str()
+    assert entry["guild"].startswith("<object")
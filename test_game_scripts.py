@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from game_scripts import Script, get_script
+from roles import RoleType
+
+# Townsfolk, outsiders, minions and demons from the official Trouble Brewing setup sheet
+OFFICIAL = {5: (3, 0, 1, 1), 6: (3, 1, 1, 1), 7: (5, 0, 1, 1), 8: (5, 1, 1, 1), 9: (5, 2, 1, 1),
+            10: (7, 0, 2, 1), 11: (7, 1, 2, 1), 12: (7, 2, 2, 1), 13: (9, 0, 3, 1), 14: (9, 1, 3, 1),
+            15: (9, 2, 3, 1)}
+TYPES = (RoleType.TOWNSFOLK, RoleType.OUTSIDER, RoleType.MINION, RoleType.DEMON)
+# Trouble Brewing deals only three outsiders, so the Baron's +2 cannot be met where two are already dealt
+NO_BARON = (9, 12, 15)
+
+
+def definition(**changes):
+    base = {"name": "Test Script", "roles": ["Washerwoman", "Chef", "Empath", "Monk", "Saint", "Recluse",
+                                             "Poisoner", "Baron", "Imp"],
+            "distribution": {"5": {"townsfolk": 3, "outsider": 0, "minion": 1, "demon": 1}},
+            "modifiers": {"Baron": {"townsfolk": -2, "outsider": 2}}}
+    base.update(changes)
+    return base
+
+
+@pytest.mark.parametrize("player_count", sorted(OFFICIAL))
+def test_every_deal_matches_the_official_table(player_count):
+    script = get_script()
+    rng = random.Random(player_count)
+    barons = 0
+    for _ in range(200):
+        dealt = script.select_roles(rng, player_count)
+        assert len({role.name for role in dealt}) == player_count
+        assert all(role in script.roles for role in dealt)
+
+        townsfolk, outsiders, minions, demons = OFFICIAL[player_count]
+        if any(role.name == "Baron" for role in dealt):
+            barons += 1
+            townsfolk, outsiders = townsfolk - 2, outsiders + 2
+        assert tuple(sum(1 for role in dealt if role.role_type == role_type) for role_type in TYPES) == \
+            (townsfolk, outsiders, minions, demons)
+    assert (barons == 0) == (player_count in NO_BARON)
+
+
+def test_baron_is_left_out_where_two_more_outsiders_cannot_be_dealt():
+    script = get_script()
+    for player_count in OFFICIAL:
+        minions = [role.name for role in script.pools[player_count][RoleType.MINION]]
+        assert ("Baron" in minions) == (player_count not in NO_BARON)
+        assert script.distribution(player_count) == dict(zip(TYPES, OFFICIAL[player_count]))
+
+
+@pytest.mark.parametrize("changes,message", [
+    ({"modifiers": {"Spy": {"outsider": 1}}}, "modifier for Spy, which is not in the script"),
+    ({"modifiers": {"Baron": {"demon": 1}}}, "Baron can only modify types drawn after minion"),
+    ({"roles": ["Washerwoman", "Washerwoman", "Chef", "Saint", "Baron", "Imp"]}, "a role is listed twice"),
+    ({"roles": ["Washerwoman", "Juggler", "Chef", "Saint", "Baron", "Imp"]}, "unknown role Juggler"),
+    ({"distribution": {"5": {"townsfolk": 3, "outsider": 1, "minion": 1, "demon": 1}}},
+     "the 5-player setup deals 6 roles"),
+    ({"roles": ["Chef", "Empath", "Saint", "Poisoner", "Baron", "Imp"]}, "not enough roles for the 5-player setup"),
+], ids=["modifier-not-in-script", "modifier-on-earlier-type", "duplicate-role", "unknown-role",
+        "setup-miscounts-players", "too-few-roles"])
+def test_invalid_definition_fails_at_compile_time(changes, message):
+    assert Script.from_definition(definition()).pools[5][RoleType.MINION]
+    with pytest.raises(ValueError, match=message):
+        Script.from_definition(definition(**changes))
@@ -0,0 +1,91 @@
+import asyncio
+
+from game_service import GameService, GameTransport
+from night_resolver import NightResolver
+
+ROLES = {"Alice": "Imp", "Bob": "Poisoner", "Charlie": "Monk", "Diana": "Fortune Teller", "Eve": "Empath",
+         "Frank": "Chef", "Grace": "Washerwoman"}
+GAME_ID = 1
+
+
+class RecordingTransport(GameTransport):
+    def __init__(self, unreachable=()):
+        self.unreachable = set(unreachable)
+        self.announced = []
+        self.notified = []
+
+    async def announce(self, session, event, **fields):
+        self.announced.append((event, fields))
+
+    async def notify(self, session, messages):
+        self.notified.extend(messages)
+        return [username for username, _, _ in messages if username in self.unreachable]
+
+    def last(self, event):
+        return next(fields for name, fields in reversed(self.announced) if name == event)
+
+
+def test_players_are_told_their_roles_prompts_and_results():
+    async def scenario():
+        transport = RecordingTransport(unreachable={"Eve"})
+        service = GameService(transport, resolver=NightResolver("inline"), night_timeout=None)
+        service.start_game(GAME_ID, list(ROLES), list(range(len(ROLES))), ROLES)
+
+        assert await service.deal_roles(GAME_ID) == ["Eve"]
+        assert [(username, fields["role"]) for username, event, fields in transport.notified] == list(ROLES.items())
+
+        transport.notified.clear()
+        await service.prompt_night_actions(GAME_ID)
+        prompts = {username: fields for username, event, fields in transport.notified if event == "night_prompt"}
+        assert sorted(prompts) == ["Bob", "Diana"]
+        assert prompts["Bob"] == {"role": "Poisoner", "targets": [name for name in ROLES if name != "Bob"]}
+
+        transport.notified.clear()
+        await service.submit_action(GAME_ID, "Bob", ["Frank"])
+        result = await service.submit_action(GAME_ID, "Diana", ["Alice", "Eve"])
+        await service.finish_night(GAME_ID, result, "actions_complete")
+        results = {username: fields for username, event, fields in transport.notified if event == "night_results"}
+        assert {"Diana", "Eve", "Frank", "Grace"} <= set(results)
+        assert results["Diana"]["night"] == 1 and results["Diana"]["role"] == "Fortune Teller"
+        assert transport.last("results_undelivered") == {"night": 1, "usernames": ["Eve"]}
+        assert [event for event, _ in transport.announced] == ["actions_complete", "results_undelivered",
+                                                               "day_begins"]
+        await service.close()
+
+    asyncio.run(scenario())
+
+
+def test_day_reports_only_the_nights_deaths():
+    async def scenario():
+        transport = RecordingTransport()
+        # A deadline that has already passed by the time the last night is resolved by it
+        service = GameService(transport, resolver=NightResolver("inline"), night_timeout=0.01,
+                              night_timeout_policy="skip")
+
+        async def act(username, targets):
+            result = await service.submit_action(GAME_ID, username, targets)
+            assert "error" not in result
+            if result.get("collection_complete"):
+                await service.finish_night(GAME_ID, result, "actions_complete")
+
+        service.start_game(GAME_ID, list(ROLES), list(range(len(ROLES))), ROLES)
+        await act("Bob", ["Eve"])
+        await act("Diana", ["Alice", "Eve"])
+        assert transport.last("day_begins") == {"day": 1, "deaths": []}
+
+        await service.progress_to_night(GAME_ID)
+        await act("Alice", ["Frank"])
+        await act("Bob", ["Eve"])
+        await act("Charlie", ["Eve"])
+        await act("Diana", ["Alice", "Eve"])
+        assert transport.last("day_begins") == {"day": 2, "deaths": ["Frank"]}
+
+        await service.progress_to_night(GAME_ID)
+        await act("Alice", ["Grace"])
+        await asyncio.sleep(0.02)
+        await service.resolve_night_deadline(GAME_ID, 3)
+        assert transport.last("night_timeout")["missed"] == ["Bob", "Charlie", "Diana"]
+        assert transport.last("day_begins") == {"day": 3, "deaths": ["Grace"]}
+        await service.close()
+
+    asyncio.run(scenario())
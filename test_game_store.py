@@ -0,0 +1,107 @@
+import asyncio
+import threading
+
+import pytest
+
+from game_store import MemoryGameStore, SQLiteGameStore, WriteBehindStore
+
+
+def record(members, night=1):
+    return {"game": {"night_count": night}, "channel_id": 1, "test_mode": False,
+            "members": {str(member_id): name for member_id, name in members.items()}}
+
+
+class BlockingStore(MemoryGameStore):
+    """Holds save_guilds open until released, so a test can look inside a flush."""
+
+    def __init__(self):
+        super().__init__()
+        self.saving = threading.Event()
+        self.release = threading.Event()
+
+    def save_guilds(self, records):
+        self.saving.set()
+        self.release.wait(5)
+        super().save_guilds(records)
+
+
+@pytest.mark.parametrize("make_store", (MemoryGameStore, lambda: SQLiteGameStore(":memory:")),
+                         ids=("memory", "sqlite"))
+def test_backend_tracks_members_and_relays(make_store):
+    store = make_store()
+    store.save_guilds({1: record({10: "Alice", 11: "Bob"})})
+    # A member who leaves the game no longer resolves to its guild
+    store.save_guilds({1: record({10: "Alice"}, night=2)})
+    assert store.load_guild(1)["game"]["night_count"] == 2
+    assert store.find_guild_for_member(10) == 1
+    assert store.find_guild_for_member(11) is None
+
+    store.push_relay(0, {"n": 1})
+    store.push_relay(1, {"n": 2})
+    store.push_relay(0, {"n": 3})
+    assert store.take_relays(0) == [{"n": 1}, {"n": 3}]
+    assert store.take_relays(0) == []
+    assert store.take_relays(1) == [{"n": 2}]
+    store.close()
+
+
+def test_sqlite_store_round_trip():
+    store = SQLiteGameStore(":memory:")
+    store.save_guilds({1: record({10: "Alice"}), 2: record({20: "Bob"})})
+    assert store.load_guild(1) == record({10: "Alice"})
+    assert store.find_guild_for_member(20) == 2
+
+    store.save_guilds({2: None})
+    assert store.load_guild(2) is None
+    assert store.find_guild_for_member(20) is None
+    store.close()
+
+
+def test_write_behind_coalesces_to_latest_record():
+    async def scenario():
+        backend = MemoryGameStore()
+        store = WriteBehindStore(backend)
+        for night in range(1, 4):
+            store.mark_dirty(1, record({10: "Alice"}, night))
+        assert backend.load_guild(1) is None
+        await store.flush()
+        return backend.load_guild(1)
+
+    assert asyncio.run(scenario())["game"]["night_count"] == 3
+
+
+def test_in_flight_batch_stays_visible_until_committed():
+    async def scenario():
+        backend = BlockingStore()
+        MemoryGameStore.save_guilds(backend, {1: record({10: "Alice"}, night=1)})
+        store = WriteBehindStore(backend)
+        store.mark_dirty(1, record({10: "Alice"}, night=2))
+        store.mark_dirty(2, None)
+
+        flush = asyncio.create_task(store.flush())
+        await asyncio.to_thread(backend.saving.wait, 5)
+        # The batch has left _pending but the backend still holds the night 1 row
+        loaded = await store.load_guild(1)
+        member_guild = await store.find_guild_for_member(10)
+        backend.release.set()
+        await flush
+        return loaded, member_guild, backend.load_guild(1)
+
+    loaded, member_guild, committed = asyncio.run(scenario())
+    assert loaded["game"]["night_count"] == 2
+    assert member_guild == 1
+    assert committed["game"]["night_count"] == 2
+
+
+def test_failed_flush_keeps_newer_writes():
+    class FailingStore(MemoryGameStore):
+        def save_guilds(self, records):
+            raise OSError("disk full")
+
+    async def scenario():
+        store = WriteBehindStore(FailingStore())
+        store.mark_dirty(1, record({10: "Alice"}, night=1))
+        await store.flush()
+        return await store.load_guild(1)
+
+    assert asyncio.run(scenario())["game"]["night_count"] == 1
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from guild_actor import GuildActors
+
+
+def test_commands_for_one_guild_run_in_order():
+    async def scenario():
+        actors = GuildActors()
+        order = []
+
+        async def command(name, delay):
+            await asyncio.sleep(delay)
+            order.append(name)
+            return name
+
+        results = await asyncio.gather(actors.run(1, command, "slow", 0.02), actors.run(1, command, "fast", 0))
+        await actors.close()
+        return results, order
+
+    assert asyncio.run(scenario()) == (["slow", "fast"], ["slow", "fast"])
+
+
+def test_reentrant_run_does_not_deadlock():
+    async def scenario():
+        actors = GuildActors()
+
+        async def inner():
+            return "inner"
+
+        async def outer():
+            return await actors.run(1, inner)
+
+        result = await asyncio.wait_for(actors.run(1, outer), 1)
+        await actors.close()
+        return result
+
+    assert asyncio.run(scenario()) == "inner"
+
+
+def test_base_exception_fails_only_its_caller():
+    class Abort(BaseException):
+        pass
+
+    async def scenario():
+        actors = GuildActors()
+
+        async def crash():
+            raise Abort()
+
+        async def ok():
+            return "ok"
+
+        with pytest.raises(Abort):
+            await actors.run(1, crash)
+        result = await asyncio.wait_for(actors.run(1, ok), 1)
+        await actors.close()
+        return result
+
+    assert asyncio.run(scenario()) == "ok"
+
+
+def test_cancelled_error_from_a_command_keeps_the_actor_running():
+    async def scenario():
+        actors = GuildActors()
+
+        async def gives_up():
+            raise asyncio.CancelledError()
+
+        async def ok():
+            return "ok"
+
+        failed = asyncio.ensure_future(actors.run(1, gives_up))
+        result = await asyncio.wait_for(actors.run(1, ok), 1)
+        await asyncio.gather(failed, return_exceptions=True)
+        await actors.close()
+        return failed.cancelled(), result
+
+    assert asyncio.run(scenario()) == (True, "ok")
+
+
+def test_cancelled_actor_releases_queued_callers_and_is_replaced():
+    async def scenario():
+        actors = GuildActors()
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.sleep(10)
+
+        async def ok():
+            return "ok"
+
+        hung = asyncio.ensure_future(actors.run(1, hang))
+        queued = asyncio.ensure_future(actors.run(1, ok))
+        await started.wait()
+        actors.actors[1].task.cancel()
+        outcomes = await asyncio.wait_for(asyncio.gather(hung, queued, return_exceptions=True), 1)
+        result = await asyncio.wait_for(actors.run(1, ok), 1)
+        await actors.close()
+        return [type(outcome) for outcome in outcomes], result
+
+    outcomes, result = asyncio.run(scenario())
+    assert outcomes == [asyncio.CancelledError, asyncio.CancelledError]
+    assert result == "ok"
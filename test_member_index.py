@@ -0,0 +1,74 @@
+from member_index import GuildNameIndex, MemberNameIndex
+
+
+class FakeGuild:
+    def __init__(self, guild_id, members=()):
+        self.id = guild_id
+        self.members = list(members)
+
+    def get_member(self, member_id):
+        return next((member for member in self.members if member.id == member_id), None)
+
+
+class FakeMember:
+    def __init__(self, member_id, name, display_name=None, guild=None):
+        self.id = member_id
+        self.name = name
+        self.display_name = display_name or name
+        self.guild = guild
+
+    def __str__(self):
+        return self.name
+
+
+def test_first_holder_of_a_shared_name_wins():
+    first = FakeMember(1, "alice", "Storyteller")
+    second = FakeMember(2, "bob", "Storyteller")
+    index = GuildNameIndex([first, second])
+    assert index.get("Storyteller") is first
+
+    # An update re-inserts the second member without jumping the queue
+    index.add(FakeMember(2, "bobby", "Storyteller"))
+    assert index.get("Storyteller") is first
+    assert index.get("bob") is None and index.get("bobby").id == 2
+
+    index.remove(1)
+    assert index.get("Storyteller").id == 2
+    assert index.get("alice") is None
+    index.remove(2)
+    assert index.get("Storyteller") is None
+    assert len(index) == 0
+
+
+def test_user_renamed_rekeys_cached_guilds():
+    guild = FakeGuild(10)
+    member = FakeMember(1, "alice", guild=guild)
+    guild.members.append(member)
+    index = MemberNameIndex()
+    assert index.resolve(guild, "alice") is member
+
+    member.name = member.display_name = "alicia"
+    index.user_renamed(member, [guild, FakeGuild(11)])
+    assert index.resolve_many(guild, ["alice", "alicia"]) == {"alice": None, "alicia": member}
+
+
+def test_guilds_are_evicted_least_recently_used():
+    guilds = [FakeGuild(guild_id) for guild_id in range(3)]
+    for guild in guilds:
+        member = FakeMember(guild.id, "alice", guild=guild)
+        guild.members.append(member)
+
+    index = MemberNameIndex(max_guilds=2)
+    index.resolve(guilds[0], "alice")
+    index.resolve(guilds[1], "alice")
+    index.resolve(guilds[0], "alice")
+    index.resolve(guilds[2], "alice")
+    assert list(index._guilds) == [0, 2]
+
+    # Events for an evicted guild are ignored; its next lookup rebuilds from guild.members
+    late = FakeMember(99, "bob", guild=guilds[1])
+    index.member_joined(late)
+    assert 1 not in index._guilds
+    guilds[1].members.append(late)
+    assert index.resolve(guilds[1], "bob") is late
+    assert list(index._guilds) == [2, 1]
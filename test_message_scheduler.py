@@ -0,0 +1,126 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from message_scheduler import MessageScheduler, MessageTransport, PermanentSendError, RateLimited
+
+
+class FakeTransport(MessageTransport):
+    """Records sends and raises the failures queued for each recipient."""
+
+    def __init__(self, forbidden: Optional[Set[int]] = None,
+                 failures: Optional[Dict[int, List[Exception]]] = None):
+        self.forbidden = forbidden or set()
+        self.failures = failures or {}
+        self.attempts: Dict[int, int] = {}
+        self.sent: List[Tuple[int, List[Any], float]] = []
+
+    async def send(self, recipient_id: int, embeds: List[Any]):
+        self.attempts[recipient_id] = self.attempts.get(recipient_id, 0) + 1
+        if recipient_id in self.forbidden:
+            raise PermanentSendError(f"{recipient_id} does not accept DMs")
+        pending_failures = self.failures.get(recipient_id)
+        if pending_failures:
+            raise pending_failures.pop(0)
+        self.sent.append((recipient_id, list(embeds), time.monotonic()))
+
+
+def test_sends_in_flight_are_capped_and_routes_are_bounded():
+    class SlowTransport(FakeTransport):
+        def __init__(self):
+            super().__init__()
+            self.in_flight = self.peak = 0
+
+        async def send(self, recipient_id, embeds):
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            await asyncio.sleep(0.01)
+            self.in_flight -= 1
+            await super().send(recipient_id, embeds)
+
+    async def scenario():
+        transport = SlowTransport()
+        scheduler = MessageScheduler(transport, max_concurrency=3, max_routes=4)
+        results = await scheduler.send_many([(recipient_id, "role") for recipient_id in range(10)])
+        return results, transport.peak, list(scheduler._routes)
+
+    results, peak, routes = asyncio.run(scenario())
+    assert results == [True] * 10
+    assert peak == 3
+    # Only the most recently used route buckets are kept
+    assert routes == [6, 7, 8, 9]
+
+
+def test_route_bucket_paces_one_recipient():
+    async def scenario():
+        transport = FakeTransport()
+        scheduler = MessageScheduler(transport, route_rate=2, route_period=0.2)
+        started = time.monotonic()
+        for embed in range(4):
+            assert await scheduler.send(1, embed)
+        return [sent_at - started for _, _, sent_at in transport.sent]
+
+    offsets = asyncio.run(scenario())
+    # Two sends fit the bucket; each later one waits for a token at 10 per second
+    assert offsets[1] < 0.05
+    assert offsets[2] >= 0.09
+    assert offsets[3] >= 0.19
+
+
+def test_global_bucket_paces_all_recipients():
+    async def scenario():
+        transport = FakeTransport()
+        scheduler = MessageScheduler(transport, global_rate=3, global_period=0.3)
+        started = time.monotonic()
+        assert all(await scheduler.send_many([(recipient_id, "role") for recipient_id in range(6)]))
+        return max(sent_at for _, _, sent_at in transport.sent) - started
+
+    assert asyncio.run(scenario()) >= 0.29
+
+
+def test_repeated_dms_to_one_recipient_are_coalesced_in_order():
+    async def scenario():
+        transport = FakeTransport()
+        scheduler = MessageScheduler(transport, embeds_per_message=10)
+        messages = [(1, f"role{i}") for i in range(12)] + [(2, "prompt")]
+        results = await scheduler.send_many(messages)
+        return results, [(recipient_id, embeds) for recipient_id, embeds, _ in transport.sent]
+
+    results, sent = asyncio.run(scenario())
+    assert results == [True] * 13
+    assert sorted(sent) == [(1, [f"role{i}" for i in range(10)]), (1, ["role10", "role11"]), (2, ["prompt"])]
+
+
+def test_transient_failures_are_retried():
+    async def scenario():
+        transport = FakeTransport(failures={1: [ConnectionError("reset"), RateLimited(0.05)]})
+        scheduler = MessageScheduler(transport, max_retries=3, backoff=0.01)
+        started = time.monotonic()
+        delivered = await scheduler.send(1, "role")
+        return delivered, transport.attempts[1], time.monotonic() - started
+
+    delivered, attempts, elapsed = asyncio.run(scenario())
+    assert delivered
+    assert attempts == 3
+    # The 429 blocks the route for its retry_after
+    assert elapsed >= 0.05
+
+
+def test_gives_up_after_max_retries():
+    async def scenario():
+        transport = FakeTransport(failures={1: [ConnectionError("reset")] * 5})
+        scheduler = MessageScheduler(transport, max_retries=2, backoff=0.001)
+        return await scheduler.send_many([(1, "role"), (2, "role")]), transport.attempts
+
+    results, attempts = asyncio.run(scenario())
+    assert results == [False, True]
+    assert attempts[1] == 3
+
+
+def test_permanent_failures_are_not_retried():
+    async def scenario():
+        transport = FakeTransport(forbidden={1})
+        scheduler = MessageScheduler(transport, max_retries=3, backoff=0.001)
+        return await scheduler.send(1, "role"), transport.attempts[1]
+
+    assert asyncio.run(scenario()) == (False, 1)
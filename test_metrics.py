@@ -0,0 +1,49 @@
+import pytest
+
+from metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+
+def test_each_kind_keeps_its_own_series():
+    counter = Counter("clocktower_total", "Counted")
+    counter.inc(command="start", guild="1")
+    counter.inc(2, guild="1", command="start")
+    counter.inc(command="night")
+    assert counter.value(command="start", guild="1") == 3
+    assert counter.value(command="night") == 1
+    assert counter.value() == 0
+
+    games = [1, 2]
+    gauge = Gauge("clocktower_games", "Read at scrape time", lambda: len(games))
+    games.append(3)
+    assert gauge.samples() == ["clocktower_games 3"]
+
+    histogram = Histogram("clocktower_seconds", "Latency", buckets=(1.0, 0.1))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, phase="night")
+    assert histogram.summary(phase="night") == {"count": 4, "sum": pytest.approx(6.05)}
+    assert histogram.summary(phase="day") == {"count": 0, "sum": 0.0}
+    assert [line.rsplit(" ", 1)[1] for line in histogram.samples() if "_bucket" in line] == ["1", "3", "4"]
+
+
+def test_render_exposes_each_kind():
+    registry = MetricsRegistry()
+    registry.counter("clocktower_commands_total", "Commands run").inc(command="start")
+    registry.gauge("clocktower_games", "Games running", lambda: 3)
+    histogram = registry.histogram("clocktower_seconds", "Latency", buckets=(0.1, 1.0))
+    histogram.observe(0.5)
+
+    lines = registry.render().splitlines()
+    assert 'clocktower_commands_total{command="start"} 1' in lines
+    assert "clocktower_games 3" in lines
+    assert "# TYPE clocktower_seconds histogram" in lines
+    assert 'clocktower_seconds_bucket{le="0.1"} 0' in lines
+    assert 'clocktower_seconds_bucket{le="+Inf"} 1' in lines
+    assert "clocktower_seconds_count 1" in lines
+
+
+def test_registering_a_name_twice_returns_the_first_metric():
+    registry = MetricsRegistry()
+    counter = registry.counter("clocktower_total", "Once")
+    assert registry.counter("clocktower_total", "Twice") is counter
+    with pytest.raises(ValueError):
+        registry.gauge("clocktower_total", "Clash")
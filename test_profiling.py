@@ -0,0 +1,54 @@
+import os
+import random
+
+from clocktower_game import ClocktowerGame
+from profiling import GameProfiler
+
+ROLES = {"Alice": "Imp", "Bob": "Poisoner", "Charlie": "Monk", "Diana": "Fortune Teller", "Eve": "Empath",
+         "Frank": "Chef", "Grace": "Washerwoman"}
+# Night 2 choices, so both games play out the same way
+NIGHT_2 = {"Alice": ["Frank"], "Bob": ["Eve"], "Charlie": ["Eve"], "Diana": ["Alice", "Eve"]}
+
+
+def play_two_nights(game):
+    game.start_game(list(ROLES), ROLES)
+    game.submit_night_action("Bob", ["Eve"])
+    game.submit_night_action("Diana", ["Alice", "Eve"])
+    game.progress_to_night()
+    for username, targets in NIGHT_2.items():
+        game.submit_night_action(username, targets)
+    assert game.phase.value == "day" and game.day_count == 2
+
+
+def test_profiler_records_only_its_own_games_nights():
+    phases = []
+    profiler = GameProfiler("profiled", listeners=[lambda name, seconds, info: phases.append((name, info))])
+    profiled_game = ClocktowerGame(rng=random.Random(0), verbose=False)
+    profiled_game.profiler = profiler
+    play_two_nights(ClocktowerGame(rng=random.Random(0), verbose=False))
+    play_two_nights(profiled_game)
+    play_two_nights(ClocktowerGame(rng=random.Random(1), verbose=False))
+
+    assert profiler.timings["execute"][0] == 2
+    assert profiler.timings["progress_to_day"][0] == 2
+    assert profiler.timings["collect_night_actions"][0] == 2
+    assert profiler.timings["role_action[Imp]"][0] == 1
+    assert [info["night"] for name, info in phases if name == "execute"] == [1, 2]
+    assert ("role_action[Fortune Teller]", {"player": "Diana"}) in phases
+    assert "execute" in profiler.summary()
+
+
+def test_dump_writes_every_listed_file(tmp_path):
+    profiler = GameProfiler("dumped", cprofile=True, memory=True)
+    game = ClocktowerGame(rng=random.Random(0), verbose=False)
+    game.profiler = profiler
+    play_two_nights(game)
+
+    try:
+        paths = profiler.dump(str(tmp_path / "profiles"))
+    finally:
+        profiler.close()
+    suffixes = ("-phases.json", ".prof", "-cprofile.txt", "-memory.txt")
+    assert [suffix for path, suffix in zip(paths, suffixes) if path.endswith(suffix)] == list(suffixes)
+    assert all(os.path.getsize(path) > 0 for path in paths)
+    assert sorted(os.listdir(tmp_path / "profiles")) == sorted(os.path.basename(path) for path in paths)
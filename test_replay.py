@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from clocktower_game import ClocktowerGame
+from replay import EventLog, ReplayMismatch
+
+USERNAMES = ["Alice", "Bob", "Charlie", "Diana", "Eve", "Frank", "Grace", "Heidi"]
+# Timings that differ between two runs of the same game
+TIMING_KEYS = ("last_night_seconds", "actions")
+
+
+def recorded(seed):
+    game = ClocktowerGame(rng=random.Random(seed), verbose=False, event_log=EventLog())
+    assert "error" not in game.start_game(USERNAMES)
+    return game
+
+
+def submit_pending(game, chooser, count=None):
+    pending = sorted(game.action_collector.get_collection_status()["pending_players"])
+    for username in pending[:count]:
+        role = game.get_player(username).role.name
+        candidates = [p.username for p in game.players if p.is_alive and p.username != username]
+        game.submit_night_action(username, chooser.sample(candidates, 2 if role == "Fortune Teller" else 1))
+
+
+def play(game, chooser, nights):
+    submit_pending(game, chooser)
+    while game.game_result is None and game.night_count < nights:
+        game.progress_to_night()
+        submit_pending(game, chooser)
+    return game
+
+
+def without_timings(snapshot, *keys):
+    return {key: value for key, value in snapshot.items() if key not in TIMING_KEYS + keys}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_replay_rebuilds_the_recorded_log(seed):
+    game = play(recorded(seed), random.Random(seed), nights=4)
+    assert game.night_count > 1
+
+    replay = ClocktowerGame.from_event_log(EventLog.from_json(game.event_log.to_json()))
+    assert replay.event_log.events == game.event_log.events
+    # A replay draws from the log, so it has no generator state of its own
+    assert without_timings(replay.snapshot(), "rng_state") == without_timings(game.snapshot(), "rng_state")
+
+
+def test_tampered_log_raises_replay_mismatch():
+    game = play(recorded(3), random.Random(3), nights=3)
+
+    log = EventLog.from_json(game.event_log.to_json())
+    dealt = next(event for event in log if event["kind"] == "roles")
+    dealt["roles"]["Alice"], dealt["roles"]["Bob"] = dealt["roles"]["Bob"], dealt["roles"]["Alice"]
+    with pytest.raises(ReplayMismatch):
+        ClocktowerGame.from_event_log(log)
+
+    log = EventLog.from_json(game.event_log.to_json())
+    draw = next(event for event in log if event["kind"] == "rng")
+    draw["size"] += 1
+    with pytest.raises(ReplayMismatch):
+        ClocktowerGame.from_event_log(log)
+
+
+def test_fork_mid_night_matches_the_original():
+    game = recorded(11)
+    chooser = random.Random(11)
+    submit_pending(game, chooser)
+    game.progress_to_night()
+    submit_pending(game, chooser, count=1)
+    assert game.phase.value == "night"
+
+    fork = game.fork()
+    assert fork.event_log is not game.event_log
+    state = chooser.getstate()
+    submit_pending(game, chooser)
+    chooser.setstate(state)
+    submit_pending(fork, chooser)
+
+    assert fork.phase.value == "day"
+    assert without_timings(fork.snapshot()) == without_timings(game.snapshot())
+    assert fork.event_log.events == game.event_log.events
@@ -0,0 +1,154 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import pytest
+
+from game_service import GameService, GameTransport
+from game_store import MemoryGameStore, WriteBehindStore
+from night_resolver import NightResolver
+from sharding import ShardPlan, ShardRouter, shard_for_guild
+
+# Fixed roles, so night 2 waits on exactly the Imp and the Monk
+HARDCODED_ROLES = {"Alice": "Imp", "Bob": "Monk", "Carol": "Chef", "Dave": "Empath", "Eve": "Recluse"}
+USERNAMES = list(HARDCODED_ROLES)
+MEMBER_IDS = [101, 102, 103, 104, 105]
+
+
+class FakeGateway:
+    """In-process stand-in for Discord's gateway: guild events go to the process
+    holding the guild's shard, DMs to whoever holds shard 0."""
+
+    def __init__(self, shard_count: int):
+        self.shard_count = shard_count
+        self._handlers: Dict[int, Callable[[Any], Awaitable[Any]]] = {}
+
+    def connect(self, shard_ids: List[int], handler: Callable[[Any], Awaitable[Any]]):
+        for shard_id in shard_ids:
+            if shard_id in self._handlers:
+                raise ValueError(f"Shard {shard_id} is already connected")
+            self._handlers[shard_id] = handler
+
+    async def dispatch(self, guild_id: Optional[int], event: Any) -> Any:
+        shard_id = 0 if guild_id is None else shard_for_guild(guild_id, self.shard_count)
+        return await self._handlers[shard_id](event)
+
+
+class NullTransport(GameTransport):
+    async def announce(self, session, event, **fields):
+        pass
+
+    async def notify(self, session, messages):
+        return []
+
+
+class Process:
+    """One bot process: its own service and write-behind store over the shared backend."""
+
+    def __init__(self, backend: MemoryGameStore, plan: ShardPlan, index: int):
+        self.service = GameService(NullTransport(), WriteBehindStore(backend), NightResolver("inline"),
+                                   night_timeout=None)
+        self.router = ShardRouter(plan, index, self.service.store)
+        self.handled: List[Dict] = []
+
+    async def on_event(self, event: Dict) -> Dict:
+        self.handled.append(event)
+        return await self.service.run(event["guild_id"], self.submit, event)
+
+    async def submit(self, event: Dict) -> Dict:
+        await self.service.ensure_loaded(event["guild_id"])
+        return await self.service.submit_action(event["guild_id"], event["username"], event["targets"])
+
+    async def on_dm(self, event: Dict):
+        guild_id = await self.service.store.find_guild_for_member(event["member_id"])
+        if not self.router.owns(guild_id):
+            await self.router.relay(guild_id, event)
+            return None
+        return await self.on_event({"guild_id": guild_id, **event})
+
+
+def guild_on_shard(shard_id: int, shard_count: int) -> int:
+    guild_id = shard_id << 22
+    assert shard_for_guild(guild_id, shard_count) == shard_id
+    return guild_id
+
+
+async def start_game(process: Process, guild_id: int):
+    async def setup():
+        await process.service.ensure_loaded(guild_id)
+        process.service.start_game(guild_id, USERNAMES, MEMBER_IDS, HARDCODED_ROLES)
+        return await process.service.progress_to_night(guild_id)
+
+    result = await process.service.run(guild_id, setup)
+    assert result["pending_actions"] == 2
+
+
+def test_plan_change_moves_guild_through_the_store():
+    async def scenario():
+        backend = MemoryGameStore()
+        old_plan, new_plan = ShardPlan(4, 2), ShardPlan(4, 1)
+        guild_id = guild_on_shard(1, 4)
+        old_owner = Process(backend, old_plan, 1)
+        assert old_owner.router.owns(guild_id)
+
+        await start_game(old_owner, guild_id)
+        gateway = FakeGateway(4)
+        gateway.connect(old_owner.router.shard_ids, old_owner.on_event)
+        result = await gateway.dispatch(guild_id, {"guild_id": guild_id, "username": "Bob", "targets": ["Carol"]})
+        assert "error" not in result and not result.get("collection_complete")
+        before = old_owner.service.record(guild_id)
+
+        # The old owner stops for the new plan: its game is flushed and forgotten
+        assert not ShardRouter(new_plan, 1, old_owner.service.store).owns(guild_id)
+        await old_owner.service.run(guild_id, old_owner.service.hand_off, guild_id)
+        assert backend.load_guild(guild_id) == before
+        assert old_owner.service.sessions.get_game(guild_id) is None
+        assert guild_id not in old_owner.service.loaded
+
+        # The new owner rehydrates the game on the guild's next event and carries on
+        new_owner = Process(backend, new_plan, 0)
+        gateway = FakeGateway(4)
+        gateway.connect(new_owner.router.shard_ids, new_owner.on_event)
+        result = await gateway.dispatch(guild_id, {"guild_id": guild_id, "username": "Alice", "targets": ["Dave"]})
+        assert new_owner.handled and "error" not in result
+        assert result["collection_complete"]
+
+        game = new_owner.service.sessions.get_game(guild_id)
+        assert game.action_collector.collected_actions["Bob"] == ["Carol"]
+        assert new_owner.service.sessions.get(guild_id).recipient_for("Alice") == 101
+        await new_owner.service.close()
+        await old_owner.service.close()
+
+    asyncio.run(scenario())
+
+
+def test_dm_for_another_process_is_relayed_to_the_owner():
+    async def scenario():
+        backend = MemoryGameStore()
+        plan = ShardPlan(4, 2)
+        guild_id = guild_on_shard(1, 4)
+        processes = [Process(backend, plan, 0), Process(backend, plan, 1)]
+        gateway = FakeGateway(4)
+        for process in processes:
+            gateway.connect(process.router.shard_ids, process.on_dm if 0 in process.router.shard_ids
+                            else process.on_event)
+
+        await start_game(processes[1], guild_id)
+        await processes[1].service.store.flush()
+
+        # DMs arrive on shard 0, which process 0 holds
+        assert await gateway.dispatch(None, {"member_id": 102, "username": "Bob", "targets": ["Carol"]}) is None
+        assert processes[1].handled == []
+        assert await processes[1].router.poll(processes[1].on_event) == 1
+        assert processes[1].handled[0]["guild_id"] == guild_id
+        game = processes[1].service.sessions.get_game(guild_id)
+        assert game.action_collector.collected_actions["Bob"] == ["Carol"]
+        for process in processes:
+            await process.service.close()
+
+    asyncio.run(scenario())
+
+
+def test_shard_plan_rejects_more_processes_than_shards():
+    with pytest.raises(ValueError):
+        ShardPlan(2, 3)
+    assert ShardPlan(5, 2).shards_for_process(1) == [1, 3]
@@ -29,7 +29,7 @@ if game.phase.value == "day":
     print(f"Now in Day {game.day_count}")
     print(f"Night count after night 0: {game.night_count}")
     
-    night_0_results = game.get_night_0_results()
+    night_0_results = game.get_night_1_results()
     print(f"\\n=== NIGHT 0 RESULTS ===")
     for username, result in night_0_results.items():
         print(f"{username}: {result}")
@@ -0,0 +1,67 @@
+import logging
+
+from timer_wheel import TimerWheel, timer_log
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def advance(wheel, ticks):
+    for _ in range(ticks):
+        wheel.advance()
+
+
+def test_delay_longer_than_one_rotation_fires_on_time():
+    wheel = TimerWheel(tick=0.5, slots=8)
+    fired = []
+    # 50 ticks: six full rotations of the 8 slots, then two more ticks
+    wheel.schedule(25.0, fired.append, "late")
+    wheel.schedule(4.0, fired.append, "early")
+
+    advance(wheel, 8)
+    assert fired == ["early"]
+    advance(wheel, 41)
+    assert fired == ["early"]
+    wheel.advance()
+    assert fired == ["early", "late"]
+    advance(wheel, 16)
+    assert fired == ["early", "late"]
+
+
+def test_cancelled_timer_never_fires():
+    wheel = TimerWheel(tick=1.0, slots=4)
+    fired = []
+    handle = wheel.schedule(3.0, fired.append, "cancelled")
+    wheel.schedule(3.0, fired.append, "kept")
+    wheel.advance()
+    handle.cancel()
+
+    advance(wheel, 12)
+    assert fired == ["kept"]
+    assert not any(wheel.slots)
+
+
+def test_failing_callback_is_logged_and_later_timers_still_fire():
+    def explode():
+        raise RuntimeError("boom")
+
+    handler = RecordingHandler()
+    timer_log.addHandler(handler)
+    try:
+        wheel = TimerWheel(tick=1.0, slots=4)
+        fired = []
+        wheel.schedule(1.0, explode)
+        wheel.schedule(1.0, fired.append, "same tick")
+        wheel.schedule(2.0, fired.append, "next tick")
+        advance(wheel, 2)
+    finally:
+        timer_log.removeHandler(handler)
+
+    assert fired == ["same tick", "next tick"]
+    assert [(record.getMessage(), record.fields) for record in handler.records] == [("timer_failed", {"error": "boom"})]
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from web_server import create_app
+
+ROLES = {"Alice": "Imp", "Bob": "Poisoner", "Charlie": "Monk", "Diana": "Fortune Teller", "Eve": "Empath",
+         "Frank": "Chef", "Grace": "Washerwoman"}
+
+
+async def receive_until(socket, event):
+    """Messages up to and including the first one for event."""
+    messages = []
+    while not messages or messages[-1]["event"] != event:
+        messages.append(await asyncio.wait_for(socket.receive_json(), 5))
+    return messages
+
+
+def test_game_plays_over_http_and_websockets():
+    async def scenario():
+        async with TestClient(TestServer(create_app(resolution="inline"))) as client:
+            response = await client.post("/games", json={"players": list(ROLES), "roles": ROLES})
+            assert response.status == 201
+            created = await response.json()
+            game_id, tokens = created["game_id"], created["tokens"]
+            assert created["phase"] == "night" and sorted(tokens) == sorted(ROLES)
+
+            watcher = await client.ws_connect(f"/games/{game_id}/ws")
+            seats = {username: await client.ws_connect(f"/games/{game_id}/ws?token={tokens[username]}")
+                     for username in ("Bob", "Diana")}
+            # Roles and prompts sent before the seats connected wait in their mailboxes
+            bob = await receive_until(seats["Bob"], "night_prompt")
+            assert bob[0] == {"event": "role", "role": "Poisoner"}
+            assert bob[-1]["role"] == "Poisoner" and "Bob" not in bob[-1]["targets"]
+            await receive_until(seats["Diana"], "night_prompt")
+
+            await seats["Bob"].send_json({"action": ["Eve"]})
+            assert await receive_until(seats["Bob"], "action_submitted") == [
+                {"event": "action_submitted", "targets": ["Eve"]}]
+            await seats["Diana"].send_json({"action": ["Alice"]})
+            assert (await receive_until(seats["Diana"], "error"))[-1]["error"].startswith("Diana (Fortune Teller)")
+            await seats["Diana"].send_json({"action": ["Alice", "Eve"]})
+
+            reading = (await receive_until(seats["Diana"], "night_results"))[-1]
+            assert reading["night"] == 1 and reading["result"].startswith("YES")
+            assert [message["event"] for message in await receive_until(watcher, "day_begins")] == [
+                "actions_complete", "day_begins"]
+
+            response = await client.post(f"/games/{game_id}/night")
+            assert await response.json() == {"phase": "night", "night": 2}
+            for username, targets in (("Alice", ["Frank"]), ("Bob", ["Eve"]), ("Charlie", ["Eve"])):
+                response = await client.post(f"/games/{game_id}/actions",
+                                             json={"token": tokens[username], "targets": targets})
+                assert response.status == 200
+            await seats["Diana"].send_json({"action": ["Alice", "Grace"]})
+
+            messages = await receive_until(watcher, "day_begins")
+            assert messages[0] == {"event": "night_begins", "night": 2}
+            assert messages[-1] == {"event": "day_begins", "day": 2, "deaths": ["Frank"]}
+            state = await (await client.get(f"/games/{game_id}")).json()
+            assert state["phase"] == "day" and not next(p for p in state["players"] if p["username"] == "Frank")["alive"]
+
+            response = await client.post(f"/games/{game_id}/actions", json={"token": "nope", "targets": ["Eve"]})
+            assert response.status == 403
+            for socket in (watcher, *seats.values()):
+                await socket.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,132 @@
+import functools
+import itertools
+import math
+
+import pytest
+
+from game_scripts import get_script
+from role_executor import RoleExecutor, get_role_handler
+from roles import Player, Team, roles
+from world_solver import WorldSolver, play_nights
+
+# Handlers whose result depends only on the seating and the draws, not on the player's choices
+CHOICELESS = ("Washerwoman", "Librarian", "Investigator", "Chef", "Empath", "Spy")
+
+
+class PathRandom:
+    """Makes each draw by following a fixed path of option indices, recording how many options each draw had.
+
+    sample and shuffle are made as successive choices without replacement,
+    which gives each ordering the same probability as the real ones.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.options = []
+
+    def _pick(self, count):
+        depth = len(self.options)
+        self.options.append(count)
+        return self.path[depth] if depth < len(self.path) else 0
+
+    def choice(self, seq):
+        return seq[self._pick(len(seq))]
+
+    def sample(self, population, k):
+        left = list(population)
+        return [left.pop(self._pick(len(left))) for _ in range(k)]
+
+    def shuffle(self, x):
+        left = list(x)
+        x[:] = [left.pop(self._pick(len(left))) for _ in range(len(left))]
+
+
+def outcomes(run):
+    """Every (result, probability) run(rng) can give, found by walking every option of every draw."""
+    paths = [[]]
+    while paths:
+        path = paths.pop()
+        rng = PathRandom(path)
+        result = run(rng)
+        taken = path + [0] * (len(rng.options) - len(path))
+        for depth in range(len(path), len(rng.options)):
+            paths.extend(taken[:depth] + [other] for other in range(1, rng.options[depth]))
+        yield result, math.prod(1 / count for count in rng.options)
+
+
+@functools.lru_cache()
+def deals(player_count):
+    """Probability of each set of roles the default script's deal can give."""
+    script = get_script()
+    found = {}
+    for dealt, probability in outcomes(lambda rng: script.select_roles(rng, player_count)):
+        key = frozenset(role.name for role in dealt)
+        found[key] = found.get(key, 0.0) + probability
+    return found
+
+
+def brute_force(usernames, viewer, role_name, result):
+    """username -> role -> probability over every deal and seating the viewer's role and result allow."""
+    viewer_seat = usernames.index(viewer)
+    others = [seat for seat in range(len(usernames)) if seat != viewer_seat]
+    weights = [{} for _ in usernames]
+    total = 0.0
+    worlds = 0
+    for dealt, probability in deals(len(usernames)).items():
+        if role_name not in dealt:
+            continue
+        for seated in itertools.permutations(sorted(dealt - {role_name})):
+            seat_roles = {viewer_seat: role_name, **dict(zip(others, seated))}
+            players = [Player(username) for username in usernames]
+            for seat, player in enumerate(players):
+                player.role = roles[seat_roles[seat]]
+            handler = get_role_handler(role_name)
+            likelihood = sum(chance for text, chance in
+                             outcomes(lambda rng: handler(RoleExecutor(players, rng), viewer, []))
+                             if text == result)
+            if not likelihood:
+                continue
+            worlds += 1
+            weight = probability * likelihood
+            total += weight
+            for seat, seat_role in seat_roles.items():
+                weights[seat][seat_role] = weights[seat].get(seat_role, 0.0) + weight
+    return worlds, {username: {name: weight / total for name, weight in seat_weights.items()}
+                    for username, seat_weights in zip(usernames, weights)}
+
+
+@pytest.mark.parametrize("player_count,nights", [(5, 1), (7, 2), (9, 1), (10, 2), (12, 1), (15, 1)])
+def test_true_assignment_is_always_possible(player_count, nights):
+    for seed in range(6):
+        game = play_nights(player_count, seed, nights)
+        evil = {p.username for p in game.players if p.role.team == Team.EVIL}
+        demon = next(p.username for p in game.players if p.role.name == "Imp")
+        for player in game.players:
+            solution = WorldSolver.from_game(game, player.username).solve()
+            assert solution.consistent
+
+            probabilities = solution.role_probabilities()
+            assert all(probabilities[p.username].get(p.role.name, 0.0) > 0 for p in game.players)
+            teams = solution.evil_teams()
+            assert any(team["demon"] == demon and set(team["minions"]) | {demon} == evil for team in teams)
+            assert math.fsum(team["probability"] for team in teams) == pytest.approx(1.0)
+            assert math.fsum(solution.demon_probabilities().values()) == pytest.approx(1.0)
+            assert math.fsum(solution.evil_probabilities().values()) == pytest.approx(len(evil))
+
+
+# Between them these games give a result to each role in CHOICELESS
+@pytest.mark.parametrize("seed", (1, 2, 6, 8, 14, 22))
+def test_five_player_posteriors_match_brute_force(seed):
+    game = play_nights(5, seed, 1)
+    usernames = [p.username for p in game.players]
+    viewers = [p for p in game.players if p.role.name in CHOICELESS and p.username in game.night_1_results]
+    assert viewers
+
+    for viewer in viewers:
+        result = game.night_1_results[viewer.username]
+        worlds, expected = brute_force(usernames, viewer.username, viewer.role.name, result)
+        solution = WorldSolver.from_game(game, viewer.username).solve()
+        assert solution.world_count == worlds
+        for username, probabilities in solution.role_probabilities().items():
+            possible = {role_name: probability for role_name, probability in probabilities.items() if probability}
+            assert possible == pytest.approx(expected[username], abs=1e-9)
@@ -0,0 +1,98 @@
+import asyncio
+import inspect
+import logging
+import math
+import time
+from typing import Any, Callable, List, Optional, Set
+from game_logging import log_event
+
+timer_log = logging.getLogger("clocktower.timers")
+
+
+class TimerHandle:
+    __slots__ = ("callback", "args", "rounds", "cancelled")
+
+    def __init__(self, callback: Callable, args: tuple, rounds: int):
+        self.callback = callback
+        self.args = args
+        self.rounds = rounds
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerWheel:
+    """Hashed timer wheel: one task drives every deadline in the process.
+
+    Timers land in slot (cursor + ticks) % slots and fire when the cursor
+    reaches them after the recorded number of full rotations, so scheduling
+    and cancelling are O(1) and each tick only touches one slot. Timers fire
+    within one tick of their deadline. A callback that returns a coroutine
+    is run as a task.
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 512):
+        self.tick = tick
+        self.slots: List[List[TimerHandle]] = [[] for _ in range(slots)]
+        self.cursor = 0
+        self._task: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+
+    def schedule(self, delay: float, callback: Callable[..., Any], *args) -> TimerHandle:
+        ticks = max(1, math.ceil(delay / self.tick))
+        handle = TimerHandle(callback, args, (ticks - 1) // len(self.slots))
+        self.slots[(self.cursor + ticks) % len(self.slots)].append(handle)
+        return handle
+
+    def advance(self):
+        """Move the cursor one tick and fire whatever is due there."""
+        self.cursor = (self.cursor + 1) % len(self.slots)
+        slot = self.slots[self.cursor]
+        if not slot:
+            return
+
+        due = []
+        waiting = []
+        for handle in slot:
+            if handle.cancelled:
+                continue
+            if handle.rounds:
+                handle.rounds -= 1
+                waiting.append(handle)
+            else:
+                due.append(handle)
+        self.slots[self.cursor] = waiting
+
+        for handle in due:
+            try:
+                outcome = handle.callback(*handle.args)
+                if inspect.isawaitable(outcome):
+                    task = asyncio.ensure_future(outcome)
+                    self._running.add(task)
+                    task.add_done_callback(self._task_done)
+            except Exception as e:
+                log_event(timer_log, logging.ERROR, "timer_failed", error=str(e))
+
+    def _task_done(self, task: asyncio.Task):
+        self._running.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log_event(timer_log, logging.ERROR, "timer_failed", error=str(task.exception()))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        next_tick = time.monotonic() + self.tick
+        while True:
+            await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+            # Catch up on ticks missed while the loop was busy
+            while time.monotonic() >= next_tick:
+                self.advance()
+                next_tick += self.tick
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,326 @@
+import argparse
+import asyncio
+import itertools
+import secrets
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from aiohttp import WSMsgType, web
+
+from game_service import GameService, GameTransport, PrivateEvent
+from guild_session import GuildSession
+from metrics import REGISTRY
+from night_resolver import NightResolver
+from roles import roles
+
+
+class WebTransport(GameTransport):
+    """Pushes game events to WebSocket clients as JSON objects: {"event": ..., **fields}.
+
+    Announcements go to every socket watching the game. Private events go to
+    the player's own socket, or wait in the player's mailbox until they
+    connect, so a client can create a game and pick up its role afterwards.
+    Besides the service's events, watchers see "night_begins" (night) and
+    "game_ended" when a game is stopped early; players get "action_submitted"
+    (targets) and "error" (error) replies on their socket.
+    """
+
+    def __init__(self):
+        self.tokens: Dict[str, Tuple[int, str]] = {}
+        self.game_tokens: Dict[int, List[str]] = {}
+        self.watchers: Dict[int, Set[web.WebSocketResponse]] = {}
+        self.player_sockets: Dict[int, Dict[str, web.WebSocketResponse]] = {}
+        self.mailboxes: Dict[int, Dict[str, List[Dict[str, Any]]]] = {}
+
+    def seat(self, game_id: int, usernames: List[str]) -> Dict[str, str]:
+        """Issue a token per player; the token is how a client proves which seat it holds."""
+        issued = {}
+        for username in usernames:
+            token = secrets.token_urlsafe(16)
+            self.tokens[token] = (game_id, username)
+            issued[username] = token
+        self.game_tokens[game_id] = list(issued.values())
+        self.watchers[game_id] = set()
+        self.player_sockets[game_id] = {}
+        self.mailboxes[game_id] = {}
+        return issued
+
+    async def connect(self, game_id: int, socket: web.WebSocketResponse, username: Optional[str] = None) -> bool:
+        """Start streaming a game to socket; False once the game is over."""
+        if game_id not in self.watchers:
+            return False
+        self.watchers[game_id].add(socket)
+        if username is not None:
+            self.player_sockets[game_id][username] = socket
+            for message in self.mailboxes[game_id].pop(username, []):
+                await self.send(socket, message)
+        return True
+
+    def disconnect(self, game_id: int, socket: web.WebSocketResponse, username: Optional[str] = None):
+        self.watchers.get(game_id, set()).discard(socket)
+        sockets = self.player_sockets.get(game_id, {})
+        if username is not None and sockets.get(username) is socket:
+            del sockets[username]
+
+    async def forget(self, game_id: int):
+        """Drop a finished game's tokens and mail, and close its sockets."""
+        for token in self.game_tokens.pop(game_id, ()):
+            del self.tokens[token]
+        self.player_sockets.pop(game_id, None)
+        self.mailboxes.pop(game_id, None)
+        await asyncio.gather(*(socket.close() for socket in self.watchers.pop(game_id, ())))
+
+    async def announce(self, session: GuildSession, event: str, **fields):
+        message = {"event": event, **fields}
+        for socket in list(self.watchers.get(session.guild_id, ())):
+            await self.send(socket, message)
+        if event == "game_over":
+            await self.forget(session.guild_id)
+
+    async def notify(self, session: GuildSession, messages: List[PrivateEvent]) -> List[str]:
+        sockets = self.player_sockets.get(session.guild_id, {})
+        mailboxes = self.mailboxes.get(session.guild_id, {})
+        for username, event, fields in messages:
+            message = {"event": event, **fields}
+            socket = sockets.get(username)
+            if socket is None or not await self.send(socket, message):
+                mailboxes.setdefault(username, []).append(message)
+        # Anything undelivered is kept for the player's next connection
+        return []
+
+    @staticmethod
+    async def send(socket: web.WebSocketResponse, message: Dict[str, Any]) -> bool:
+        if socket.closed:
+            return False
+        try:
+            await socket.send_json(message)
+        except ConnectionResetError:
+            return False
+        return True
+
+
+class WebFrontend:
+    """HTTP and WebSocket routes over a GameService, one game per id, many games per process.
+
+    POST   /games              {"players": [...], "roles": {player: role}?} -> game id and a token per player
+    GET    /games/{id}         public state
+    POST   /games/{id}/night   start the next night
+    POST   /games/{id}/actions {"token": ..., "targets": [...]}
+    DELETE /games/{id}         end the game
+    GET    /games/{id}/ws      event stream; ?token= to play the seat, send {"action": [targets]}
+    GET    /metrics            Prometheus metrics
+    """
+
+    def __init__(self, service: GameService, transport: WebTransport):
+        self.service = service
+        self.transport = transport
+        self.game_ids = itertools.count(1)
+        # Sessions index players by member id, so ids are unique across games
+        self.member_ids = itertools.count(1)
+        REGISTRY.gauge("clocktower_web_sockets", "WebSocket clients connected to this process",
+                       lambda: sum(len(watchers) for watchers in transport.watchers.values()))
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.add_routes([
+            web.post("/games", self.create_game),
+            web.get("/games/{game_id}", self.game_state),
+            web.post("/games/{game_id}/night", self.start_night),
+            web.post("/games/{game_id}/actions", self.submit_action),
+            web.delete("/games/{game_id}", self.end_game),
+            web.get("/games/{game_id}/ws", self.websocket),
+            web.get("/metrics", self.metrics),
+        ])
+        app.on_startup.append(self._startup)
+        app.on_shutdown.append(self._shutdown)
+        return app
+
+    async def _startup(self, app: web.Application):
+        self.service.start()
+
+    async def _shutdown(self, app: web.Application):
+        for game_id in list(self.transport.watchers):
+            await self.transport.forget(game_id)
+        await self.service.close()
+
+    def _game_id(self, request: web.Request) -> int:
+        try:
+            game_id = int(request.match_info["game_id"])
+        except ValueError:
+            raise web.HTTPNotFound()
+        if self.service.sessions.get_game(game_id) is None:
+            raise web.HTTPNotFound()
+        return game_id
+
+    @staticmethod
+    async def _body(request: web.Request) -> Dict[str, Any]:
+        try:
+            body = await request.json()
+        except ValueError:
+            raise web.HTTPBadRequest(text="Body must be JSON")
+        if not isinstance(body, dict):
+            raise web.HTTPBadRequest(text="Body must be a JSON object")
+        return body
+
+    # Handlers
+
+    async def create_game(self, request: web.Request) -> web.Response:
+        body = await self._body(request)
+        players = body.get("players")
+        hardcoded_roles = body.get("roles") or None
+        if not isinstance(players, list) or not all(isinstance(name, str) and name for name in players):
+            return web.json_response({"error": "players must be a list of names"}, status=400)
+        if len(set(players)) != len(players):
+            return web.json_response({"error": "Player names must be unique"}, status=400)
+        if hardcoded_roles is not None:
+            if not isinstance(hardcoded_roles, dict) or set(hardcoded_roles) - set(players):
+                return web.json_response({"error": "roles must map player names to roles"}, status=400)
+            unknown = [role for role in hardcoded_roles.values() if role not in roles]
+            if unknown:
+                return web.json_response({"error": f"Unknown roles: {', '.join(map(str, unknown))}"}, status=400)
+
+        game_id = next(self.game_ids)
+        result = await self.service.run(game_id, self._start, game_id, players, hardcoded_roles)
+        return web.json_response(result, status=400 if "error" in result else 201)
+
+    async def _start(self, game_id: int, players: List[str], hardcoded_roles: Optional[Dict[str, str]]) -> Dict:
+        result = self.service.start_game(game_id, players, [next(self.member_ids) for _ in players], hardcoded_roles)
+        if "error" in result:
+            self.service.sessions.end_game(game_id)
+            return result
+
+        tokens = self.transport.seat(game_id, players)
+        await self.service.deal_roles(game_id)
+        await self.service.prompt_night_actions(game_id)
+        return {"game_id": game_id, "phase": result["phase"], "players": result["players"], "tokens": tokens}
+
+    async def game_state(self, request: web.Request) -> web.Response:
+        game = self.service.sessions.get_game(self._game_id(request))
+        state = {
+            "phase": game.phase.value,
+            "day": game.day_count,
+            "night": game.night_count,
+            "players": [{"username": p.username, "alive": p.is_alive} for p in game.players],
+        }
+        if game.phase.value == "night":
+            state["pending_actions"] = len(game.action_collector.get_collection_status()["pending_players"])
+        return web.json_response(state)
+
+    async def start_night(self, request: web.Request) -> web.Response:
+        game_id = self._game_id(request)
+        result = await self.service.run(game_id, self._start_night, game_id)
+        return web.json_response(result, status=409 if "error" in result else 200)
+
+    async def _start_night(self, game_id: int) -> Dict:
+        session = self.service.sessions.get(game_id)
+        if session is None or session.game is None:
+            return {"error": "No active game found!"}
+        result = await self.service.progress_to_night(game_id)
+        if "error" in result:
+            return result
+
+        await self.transport.announce(session, "night_begins", night=session.game.night_count)
+        await self.service.prompt_night_actions(game_id)
+        return {"phase": session.game.phase.value, "night": session.game.night_count}
+
+    async def submit_action(self, request: web.Request) -> web.Response:
+        game_id = self._game_id(request)
+        body = await self._body(request)
+        seat = self.transport.tokens.get(body.get("token"))
+        if seat is None or seat[0] != game_id:
+            return web.json_response({"error": "Unknown token for this game"}, status=403)
+
+        targets = body.get("targets") or []
+        if not isinstance(targets, list):
+            return web.json_response({"error": "targets must be a list of names"}, status=400)
+        result = await self.service.run(game_id, self._submit, game_id, seat[1], targets)
+        return web.json_response(result, status=400 if "error" in result else 200)
+
+    async def _submit(self, game_id: int, username: str, targets: List[str],
+                      socket: Optional[web.WebSocketResponse] = None) -> Dict:
+        if self.service.sessions.get_game(game_id) is None:
+            return {"error": "No active game found!"}
+        result = await self.service.submit_action(game_id, username, targets)
+        if "error" in result:
+            return result
+
+        # The submitter hears their action landed before the night's outcome
+        reply = {"event": "action_submitted", "targets": targets}
+        if socket is not None:
+            await WebTransport.send(socket, reply)
+        if result.get("collection_complete"):
+            await self.service.finish_night(game_id, result, "actions_complete")
+        return reply
+
+    async def end_game(self, request: web.Request) -> web.Response:
+        game_id = self._game_id(request)
+        await self.service.run(game_id, self._end, game_id)
+        return web.json_response({"ended": game_id})
+
+    async def _end(self, game_id: int):
+        session = self.service.sessions.get(game_id)
+        if session is None or session.game is None:
+            return
+        await self.transport.announce(session, "game_ended")
+        self.service.end_game(game_id)
+        await self.transport.forget(game_id)
+
+    async def websocket(self, request: web.Request) -> web.WebSocketResponse:
+        game_id = self._game_id(request)
+        token = request.query.get("token")
+        username = None
+        if token is not None:
+            seat = self.transport.tokens.get(token)
+            if seat is None or seat[0] != game_id:
+                raise web.HTTPForbidden(text="Unknown token for this game")
+            username = seat[1]
+
+        socket = web.WebSocketResponse(heartbeat=30)
+        await socket.prepare(request)
+        if not await self.service.run(game_id, self.transport.connect, game_id, socket, username):
+            await socket.close()
+            return socket
+        try:
+            async for message in socket:
+                if message.type != WSMsgType.TEXT:
+                    continue
+                try:
+                    data = message.json()
+                except ValueError:
+                    data = None
+                if username is None or not isinstance(data, dict) or not isinstance(data.get("action"), list):
+                    await WebTransport.send(socket, {"event": "error", "error": 'Players send {"action": [targets]}'})
+                    continue
+
+                result = await self.service.run(game_id, self._submit, game_id, username, data["action"], socket)
+                if "error" in result:
+                    await WebTransport.send(socket, {"event": "error", **result})
+        finally:
+            self.transport.disconnect(game_id, socket, username)
+        return socket
+
+    async def metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=REGISTRY.render(), content_type="text/plain")
+
+
+def create_app(night_timeout: Optional[float] = None, night_timeout_policy: str = "random",
+               resolution: str = "thread") -> web.Application:
+    transport = WebTransport()
+    service = GameService(transport, resolver=NightResolver(resolution), night_timeout=night_timeout,
+                          night_timeout_policy=night_timeout_policy)
+    return WebFrontend(service, transport).app()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Host Clocktower games over HTTP and WebSockets")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--night-timeout", type=float, help="seconds players get to act each night (default: wait for everyone)")
+    parser.add_argument("--night-timeout-policy", choices=("random", "skip"), default="random")
+    parser.add_argument("--resolution", choices=("inline", "thread", "process"), default="thread",
+                        help="where nights are resolved")
+    args = parser.parse_args(argv)
+    web.run_app(create_app(args.night_timeout, args.night_timeout_policy, args.resolution), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,564 @@
+import argparse
+import itertools
+import math
+import random
+import time
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from clocktower_game import ClocktowerGame
+from game_scripts import Script, get_script
+from roles import GamePhase, Role, RoleType, roles
+
+TYPES = (RoleType.TOWNSFOLK, RoleType.OUTSIDER, RoleType.MINION, RoleType.DEMON)
+EVIL_TYPES = (RoleType.MINION, RoleType.DEMON)
+
+# Seat -> role name fixed by what the player knows
+Pins = Dict[int, str]
+# A demon seat (-1 for none) and a bitmask of minion seats
+Layout = Tuple[int, int]
+
+NOTHING_TO_SHOW = {
+    "No townsfolk to show": RoleType.TOWNSFOLK,
+    "No outsiders to show": RoleType.OUTSIDER,
+    "No minions to show": RoleType.MINION,
+}
+
+
+def arrangements(free: int, required: int, seats: int) -> int:
+    """Ways to seat distinct roles from `free` in `seats` seats using all `required` of them (inclusion-exclusion)."""
+    return sum((-1) ** left_out * math.comb(required, left_out) * math.perm(free - left_out, seats)
+               for left_out in range(required + 1))
+
+
+class _Fill(NamedTuple):
+    """How one type's unpinned seats are filled: the roles left to deal, those that must appear, and the seat count."""
+    free: List[str]
+    required: Set[str]
+    seats: int
+
+
+class _Layouts:
+    """Evil layouts of one shape, with how often each seat is the demon or a minion across them."""
+
+    __slots__ = ("layouts", "demon_counts", "minion_counts")
+
+    def __init__(self, size: int):
+        self.layouts: List[Layout] = []
+        self.demon_counts = [0] * size
+        self.minion_counts = [0] * size
+
+    def add(self, demon: int, minions: int):
+        self.layouts.append((demon, minions))
+        if demon >= 0:
+            self.demon_counts[demon] += 1
+        seat = 0
+        while minions:
+            if minions & 1:
+                self.minion_counts[seat] += 1
+            minions >>= 1
+            seat += 1
+
+
+class WorldSolver:
+    """Enumerates the role assignments consistent with one player's view of a game.
+
+    Worlds follow how the script deals: demons and minions are drawn, a
+    drawn Baron (or any role with a setup modifier) changes how many of the
+    later types are drawn, and the roles are shuffled round the circle.
+    Information results are truthful, as the engine has no drunkenness,
+    poisoned information or misregistration. A world is the roles as dealt; a mid-game starpass is
+    not modelled.
+
+    The search has two layers. Evil layouts (a demon seat and a bitmask of
+    minion seats) are enumerated with Chef, Empath and Fortune Teller
+    results pruning partial layouts. The good roles on top of a layout are
+    counted in closed form: once the known roles are pinned, the remaining
+    seats of a type are interchangeable. Layout searches are memoized on
+    the masks that shape them, so every type split and pinned-role case
+    with the same shape shares one search.
+    """
+
+    def __init__(self, usernames: List[str], script: Optional[Script] = None):
+        self.usernames = list(usernames)
+        self.size = len(self.usernames)
+        self.seat_index = {username: seat for seat, username in reversed(list(enumerate(self.usernames)))}
+        self.script = script if script is not None else get_script()
+        if self.size not in self.script.setups:
+            raise ValueError(f"{self.script.name} has no {self.size}-player setup")
+        # Results may name any role; only roles in the script's pools can be in play
+        self.role_table = roles
+        self.pools: Dict[RoleType, List[str]] = {role_type: [role.name for role in pool]
+                                                 for role_type, pool in self.script.pools[self.size].items()}
+        self.modifier_roles = [role_name for role_type in TYPES for role_name in self.pools[role_type]
+                               if role_name in self.script.modifiers]
+
+        # Each clause is a list of pins of which exactly one holds, and the
+        # role type whose count the result's random pick was made from
+        self.clauses: List[Tuple[List[Tuple[int, str]], Optional[RoleType]]] = []
+        self.chef: List[int] = []
+        # (alive neighbours mask, evil count)
+        self.empath: List[Tuple[int, int]] = []
+        self.demon_within: List[int] = []
+        self.not_demon = 0
+        self.empty_types: List[RoleType] = []
+        self.unparsed: List[str] = []
+        self.must_evil = 0
+        self.must_good = 0
+        self._layout_cache: Dict[Tuple, _Layouts] = {}
+
+    @classmethod
+    def from_game(cls, game: ClocktowerGame, username: str) -> "WorldSolver":
+        """Solver for what username knows: the seating, who is alive, their own role and their results."""
+        player = game.get_player(username)
+        if player is None or player.role is None:
+            raise ValueError(f"{username} has no role in this game")
+
+        solver = cls([p.username for p in game.players], game.script)
+        solver.know_role(username, player.role.name)
+        first_night = game.night_1_results.get(username)
+        if first_night:
+            solver.add_result(username, first_night)
+        if game.night_count > 1:
+            latest = game.night_action_results.get(username)
+            if latest:
+                # Nobody dies after the Imp acts, so tonight's living players are still the ones alive now
+                solver.add_result(username, latest, [p.username for p in game.players if p.is_alive])
+        return solver
+
+    def know_role(self, username: str, role_name: str):
+        self.clauses.append(([(self.seat_index[username], role_name)], None))
+
+    def add_result(self, username: str, text: str, alive: Optional[Iterable[str]] = None) -> bool:
+        """Add one information result received by username; returns False if it was not understood.
+
+        alive lists the players alive when the result was given (everyone by default).
+        """
+        alive_mask = self._mask(alive) if alive is not None else (1 << self.size) - 1
+        if self._parse(self.seat_index[username], text, alive_mask):
+            return True
+        self.unparsed.append(text)
+        return False
+
+    def _parse(self, seat: int, text: str, alive_mask: int) -> bool:
+        if text in NOTHING_TO_SHOW:
+            self.empty_types.append(NOTHING_TO_SHOW[text])
+            return True
+
+        if text.startswith("Pairs of adjacent evil players: "):
+            self.chef.append(int(text.rsplit(" ", 1)[1]))
+            return True
+
+        if text.startswith("You sense ") and text.endswith(" evil neighbor(s)"):
+            neighbors = (1 << ((seat - 1) % self.size)) | (1 << ((seat + 1) % self.size))
+            self.empath.append((neighbors & alive_mask, int(text.split(" ")[2])))
+            return True
+
+        if text.startswith("YES - one of ") and text.endswith(" is a Demon"):
+            pair = self._split_pair(text[len("YES - one of "):-len(" is a Demon")], " or ")
+            if pair:
+                self.demon_within.append(self._mask(pair))
+            return pair is not None
+
+        if text.startswith("NO - neither ") and text.endswith(" is a Demon"):
+            pair = self._split_pair(text[len("NO - neither "):-len(" is a Demon")], " nor ")
+            if pair:
+                self.not_demon |= self._mask(pair)
+            return pair is not None
+
+        if text.startswith("GRIMOIRE:\n"):
+            pins = []
+            for line in text.split("\n")[1:]:
+                name, _, rest = line.rpartition(": ")
+                role_name = rest.split(" (", 1)[0]
+                if name not in self.seat_index or role_name not in self.role_table:
+                    return False
+                pins.append((self.seat_index[name], role_name))
+            for pin in pins:
+                self.clauses.append(([pin], None))
+            return True
+
+        described, _, role_name = text.rpartition(" is the ")
+        if role_name not in self.role_table:
+            return False
+        if described.startswith("Player [") and described.endswith("]"):
+            # Washerwoman, Librarian and Investigator: one of two players, the true one picked at random
+            pair = self._split_pair(described[len("Player ["):-1], "] or [")
+            if pair is None:
+                return False
+            self.clauses.append(([(self.seat_index[name], role_name) for name in pair],
+                                 self.role_table[role_name].role_type))
+            return True
+        if described in self.seat_index:
+            # Ravenkeeper, or a two-seat pick with nobody else to show
+            self.clauses.append(([(self.seat_index[described], role_name)], None))
+            return True
+        return False
+
+    def _split_pair(self, text: str, separator: str) -> Optional[Tuple[str, str]]:
+        # Usernames may contain the separator, so try every split until both halves are players
+        start = text.find(separator)
+        while start >= 0:
+            first, second = text[:start], text[start + len(separator):]
+            if first in self.seat_index and second in self.seat_index:
+                return first, second
+            start = text.find(separator, start + 1)
+        return None
+
+    def _mask(self, usernames: Iterable[str]) -> int:
+        mask = 0
+        for username in usernames:
+            mask |= 1 << self.seat_index[username]
+        return mask
+
+    def solve(self) -> "WorldSolution":
+        solution = WorldSolution(self.usernames, self.role_table)
+        self._propagate()
+        cases = [(pins, self._case_shape(pins)) for pins in self._pin_cases()]
+        for counts, dealt_modifiers, prior in self._setups():
+            likelihood = self._likelihood(counts)
+            if not likelihood:
+                continue
+            for pins, (demon_allowed, minion_allowed, required) in cases:
+                fills = self._fills(counts, dealt_modifiers, pins)
+                if fills is None:
+                    continue
+                ways = self._completions(counts, fills)
+                if not ways:
+                    continue
+                layouts = self._layouts(counts[RoleType.DEMON], counts[RoleType.MINION],
+                                        demon_allowed, minion_allowed, required)
+                if layouts.layouts:
+                    solution.add(counts, pins, fills, ways, prior * likelihood, layouts)
+        return solution
+
+    def _propagate(self):
+        # Empath results that pin both living neighbours to one alignment
+        self.must_evil = 0
+        self.must_good = 0
+        for neighbors, evil_count in self.empath:
+            if evil_count == 0:
+                self.must_good |= neighbors
+            elif evil_count == neighbors.bit_count():
+                self.must_evil |= neighbors
+        self._layout_cache.clear()
+
+    def _setups(self) -> List[Tuple[Dict[RoleType, int], Set[str], float]]:
+        """Every way the deal can go: type counts, the modifier roles dealt, and the prior of each world.
+
+        Each type's roles are a uniform draw of its count from its pool, so
+        once the counts are fixed every world with them is equally likely.
+        """
+        base = self.script.setups[self.size]
+        options = []
+        for size in range(len(self.modifier_roles) + 1):
+            for dealt in itertools.combinations(self.modifier_roles, size):
+                dealt_roles = [self.role_table[role_name] for role_name in dealt]
+                counts = self.script.counts_with(base, dealt_roles)
+                if any(sum(1 for role in dealt_roles if role.role_type == role_type) > counts[role_type]
+                       or not 0 <= counts[role_type] <= len(self.pools[role_type]) for role_type in TYPES):
+                    continue
+                # "No townsfolk to show" comes from a Townsfolk who sees nobody else of their type
+                if any(counts[role_type] != (role_type == RoleType.TOWNSFOLK) for role_type in self.empty_types):
+                    continue
+                prior = 1.0
+                for role_type in TYPES:
+                    prior /= math.comb(len(self.pools[role_type]), counts[role_type])
+                options.append((counts, set(dealt), prior))
+        return options
+
+    def _likelihood(self, counts: Dict[RoleType, int]) -> float:
+        # A two-player result names its true player uniformly among the others of that type
+        likelihood = 1.0
+        for _, role_type in self.clauses:
+            if role_type is not None:
+                others = counts[role_type] - (role_type == RoleType.TOWNSFOLK)
+                if others <= 0:
+                    return 0.0
+                likelihood /= others
+        return likelihood
+
+    def _pin_cases(self) -> List[Pins]:
+        """Expand the clauses into disjoint sets of pins; roles are unique, so no two pins may share one."""
+        cases = {}
+        for choice in itertools.product(*(options for options, _ in self.clauses)):
+            pins: Pins = {}
+            used = set()
+            for seat, role_name in choice:
+                if seat in pins:
+                    if pins[seat] != role_name:
+                        break
+                    continue
+                if role_name in used:
+                    break
+                pins[seat] = role_name
+                used.add(role_name)
+            else:
+                cases.setdefault(frozenset(pins.items()), pins)
+        return list(cases.values())
+
+    def _case_shape(self, pins: Pins) -> Tuple[int, int, int]:
+        masks = {role_type: 0 for role_type in TYPES}
+        for seat, role_name in pins.items():
+            masks[self.role_table[role_name].role_type] |= 1 << seat
+        good = masks[RoleType.TOWNSFOLK] | masks[RoleType.OUTSIDER]
+        everyone = (1 << self.size) - 1
+        demon_allowed = everyone & ~good & ~masks[RoleType.MINION] & ~self.not_demon
+        if masks[RoleType.DEMON]:
+            demon_allowed &= masks[RoleType.DEMON]
+        for pair in self.demon_within:
+            demon_allowed &= pair
+        minion_allowed = everyone & ~good & ~masks[RoleType.DEMON]
+        return demon_allowed, minion_allowed, masks[RoleType.MINION]
+
+    def _fills(self, counts: Dict[RoleType, int], dealt_modifiers: Set[str], pins: Pins) -> Optional[Dict[RoleType, _Fill]]:
+        """What is left to deal per type once pins are placed, or None if the pins cannot occur in this deal."""
+        pinned_roles = set(pins.values())
+        if any(role_name in self.modifier_roles and role_name not in dealt_modifiers for role_name in pinned_roles):
+            return None
+        fills = {}
+        for role_type in TYPES:
+            pool = self.pools[role_type]
+            pinned = sum(1 for role_name in pinned_roles if self.role_table[role_name].role_type == role_type)
+            if pinned > counts[role_type] or sum(1 for role_name in pinned_roles if role_name in pool) != pinned:
+                return None
+            free = [role_name for role_name in pool if role_name not in pinned_roles
+                    and (role_name not in self.modifier_roles or role_name in dealt_modifiers)]
+            fills[role_type] = _Fill(free, {role_name for role_name in free if role_name in dealt_modifiers},
+                                     counts[role_type] - pinned)
+        return fills
+
+    def _completions(self, counts: Dict[RoleType, int], fills: Dict[RoleType, _Fill]) -> int:
+        """Ways to fill in the unpinned roles on any one evil layout."""
+        ways = 1
+        for fill in fills.values():
+            ways *= arrangements(len(fill.free), len(fill.required), fill.seats)
+        free_good = fills[RoleType.TOWNSFOLK].seats + fills[RoleType.OUTSIDER].seats
+        return ways * math.comb(free_good, fills[RoleType.OUTSIDER].seats)
+
+    def _layouts(self, demons: int, minions: int, demon_allowed: int, minion_allowed: int, required: int) -> _Layouts:
+        key = (demons, minions, demon_allowed, minion_allowed, required)
+        found = self._layout_cache.get(key)
+        if found is None:
+            found = self._layout_cache[key] = self._search_layouts(demons, minions, demon_allowed,
+                                                                   minion_allowed, required)
+        return found
+
+    def _search_layouts(self, demons: int, minions: int, demon_allowed: int, minion_allowed: int,
+                        required: int) -> _Layouts:
+        found = _Layouts(self.size)
+        if demons:
+            demon_seats = [seat for seat in range(self.size) if (demon_allowed & ~self.must_good) >> seat & 1]
+        elif self.demon_within:
+            return found
+        else:
+            demon_seats = [-1]
+
+        for demon in demon_seats:
+            demon_bit = 1 << demon if demon >= 0 else 0
+            forced = (required | self.must_evil) & ~demon_bit
+            candidates = minion_allowed & ~demon_bit & ~self.must_good
+            remaining = minions - forced.bit_count()
+            if forced & ~candidates or remaining < 0:
+                continue
+            optional = [seat for seat in range(self.size) if (candidates & ~forced) >> seat & 1]
+            self._choose_minions(found, demon, demon_bit | forced, optional, 0, remaining)
+        return found
+
+    def _choose_minions(self, found: _Layouts, demon: int, evil: int, optional: List[int], start: int,
+                        remaining: int):
+        # Evil pairs and evil neighbours only grow as minions are added, so a partial layout over a target is dead
+        pairs = (evil & ((evil >> 1) | ((evil & 1) << (self.size - 1)))).bit_count()
+        for target in self.chef:
+            if pairs > target or (not remaining and pairs != target):
+                return
+        for neighbors, target in self.empath:
+            seen = (evil & neighbors).bit_count()
+            if seen > target or (not remaining and seen != target):
+                return
+
+        if not remaining:
+            found.add(demon, evil & ~(1 << demon) if demon >= 0 else evil)
+            return
+        for index in range(start, len(optional) - remaining + 1):
+            self._choose_minions(found, demon, evil | 1 << optional[index], optional, index + 1, remaining - 1)
+
+
+class WorldSolution:
+    """Posterior over the worlds a WorldSolver found.
+
+    world_count is the number of distinct role assignments consistent with
+    the player's view. Probabilities weight each world by how likely the
+    deal and the player's results were under it.
+    """
+
+    def __init__(self, usernames: List[str], role_table: Dict[str, Role]):
+        self.usernames = usernames
+        self.role_table = role_table
+        self.world_count = 0
+        self._total = 0.0
+        self._teams: Dict[Layout, float] = {}
+        self._role_weights: List[Dict[str, float]] = [{} for _ in usernames]
+        self._parts: List[Tuple[Pins, Dict[RoleType, _Fill], float, _Layouts]] = []
+
+    @property
+    def consistent(self) -> bool:
+        return self.world_count > 0
+
+    def add(self, counts: Dict[RoleType, int], pins: Pins, fills: Dict[RoleType, _Fill], ways: int,
+            weight: float, layouts: _Layouts):
+        layout_weight = ways * weight
+        layout_count = len(layouts.layouts)
+        self.world_count += ways * layout_count
+        self._total += layout_weight * layout_count
+        self._parts.append((pins, fills, weight, layouts))
+        for layout in layouts.layouts:
+            self._teams[layout] = self._teams.get(layout, 0.0) + layout_weight
+
+        # Chance that each unpinned role is on a given unpinned seat of its type
+        role_shares: Dict[RoleType, List[Tuple[str, float]]] = {}
+        for role_type, fill in fills.items():
+            shares = []
+            if fill.seats:
+                total = arrangements(len(fill.free), len(fill.required), fill.seats)
+                without = arrangements(len(fill.free) - 1, len(fill.required), fill.seats)
+                for role_name in fill.free:
+                    used = 1.0 if role_name in fill.required else 1.0 - without / total
+                    shares.append((role_name, used / fill.seats))
+            role_shares[role_type] = shares
+        free_good = fills[RoleType.TOWNSFOLK].seats + fills[RoleType.OUTSIDER].seats
+        outsider_share = fills[RoleType.OUTSIDER].seats / free_good if free_good else 0.0
+
+        for seat, weights in enumerate(self._role_weights):
+            if seat in pins:
+                weights[pins[seat]] = weights.get(pins[seat], 0.0) + layout_weight * layout_count
+                continue
+            demon = layouts.demon_counts[seat]
+            minion = layouts.minion_counts[seat]
+            good = layout_count - demon - minion
+            for role_type, seats, share in ((RoleType.DEMON, demon, 1.0), (RoleType.MINION, minion, 1.0),
+                                            (RoleType.OUTSIDER, good, outsider_share),
+                                            (RoleType.TOWNSFOLK, good, 1.0 - outsider_share)):
+                if seats and share:
+                    for role_name, role_share in role_shares[role_type]:
+                        weights[role_name] = weights.get(role_name, 0.0) + layout_weight * seats * share * role_share
+
+    def role_probabilities(self) -> Dict[str, Dict[str, float]]:
+        """username -> role -> probability, most likely roles first."""
+        if not self._total:
+            return {}
+        return {username: dict(sorted(((role_name, weight / self._total) for role_name, weight in weights.items()),
+                                      key=lambda item: -item[1]))
+                for username, weights in zip(self.usernames, self._role_weights)}
+
+    def type_probabilities(self, role_types: Iterable[RoleType]) -> Dict[str, float]:
+        role_types = set(role_types)
+        if not self._total:
+            return {}
+        return {username: sum(weight for role_name, weight in weights.items()
+                              if self.role_table[role_name].role_type in role_types) / self._total
+                for username, weights in zip(self.usernames, self._role_weights)}
+
+    def evil_probabilities(self) -> Dict[str, float]:
+        return self.type_probabilities(EVIL_TYPES)
+
+    def demon_probabilities(self) -> Dict[str, float]:
+        return self.type_probabilities([RoleType.DEMON])
+
+    def evil_teams(self, limit: Optional[int] = None) -> List[Dict]:
+        """Distinct placements of the demon and minions, most likely first."""
+        teams = sorted(self._teams.items(), key=lambda item: -item[1])[:limit]
+        return [{"demon": self.usernames[demon] if demon >= 0 else None,
+                 "minions": [username for seat, username in enumerate(self.usernames) if minions >> seat & 1],
+                 "probability": weight / self._total}
+                for (demon, minions), weight in teams]
+
+    def assignments(self) -> Iterator[Tuple[Dict[str, str], float]]:
+        """Lazily yield every consistent assignment (username -> role) with its probability."""
+        size = len(self.usernames)
+        for pins, fills, weight, layouts in self._parts:
+            probability = weight / self._total
+
+            def dealt(role_type: RoleType, seats: int) -> Iterator[Tuple[str, ...]]:
+                fill = fills[role_type]
+                return (chosen for chosen in itertools.permutations(fill.free, seats)
+                        if fill.required.issubset(chosen))
+
+            for demon, minions in layouts.layouts:
+                demon_seats = [demon] if demon >= 0 and demon not in pins else []
+                minion_seats = [seat for seat in range(size) if minions >> seat & 1 and seat not in pins]
+                good_seats = [seat for seat in range(size)
+                              if seat != demon and not minions >> seat & 1 and seat not in pins]
+                for demon_roles, minion_roles in itertools.product(dealt(RoleType.DEMON, len(demon_seats)),
+                                                                   dealt(RoleType.MINION, len(minion_seats))):
+                    for outsider_seats in itertools.combinations(good_seats, fills[RoleType.OUTSIDER].seats):
+                        townsfolk_seats = [seat for seat in good_seats if seat not in outsider_seats]
+                        for outsider_roles, townsfolk_roles in itertools.product(
+                                dealt(RoleType.OUTSIDER, len(outsider_seats)),
+                                dealt(RoleType.TOWNSFOLK, len(townsfolk_seats))):
+                            seat_roles = dict(pins)
+                            seat_roles.update(zip(demon_seats, demon_roles))
+                            seat_roles.update(zip(minion_seats, minion_roles))
+                            seat_roles.update(zip(outsider_seats, outsider_roles))
+                            seat_roles.update(zip(townsfolk_seats, townsfolk_roles))
+                            yield {self.usernames[seat]: seat_roles[seat] for seat in range(size)}, probability
+
+
+def play_nights(player_count: int, seed: int, nights: int) -> ClocktowerGame:
+    """A seeded game played with random targets until the given night has resolved."""
+    from simulator import RandomAgent
+
+    rng = random.Random(seed)
+    agent = RandomAgent(rng)
+    game = ClocktowerGame(rng=rng, verbose=False)
+    game.start_game([f"Player{i + 1}" for i in range(player_count)])
+    while game.phase != GamePhase.ENDED:
+        if game.phase == GamePhase.NIGHT:
+            for username in game.action_collector.get_collection_status()["pending_players"]:
+                game.submit_night_action(username, agent.choose_targets(game, game.get_player(username)))
+        elif game.night_count >= nights:
+            break
+        else:
+            game.progress_to_night()
+    return game
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Enumerate the worlds consistent with one player's information")
+    parser.add_argument("--players", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--nights", type=int, default=1, help="nights to play before solving")
+    parser.add_argument("--player", help="whose view to solve (default: the first player with a result)")
+    parser.add_argument("--top", type=int, default=10, help="evil teams to list")
+    args = parser.parse_args(argv)
+
+    game = play_nights(args.players, args.seed, args.nights)
+    username = args.player or next((p.username for p in game.players
+                                    if p.username in game.night_1_results or p.username in game.night_action_results),
+                                   game.players[0].username)
+    started = time.perf_counter()
+    solver = WorldSolver.from_game(game, username)
+    solution = solver.solve()
+    elapsed = time.perf_counter() - started
+
+    print(f"{username} is the {game.get_player(username).role.name}")
+    for result in (game.night_1_results.get(username), game.night_action_results.get(username)):
+        if result:
+            print(f"  {result}")
+    print(f"\n{solution.world_count:,} consistent worlds in {elapsed * 1000:.1f}ms")
+    if not solution.consistent:
+        return
+
+    print(f"\n{'Demon':<12}{'Minions':<36}{'Probability':>12}")
+    for team in solution.evil_teams(args.top):
+        print(f"{team['demon'] or '-':<12}{', '.join(team['minions']):<36}{team['probability'] * 100:>11.2f}%")
+
+    evil = solution.evil_probabilities()
+    demon = solution.demon_probabilities()
+    print(f"\n{'Player':<12}{'Evil':>8}{'Demon':>8}  Actual")
+    for player in game.players:
+        print(f"{player.username:<12}{evil[player.username] * 100:>7.1f}%{demon[player.username] * 100:>7.1f}%"
+              f"  {player.role.name if player.role else '-'}")
+
+
+if __name__ == '__main__':
+    main()